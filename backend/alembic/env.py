@@ -12,7 +12,7 @@ if BASE_DIR not in sys.path:
     sys.path.append(BASE_DIR)
 
 from app.database import Base  # noqa: E402
-from app.models import CheckIn, Goal, GoalHistory, User  # noqa: E402
+from app.models import CheckIn, CheckinBitmap, Goal, GoalHistory, GoalTombstone, Job, Notification, User, UserStats  # noqa: E402
 
 # this is the Alembic Config object, which provides
 # access to the values within the .ini file in use.
@@ -0,0 +1,73 @@
+"""Add user_stats summary table
+
+Revision ID: 202610180900
+Revises: 202510211000
+Create Date: 2026-10-18 09:00:00.000000
+
+"""
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision = "202610180900"
+down_revision = "202510211000"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "user_stats",
+        sa.Column("user_id", postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column("total_goals", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("completed_goals", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("total_days_to_complete", sa.BigInteger(), nullable=False, server_default="0"),
+        sa.Column("fastest_goal_id", postgresql.UUID(as_uuid=True), nullable=True),
+        sa.Column("fastest_goal_days", sa.Integer(), nullable=True),
+        sa.Column("updated_at", sa.DateTime(timezone=True), server_default=sa.text("now()"), nullable=True),
+        sa.ForeignKeyConstraint(["user_id"], ["users.id"], ondelete="CASCADE"),
+        sa.ForeignKeyConstraint(["fastest_goal_id"], ["goals.id"], ondelete="SET NULL"),
+        sa.PrimaryKeyConstraint("user_id"),
+    )
+    op.create_index("ix_goals_user_id_completed_at", "goals", ["user_id", "completed_at"], unique=False)
+
+    # Backfill every existing user
+    op.execute(
+        """
+        INSERT INTO user_stats (
+            user_id, total_goals, completed_goals, total_days_to_complete,
+            fastest_goal_id, fastest_goal_days
+        )
+        SELECT
+            u.id,
+            COALESCE(agg.total_goals, 0),
+            COALESCE(agg.completed_goals, 0),
+            COALESCE(agg.total_days_to_complete, 0),
+            fastest.id,
+            fastest.days
+        FROM users u
+        LEFT JOIN (
+            SELECT
+                user_id,
+                count(*) AS total_goals,
+                count(completed_at) AS completed_goals,
+                COALESCE(sum(completed_at::date - created_at::date), 0) AS total_days_to_complete
+            FROM goals
+            GROUP BY user_id
+        ) agg ON agg.user_id = u.id
+        LEFT JOIN (
+            SELECT DISTINCT ON (user_id)
+                user_id, id, completed_at::date - created_at::date AS days
+            FROM goals
+            WHERE completed_at IS NOT NULL
+            ORDER BY user_id, days, completed_at
+        ) fastest ON fastest.user_id = u.id
+        """
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_goals_user_id_completed_at", table_name="goals")
+    op.drop_table("user_stats")
@@ -0,0 +1,59 @@
+"""Add check-in streak index to user_stats
+
+Revision ID: 202610181000
+Revises: 202610180900
+Create Date: 2026-10-18 10:00:00.000000
+
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = "202610181000"
+down_revision = "202610180900"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column("user_stats", sa.Column("current_streak_start", sa.Date(), nullable=True))
+    op.add_column("user_stats", sa.Column("last_checkin_date", sa.Date(), nullable=True))
+    op.add_column("user_stats", sa.Column("longest_streak", sa.Integer(), nullable=False, server_default="0"))
+
+    # Backfill from existing check-ins (gaps-and-islands over consecutive days)
+    op.execute(
+        """
+        WITH days AS (
+            SELECT
+                user_id,
+                date,
+                date - (row_number() OVER (PARTITION BY user_id ORDER BY date))::int AS run_key
+            FROM checkins
+        ), runs AS (
+            SELECT user_id, min(date) AS run_start, max(date) AS run_end, count(*) AS run_length
+            FROM days
+            GROUP BY user_id, run_key
+        ), latest AS (
+            SELECT DISTINCT ON (user_id)
+                user_id,
+                run_start,
+                run_end,
+                max(run_length) OVER (PARTITION BY user_id) AS longest
+            FROM runs
+            ORDER BY user_id, run_end DESC
+        )
+        UPDATE user_stats s SET
+            current_streak_start = latest.run_start,
+            last_checkin_date = latest.run_end,
+            longest_streak = latest.longest
+        FROM latest
+        WHERE s.user_id = latest.user_id
+        """
+    )
+
+
+def downgrade() -> None:
+    op.drop_column("user_stats", "longest_streak")
+    op.drop_column("user_stats", "last_checkin_date")
+    op.drop_column("user_stats", "current_streak_start")
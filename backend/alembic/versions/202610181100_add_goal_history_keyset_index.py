@@ -0,0 +1,33 @@
+"""Add keyset index on goal_history
+
+Revision ID: 202610181100
+Revises: 202610181000
+Create Date: 2026-10-18 11:00:00.000000
+
+"""
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "202610181100"
+down_revision = "202610181000"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Matches the history ordering; delta is included so running sums are
+    # answered from the index alone. Supersedes the plain goal_id index.
+    op.create_index(
+        "ix_goal_history_goal_id_date_created_at",
+        "goal_history",
+        ["goal_id", "date", "created_at", "id"],
+        unique=False,
+        postgresql_include=["delta"],
+    )
+    op.drop_index("ix_goal_history_goal_id", table_name="goal_history")
+
+
+def downgrade() -> None:
+    op.create_index("ix_goal_history_goal_id", "goal_history", ["goal_id"], unique=False)
+    op.drop_index("ix_goal_history_goal_id_date_created_at", table_name="goal_history")
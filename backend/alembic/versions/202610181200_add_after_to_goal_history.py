@@ -0,0 +1,68 @@
+"""Store cumulative value on goal_history rows
+
+Revision ID: 202610181200
+Revises: 202610181100
+Create Date: 2026-10-18 12:00:00.000000
+
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = "202610181200"
+down_revision = "202610181100"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column("goal_history", sa.Column("after", sa.Float(), nullable=True))
+
+    # Same derivation the history endpoint used: the value before the first
+    # entry is current minus all deltas (floored at zero), then accumulate.
+    op.execute(
+        """
+        WITH initial AS (
+            SELECT g.id AS goal_id, GREATEST(0, g.current - sum(h.delta)) AS value
+            FROM goals g
+            JOIN goal_history h ON h.goal_id = g.id
+            GROUP BY g.id, g.current
+        ), running AS (
+            SELECT
+                h.id,
+                i.value + sum(h.delta) OVER (
+                    PARTITION BY h.goal_id
+                    ORDER BY h.date, h.created_at, h.id
+                    ROWS UNBOUNDED PRECEDING
+                ) AS after
+            FROM goal_history h
+            JOIN initial i ON i.goal_id = h.goal_id
+        )
+        UPDATE goal_history h SET after = running.after
+        FROM running
+        WHERE h.id = running.id
+        """
+    )
+    op.alter_column("goal_history", "after", nullable=False)
+
+    op.drop_index("ix_goal_history_goal_id_date_created_at", table_name="goal_history")
+    op.create_index(
+        "ix_goal_history_goal_id_date_created_at",
+        "goal_history",
+        ["goal_id", "date", "created_at", "id"],
+        unique=False,
+        postgresql_include=["delta", "after"],
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_goal_history_goal_id_date_created_at", table_name="goal_history")
+    op.create_index(
+        "ix_goal_history_goal_id_date_created_at",
+        "goal_history",
+        ["goal_id", "date", "created_at", "id"],
+        unique=False,
+        postgresql_include=["delta"],
+    )
+    op.drop_column("goal_history", "after")
@@ -0,0 +1,52 @@
+"""Track goal changes for delta sync
+
+Revision ID: 202610181300
+Revises: 202610181200
+Create Date: 2026-10-18 13:00:00.000000
+
+"""
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision = "202610181300"
+down_revision = "202610181200"
+branch_labels = None
+depends_on = None
+
+CURRENT_XID = "(pg_current_xact_id()::text)::bigint"
+
+
+def upgrade() -> None:
+    # Existing rows get this migration's transaction id, which is below any
+    # cursor handed out afterwards.
+    op.add_column(
+        "goals",
+        sa.Column("change_xid", sa.BigInteger(), nullable=False, server_default=sa.text(CURRENT_XID)),
+    )
+    op.create_index("ix_goals_user_id_change_xid", "goals", ["user_id", "change_xid"], unique=False)
+
+    op.create_table(
+        "goal_tombstones",
+        sa.Column("goal_id", postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column("user_id", postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column("deleted_xid", sa.BigInteger(), nullable=False, server_default=sa.text(CURRENT_XID)),
+        sa.Column("deleted_at", sa.DateTime(timezone=True), server_default=sa.text("now()"), nullable=True),
+        sa.ForeignKeyConstraint(["user_id"], ["users.id"], ondelete="CASCADE"),
+        sa.PrimaryKeyConstraint("goal_id"),
+    )
+    op.create_index(
+        "ix_goal_tombstones_user_id_deleted_xid",
+        "goal_tombstones",
+        ["user_id", "deleted_xid"],
+        unique=False,
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_goal_tombstones_user_id_deleted_xid", table_name="goal_tombstones")
+    op.drop_table("goal_tombstones")
+    op.drop_index("ix_goals_user_id_change_xid", table_name="goals")
+    op.drop_column("goals", "change_xid")
@@ -0,0 +1,46 @@
+"""Add indexes for goal listing sorts and filters
+
+Revision ID: 202610181400
+Revises: 202610181300
+Create Date: 2026-10-18 14:00:00.000000
+
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = "202610181400"
+down_revision = "202610181300"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_index("ix_goals_user_id_name", "goals", ["user_id", "name", "id"], unique=False)
+    op.create_index("ix_goals_user_id_deadline", "goals", ["user_id", "deadline", "id"], unique=False)
+    op.create_index(
+        "ix_goals_user_id_deadline_active",
+        "goals",
+        ["user_id", "deadline", "id"],
+        unique=False,
+        postgresql_where=sa.text("completed_at IS NULL"),
+    )
+    op.create_index("ix_goals_user_id_color", "goals", ["user_id", "color"], unique=False)
+    op.create_index(
+        "ix_goals_user_id_progress",
+        "goals",
+        ["user_id", sa.text("(current / target)"), "id"],
+        unique=False,
+    )
+    # Every index above starts with user_id
+    op.drop_index("ix_goals_user_id", table_name="goals")
+
+
+def downgrade() -> None:
+    op.create_index("ix_goals_user_id", "goals", ["user_id"], unique=False)
+    op.drop_index("ix_goals_user_id_progress", table_name="goals")
+    op.drop_index("ix_goals_user_id_color", table_name="goals")
+    op.drop_index("ix_goals_user_id_deadline_active", table_name="goals")
+    op.drop_index("ix_goals_user_id_deadline", table_name="goals")
+    op.drop_index("ix_goals_user_id_name", table_name="goals")
@@ -0,0 +1,58 @@
+"""Add per-year check-in bitmaps
+
+Revision ID: 202610181500
+Revises: 202610181400
+Create Date: 2026-10-18 15:00:00.000000
+
+"""
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision = "202610181500"
+down_revision = "202610181400"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "checkin_bitmaps",
+        sa.Column("user_id", postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column("year", sa.SmallInteger(), nullable=False),
+        sa.Column("days", sa.LargeBinary(length=46), nullable=False),
+        sa.ForeignKeyConstraint(["user_id"], ["users.id"], ondelete="CASCADE"),
+        sa.PrimaryKeyConstraint("user_id", "year"),
+    )
+
+    # One 46-byte (366-bit) bitmap per user and year; bit n of byte n / 8
+    # (LSB-first, as get_bit/set_bit number them) is day n of the year.
+    op.execute(
+        """
+        WITH days AS (
+            SELECT user_id, EXTRACT(YEAR FROM date)::int AS year, date - date_trunc('year', date)::date AS day
+            FROM checkins
+        ), bytes AS (
+            SELECT user_id, year, day / 8 AS idx, bit_or(1 << (day % 8)) AS value
+            FROM days
+            GROUP BY user_id, year, day / 8
+        ), years AS (
+            SELECT DISTINCT user_id, year FROM bytes
+        )
+        INSERT INTO checkin_bitmaps (user_id, year, days)
+        SELECT
+            y.user_id,
+            y.year,
+            decode(string_agg(lpad(to_hex(COALESCE(b.value, 0)), 2, '0'), '' ORDER BY i), 'hex')
+        FROM years y
+        CROSS JOIN generate_series(0, 45) AS i
+        LEFT JOIN bytes b ON b.user_id = y.user_id AND b.year = y.year AND b.idx = i
+        GROUP BY y.user_id, y.year
+        """
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("checkin_bitmaps")
@@ -0,0 +1,158 @@
+"""Async variants of the auth routes, mounted when DATABASE_MODE=async."""
+
+from datetime import timedelta
+
+from fastapi import APIRouter, Depends, HTTPException, status
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.api.auth import TELEGRAM_USER_UPSERT, LoginForm, TelegramAuthData, TelegramWebAppData
+from app.core.cache import deferred_deletes
+from app.core.hashing import hash_password_async, verify_and_update_async
+from app.core.security import (
+    ACCESS_TOKEN_EXPIRE_MINUTES,
+    create_access_token,
+    get_current_user_async,
+    verify_telegram_auth,
+    verify_telegram_web_app_data,
+)
+from app.database import get_async_db
+from app.models.user import User
+from app.schemas.user import Token, UserCreate, UserResponse
+
+router = APIRouter(prefix="/auth", tags=["auth"])
+
+
+async def _get_or_create_telegram_user(db: AsyncSession, telegram_id: int, name: str):
+    user_id = (await db.execute(TELEGRAM_USER_UPSERT, {"telegram_id": telegram_id, "name": name})).scalar_one()
+    await db.commit()
+    return user_id
+
+
+@router.post("/register", response_model=UserResponse, status_code=status.HTTP_201_CREATED)
+async def register(user_data: UserCreate, db: AsyncSession = Depends(get_async_db)):
+    existing_user = (
+        await db.execute(select(User).where(User.email == user_data.email))
+    ).scalar_one_or_none()
+    if existing_user:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Email already registered",
+        )
+
+    if len(user_data.password) < 8:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Password must be at least 8 characters long",
+        )
+
+    hashed_password = await hash_password_async(user_data.password)
+    new_user = User(
+        email=user_data.email,
+        name=user_data.name,
+        hashed_password=hashed_password,
+    )
+    db.add(new_user)
+    await db.commit()
+    await db.refresh(new_user)
+
+    return new_user
+
+
+@router.post("/login", response_model=Token)
+async def login(form_data: LoginForm = Depends(), db: AsyncSession = Depends(get_async_db)):
+    user = (
+        await db.execute(select(User).where(User.email == form_data.username))
+    ).scalar_one_or_none()
+    is_valid, new_hash = (
+        await verify_and_update_async(form_data.password, user.hashed_password) if user else (False, None)
+    )
+    if not is_valid:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Incorrect email or password",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+
+    if new_hash:
+        # Hash scheme or cost changed since this password was stored
+        user.hashed_password = new_hash
+        # The commit invalidates the cached user; keep Redis off the loop
+        async with deferred_deletes():
+            await db.commit()
+
+    access_token_expires = timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
+    access_token = create_access_token(data={"sub": str(user.id)}, expires_delta=access_token_expires)
+
+    return {"access_token": access_token, "token_type": "bearer"}
+
+
+@router.get("/me", response_model=UserResponse)
+async def get_me(current_user: User = Depends(get_current_user_async)):
+    return current_user
+
+
+@router.post("/telegram", response_model=Token)
+async def telegram_login(auth_data: TelegramAuthData, db: AsyncSession = Depends(get_async_db)):
+    """
+    Authenticate user via Telegram Login Widget
+    """
+    auth_dict = auth_data.model_dump(exclude_none=True)
+
+    if not verify_telegram_auth(auth_dict):
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid Telegram authentication data"
+        )
+
+    name = auth_data.first_name
+    if auth_data.last_name:
+        name += f" {auth_data.last_name}"
+    user_id = await _get_or_create_telegram_user(db, auth_data.id, name)
+
+    access_token = create_access_token(
+        data={"sub": str(user_id)},
+        expires_delta=timedelta(hours=36)
+    )
+
+    return {"access_token": access_token, "token_type": "bearer"}
+
+
+@router.post("/telegram-miniapp", response_model=Token)
+async def telegram_miniapp_login(data: TelegramWebAppData, db: AsyncSession = Depends(get_async_db)):
+    """
+    Authenticate user via Telegram Mini App
+    """
+    verified_data = verify_telegram_web_app_data(data.initData)
+
+    if not verified_data:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid Telegram Mini App data"
+        )
+
+    user_data = verified_data.get('user')
+    if not user_data:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="User data not found in initData"
+        )
+
+    telegram_id = user_data.get('id')
+    if not telegram_id:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Telegram ID not found"
+        )
+
+    first_name = user_data.get('first_name', 'User')
+    last_name = user_data.get('last_name', '')
+    name = f"{first_name} {last_name}".strip()
+    user_id = await _get_or_create_telegram_user(db, telegram_id, name)
+
+    access_token = create_access_token(
+        data={"sub": str(user_id)},
+        expires_delta=timedelta(hours=36)
+    )
+
+    return {"access_token": access_token, "token_type": "bearer"}
@@ -0,0 +1,178 @@
+"""Async variants of the goals routes, mounted when DATABASE_MODE=async."""
+
+from datetime import date
+from typing import List, Optional
+
+from fastapi import APIRouter, Depends, Query, Request, Response, status
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.api import goals
+from app.core import response_cache
+from app.core.security import get_current_user_async
+from app.database import get_async_db, run_in_session
+from app.models.user import User
+from app.schemas.goal import (
+    GoalChangesResponse,
+    GoalCreate,
+    GoalResponse,
+    GoalUpdate,
+    ProgressBatch,
+    ProgressBatchResponse,
+    ProgressUpdate,
+)
+from app.schemas.history import GoalHistoryResponse, ProgressAtResponse
+
+router = APIRouter(prefix="/goals", tags=["goals"])
+
+
+@router.get("", response_model=List[GoalResponse])
+async def get_goals(
+    request: Request,
+    status_filter: Optional[str] = Query(None, alias="status"),
+    color: Optional[str] = None,
+    sort: str = "deadline_asc",
+    limit: Optional[int] = Query(None, ge=1, le=500),
+    after: Optional[str] = None,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(get_current_user_async),
+):
+    today = date.today()
+    return await response_cache.acached_response(
+        request,
+        current_user.id,
+        ("goals", today, status_filter, color, sort, limit, after),
+        lambda uncached_request: run_in_session(
+            db,
+            goals.build_goal_list,
+            user_id=current_user.id,
+            status_filter=status_filter,
+            color=color,
+            sort=sort,
+            limit=limit,
+            after=after,
+            today=today,
+            request=uncached_request,
+        ),
+    )
+
+
+@router.get("/changes", response_model=GoalChangesResponse)
+async def get_goal_changes(
+    since: Optional[str] = None,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(get_current_user_async),
+):
+    return await run_in_session(db, goals.get_goal_changes, since=since, current_user=current_user)
+
+
+@router.post("", response_model=GoalResponse, status_code=status.HTTP_201_CREATED)
+async def create_goal(
+    goal_data: GoalCreate,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(get_current_user_async),
+):
+    return await run_in_session(db, goals.create_goal, goal_data=goal_data, current_user=current_user)
+
+
+@router.post("/progress:batch", response_model=ProgressBatchResponse)
+async def update_progress_batch(
+    batch: ProgressBatch,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(get_current_user_async),
+):
+    return await run_in_session(db, goals.update_progress_batch, batch=batch, current_user=current_user)
+
+
+@router.get("/{goal_id}", response_model=GoalResponse)
+async def get_goal(
+    goal_id: str,
+    request: Request,
+    response: Response,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(get_current_user_async),
+):
+    return await run_in_session(
+        db, goals.get_goal, goal_id=goal_id, request=request, response=response, current_user=current_user
+    )
+
+
+@router.put("/{goal_id}", response_model=GoalResponse)
+async def update_goal(
+    goal_id: str,
+    goal_data: GoalUpdate,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(get_current_user_async),
+):
+    return await run_in_session(
+        db, goals.update_goal, goal_id=goal_id, goal_data=goal_data, current_user=current_user
+    )
+
+
+@router.delete("/{goal_id}", status_code=status.HTTP_204_NO_CONTENT)
+async def delete_goal(
+    goal_id: str,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(get_current_user_async),
+):
+    return await run_in_session(db, goals.delete_goal, goal_id=goal_id, current_user=current_user)
+
+
+@router.post("/{goal_id}/progress", response_model=GoalResponse)
+async def update_progress(
+    goal_id: str,
+    progress_data: ProgressUpdate,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(get_current_user_async),
+):
+    return await run_in_session(
+        db,
+        goals.update_progress,
+        goal_id=goal_id,
+        progress_data=progress_data,
+        current_user=current_user,
+    )
+
+
+@router.post("/{goal_id}/complete", response_model=GoalResponse)
+async def complete_goal(
+    goal_id: str,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(get_current_user_async),
+):
+    return await run_in_session(db, goals.complete_goal, goal_id=goal_id, current_user=current_user)
+
+
+@router.get("/{goal_id}/history", response_model=GoalHistoryResponse)
+async def get_goal_history(
+    goal_id: str,
+    request: Request,
+    response: Response,
+    limit: int = Query(100, ge=1, le=1000),
+    cursor: Optional[str] = None,
+    date_from: Optional[date] = None,
+    date_to: Optional[date] = None,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(get_current_user_async),
+):
+    return await run_in_session(
+        db,
+        goals.get_goal_history,
+        goal_id=goal_id,
+        request=request,
+        response=response,
+        limit=limit,
+        cursor=cursor,
+        date_from=date_from,
+        date_to=date_to,
+        current_user=current_user,
+    )
+
+
+@router.get("/{goal_id}/progress-at", response_model=ProgressAtResponse)
+async def get_progress_at(
+    goal_id: str,
+    day: date = Query(..., alias="date"),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(get_current_user_async),
+):
+    return await run_in_session(db, goals.get_progress_at, goal_id=goal_id, day=day, current_user=current_user)
@@ -0,0 +1,63 @@
+"""Async variants of the stats routes, mounted when DATABASE_MODE=async."""
+
+from datetime import date
+from typing import Optional
+
+from fastapi import APIRouter, Depends, Query, Request
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.api import stats
+from app.core import response_cache
+from app.core.security import get_current_user_async
+from app.database import get_async_db, run_in_session
+from app.models.user import User
+from app.schemas.stats import ActivityResponse, UserStatsResponse
+
+router = APIRouter(prefix="/stats", tags=["stats"])
+
+
+@router.get("", response_model=UserStatsResponse)
+async def get_user_stats(
+    request: Request,
+    period: int = Query(30, ge=1, le=365),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(get_current_user_async),
+):
+    today = date.today()
+    return await response_cache.acached_response(
+        request,
+        current_user.id,
+        ("stats", today, period),
+        lambda uncached_request: run_in_session(
+            db,
+            stats.build_user_stats,
+            user_id=current_user.id,
+            period=period,
+            today=today,
+            request=uncached_request,
+        ),
+    )
+
+
+@router.get("/activity", response_model=ActivityResponse)
+async def get_activity(
+    request: Request,
+    start: Optional[date] = Query(None, alias="from"),
+    end: Optional[date] = Query(None, alias="to"),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(get_current_user_async),
+):
+    start, end = stats.activity_range(start, end)
+    return await response_cache.acached_response(
+        request,
+        current_user.id,
+        ("activity", start, end),
+        lambda uncached_request: run_in_session(
+            db,
+            stats.build_activity,
+            user_id=current_user.id,
+            start=start,
+            end=end,
+            request=uncached_request,
+        ),
+    )
@@ -3,14 +3,16 @@ from typing import Dict, Any
 
 from fastapi import APIRouter, Depends, Form, HTTPException, status, Body
 from pydantic import BaseModel
+from sqlalchemy import text
+from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
 
+from app.core.hashing import hash_password_async, verify_and_update_async
 from app.core.security import (
     ACCESS_TOKEN_EXPIRE_MINUTES,
     create_access_token,
     get_current_user,
-    get_password_hash,
-    verify_password,
     verify_telegram_auth,
     verify_telegram_web_app_data,
 )
@@ -21,9 +23,32 @@ from app.schemas.user import Token, UserCreate, UserResponse
 router = APIRouter(prefix="/auth", tags=["auth"])
 
 
+def _user_by_email(db: Session, email: str):
+    return db.query(User).filter(User.email == email).first()
+
+
+def _create_user(db: Session, email: str, name: str, hashed_password: str) -> User:
+    new_user = User(
+        email=email,
+        name=name,
+        hashed_password=hashed_password,
+    )
+    db.add(new_user)
+    db.commit()
+    db.refresh(new_user)
+    return new_user
+
+
+def _store_password_hash(db: Session, user: User, hashed_password: str) -> None:
+    user.hashed_password = hashed_password
+    db.commit()
+
+
+# register and login are async so a request waiting for the hashing
+# executor holds no threadpool thread; their queries still run there.
 @router.post("/register", response_model=UserResponse, status_code=status.HTTP_201_CREATED)
-def register(user_data: UserCreate, db: Session = Depends(get_db)):
-    existing_user = db.query(User).filter(User.email == user_data.email).first()
+async def register(user_data: UserCreate, db: Session = Depends(get_db)):
+    existing_user = await run_in_threadpool(_user_by_email, db, user_data.email)
     if existing_user:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -36,17 +61,8 @@ def register(user_data: UserCreate, db: Session = Depends(get_db)):
             detail="Password must be at least 8 characters long",
         )
 
-    hashed_password = get_password_hash(user_data.password)
-    new_user = User(
-        email=user_data.email,
-        name=user_data.name,
-        hashed_password=hashed_password,
-    )
-    db.add(new_user)
-    db.commit()
-    db.refresh(new_user)
-
-    return new_user
+    hashed_password = await hash_password_async(user_data.password)
+    return await run_in_threadpool(_create_user, db, user_data.email, user_data.name, hashed_password)
 
 
 class LoginForm:
@@ -68,17 +84,25 @@ class LoginForm:
 
 
 @router.post("/login", response_model=Token)
-def login(form_data: LoginForm = Depends(), db: Session = Depends(get_db)):
-    user = db.query(User).filter(User.email == form_data.username).first()
-    if not user or not verify_password(form_data.password, user.hashed_password):
+async def login(form_data: LoginForm = Depends(), db: Session = Depends(get_db)):
+    user = await run_in_threadpool(_user_by_email, db, form_data.username)
+    is_valid, new_hash = (
+        await verify_and_update_async(form_data.password, user.hashed_password) if user else (False, None)
+    )
+    if not is_valid:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect email or password",
             headers={"WWW-Authenticate": "Bearer"},
         )
 
+    user_id = user.id
+    if new_hash:
+        # Hash scheme or cost changed since this password was stored
+        await run_in_threadpool(_store_password_hash, db, user, new_hash)
+
     access_token_expires = timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
-    access_token = create_access_token(data={"sub": str(user.id)}, expires_delta=access_token_expires)
+    access_token = create_access_token(data={"sub": str(user_id)}, expires_delta=access_token_expires)
 
     return {"access_token": access_token, "token_type": "bearer"}
 
@@ -88,6 +112,28 @@ def get_me(current_user: User = Depends(get_current_user)):
     return current_user
 
 
+# Finds or creates the user of a Telegram login in one statement. An
+# existing user is only read, so repeated logins write nothing (and keep
+# their name). Otherwise the INSERT creates the user; if a concurrent first
+# login of the same account wins the race, ON CONFLICT ... DO UPDATE waits
+# for it and returns its row instead of failing with a unique violation.
+TELEGRAM_USER_UPSERT = text("""
+WITH existing AS (
+    SELECT id FROM users WHERE telegram_id = :telegram_id
+),
+inserted AS (
+    INSERT INTO users (id, telegram_id, name)
+    SELECT gen_random_uuid(), CAST(:telegram_id AS bigint), CAST(:name AS varchar)
+    WHERE NOT EXISTS (SELECT 1 FROM existing)
+    ON CONFLICT (telegram_id) DO UPDATE SET telegram_id = EXCLUDED.telegram_id
+    RETURNING id
+)
+SELECT id FROM existing
+UNION ALL
+SELECT id FROM inserted
+""").columns(id=UUID(as_uuid=True))
+
+
 class TelegramAuthData(BaseModel):
     id: int
     first_name: str
@@ -113,29 +159,16 @@ def telegram_login(auth_data: TelegramAuthData, db: Session = Depends(get_db)):
             detail="Invalid Telegram authentication data"
         )
 
-    # Find or create user
-    user = db.query(User).filter(User.telegram_id == auth_data.id).first()
-
-    if not user:
-        # Create new user
-        name = auth_data.first_name
-        if auth_data.last_name:
-            name += f" {auth_data.last_name}"
-
-        user = User(
-            telegram_id=auth_data.id,
-            name=name,
-            email=None,
-            hashed_password=None
-        )
-        db.add(user)
-        db.commit()
-        db.refresh(user)
+    name = auth_data.first_name
+    if auth_data.last_name:
+        name += f" {auth_data.last_name}"
+    user_id = db.execute(TELEGRAM_USER_UPSERT, {"telegram_id": auth_data.id, "name": name}).scalar_one()
+    db.commit()
 
     # Create access token with 36 hours expiration
     access_token_expires = timedelta(hours=36)
     access_token = create_access_token(
-        data={"sub": str(user.id)},
+        data={"sub": str(user_id)},
         expires_delta=access_token_expires
     )
 
@@ -175,29 +208,16 @@ def telegram_miniapp_login(data: TelegramWebAppData, db: Session = Depends(get_d
             detail="Telegram ID not found"
         )
 
-    # Find or create user
-    user = db.query(User).filter(User.telegram_id == telegram_id).first()
-
-    if not user:
-        # Create new user
-        first_name = user_data.get('first_name', 'User')
-        last_name = user_data.get('last_name', '')
-        name = f"{first_name} {last_name}".strip()
-
-        user = User(
-            telegram_id=telegram_id,
-            name=name,
-            email=None,
-            hashed_password=None
-        )
-        db.add(user)
-        db.commit()
-        db.refresh(user)
+    first_name = user_data.get('first_name', 'User')
+    last_name = user_data.get('last_name', '')
+    name = f"{first_name} {last_name}".strip()
+    user_id = db.execute(TELEGRAM_USER_UPSERT, {"telegram_id": telegram_id, "name": name}).scalar_one()
+    db.commit()
 
     # Create access token with 36 hours expiration
     access_token_expires = timedelta(hours=36)
     access_token = create_access_token(
-        data={"sub": str(user.id)},
+        data={"sub": str(user_id)},
         expires_delta=access_token_expires
     )
 
@@ -1,73 +1,95 @@
-from datetime import datetime, date as date_type
+from datetime import date as date_type
 from typing import List, Optional
 
-from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status
 from sqlalchemy.orm import Session
 
+from app.core import response_cache
+from app.core.etag import check_etag, etag_matches, make_etag
+from app.core.responses import json_response
 from app.core.security import get_current_user
 from app.database import get_db
-from app.models.checkin import CheckIn
 from app.models.goal import Goal
-from app.models.goal_history import GoalHistory
+from app.models.goal_tombstone import GoalTombstone
 from app.models.user import User
-from app.schemas.goal import GoalCreate, GoalResponse, GoalUpdate, ProgressUpdate
-from app.schemas.history import GoalHistoryResponse, HistoryEntry
+from app.schemas.goal import (
+    GoalChangesResponse,
+    GoalCreate,
+    GoalResponse,
+    GoalUpdate,
+    ProgressBatch,
+    ProgressBatchResponse,
+    ProgressUpdate,
+)
+from app.schemas.history import GoalHistoryResponse, ProgressAtResponse
+from app.services import changes, goal_list, history, progress, user_stats
 
 router = APIRouter(prefix="/goals", tags=["goals"])
 
+# Columns behind GoalResponse, selected directly by the list fast path
+GOAL_COLUMNS = tuple(getattr(Goal, field) for field in GoalResponse.model_fields)
 
-def create_checkin(db: Session, user_id, today: date_type):
-    """Create or get checkin for today."""
-    existing = (
-        db.query(CheckIn)
-        .filter(
-            CheckIn.user_id == user_id,
-            CheckIn.date == today,
-        )
-        .first()
+
+def build_goal_list(
+    db: Session,
+    user_id,
+    status_filter: Optional[str],
+    color: Optional[str],
+    sort: str,
+    limit: Optional[int],
+    after: Optional[str],
+    today: date_type,
+    request: Optional[Request] = None,
+):
+    """Cache entry for ``GET /goals``."""
+    version = changes.user_version(db, user_id)
+    etag = make_etag("goals", version, today, status_filter, color, sort, limit, after)
+    if request is not None and etag_matches(request, etag):
+        return response_cache.entry(etag)
+
+    rows, next_cursor = goal_list.list_goals(
+        db,
+        GOAL_COLUMNS,
+        user_id,
+        status_filter=status_filter,
+        color=color,
+        sort=sort,
+        today=today,
+        limit=limit,
+        after=after,
     )
-    if not existing:
-        checkin = CheckIn(user_id=user_id, date=today)
-        db.add(checkin)
-        db.commit()
+    return response_cache.entry(etag, rows, {"X-Next-Cursor": next_cursor} if next_cursor else None)
 
 
 @router.get("", response_model=List[GoalResponse])
 def get_goals(
+    request: Request,
     status_filter: Optional[str] = Query(None, alias="status"),
     color: Optional[str] = None,
     sort: str = "deadline_asc",
+    limit: Optional[int] = Query(None, ge=1, le=500),
+    after: Optional[str] = None,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user),
 ):
-    query = db.query(Goal).filter(Goal.user_id == current_user.id)
-
     today = date_type.today()
-    if status_filter == "completed":
-        query = query.filter(Goal.completed_at.isnot(None))
-    elif status_filter == "active":
-        query = query.filter(Goal.completed_at.is_(None))
-    elif status_filter == "overdue":
-        query = query.filter(
-            Goal.completed_at.is_(None),
-            Goal.deadline.isnot(None),
-            Goal.deadline < today,
-        )
-
-    if color:
-        query = query.filter(Goal.color == color.upper())
+    return response_cache.cached_response(
+        request,
+        current_user.id,
+        ("goals", today, status_filter, color, sort, limit, after),
+        lambda uncached_request: build_goal_list(
+            db, current_user.id, status_filter, color, sort, limit, after, today, uncached_request
+        ),
+    )
 
-    if sort == "name_asc":
-        query = query.order_by(Goal.name)
-    elif sort == "progress_desc":
-        query = query.order_by((Goal.current / Goal.target).desc())
-    elif sort == "deadline_desc":
-        query = query.order_by(Goal.deadline.desc().nullslast())
-    else:
-        query = query.order_by(Goal.deadline.asc().nullslast())
 
-    goals = query.all()
-    return goals
+@router.get("/changes", response_model=GoalChangesResponse)
+def get_goal_changes(
+    since: Optional[str] = None,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+):
+    return changes.goal_changes(db, current_user.id, since)
 
 
 @router.post("", response_model=GoalResponse, status_code=status.HTTP_201_CREATED)
@@ -92,20 +114,42 @@ def create_goal(
         current=0.0,
     )
     db.add(new_goal)
+    user_stats.record_goal_created(db, current_user.id)
+    progress.create_checkin(db, current_user.id, date_type.today())
     db.commit()
     db.refresh(new_goal)
-
-    create_checkin(db, current_user.id, date_type.today())
+    response_cache.invalidate(current_user.id)
 
     return new_goal
 
 
+@router.post("/progress:batch", response_model=ProgressBatchResponse)
+def update_progress_batch(
+    batch: ProgressBatch,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+):
+    results, goals = progress.apply_progress_batch(db, current_user.id, batch.items, date_type.today())
+    if goals:
+        response_cache.invalidate(current_user.id)
+    return {"results": results, "goals": goals}
+
+
 @router.get("/{goal_id}", response_model=GoalResponse)
 def get_goal(
     goal_id: str,
+    request: Request,
+    response: Response,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user),
 ):
+    version = changes.goal_version(db, current_user.id, goal_id)
+    if version is None:
+        raise HTTPException(status_code=404, detail="Goal not found")
+    not_modified = check_etag(request, response, make_etag("goal", goal_id, version))
+    if not_modified:
+        return not_modified
+
     goal = (
         db.query(Goal)
         .filter(
@@ -126,17 +170,6 @@ def update_goal(
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user),
 ):
-    goal = (
-        db.query(Goal)
-        .filter(
-            Goal.id == goal_id,
-            Goal.user_id == current_user.id,
-        )
-        .first()
-    )
-    if not goal:
-        raise HTTPException(status_code=404, detail="Goal not found")
-
     update_data = goal_data.dict(exclude_unset=True)
     if "color" in update_data and update_data["color"] is not None:
         update_data["color"] = update_data["color"].upper()
@@ -148,14 +181,10 @@ def update_goal(
                 detail="Deadline cannot be in the past",
             )
 
-    for field, value in update_data.items():
-        setattr(goal, field, value)
-
-    db.commit()
-    db.refresh(goal)
-
-    create_checkin(db, current_user.id, date_type.today())
-
+    goal = progress.apply_update(db, current_user.id, goal_id, update_data, date_type.today())
+    if not goal:
+        raise HTTPException(status_code=404, detail="Goal not found")
+    response_cache.invalidate(current_user.id)
     return goal
 
 
@@ -176,8 +205,11 @@ def delete_goal(
     if not goal:
         raise HTTPException(status_code=404, detail="Goal not found")
 
+    user_stats.record_goal_deleted(db, goal)
+    db.add(GoalTombstone(goal_id=goal.id, user_id=goal.user_id))
     db.delete(goal)
     db.commit()
+    response_cache.invalidate(current_user.id)
     return None
 
 
@@ -188,36 +220,17 @@ def update_progress(
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user),
 ):
-    goal = (
-        db.query(Goal)
-        .filter(
-            Goal.id == goal_id,
-            Goal.user_id == current_user.id,
-        )
-        .first()
+    goal = progress.apply_progress(
+        db,
+        current_user.id,
+        goal_id,
+        progress_data.delta,
+        progress_data.note,
+        date_type.today(),
     )
     if not goal:
         raise HTTPException(status_code=404, detail="Goal not found")
-
-    new_current = max(0, goal.current + progress_data.delta)
-    goal.current = new_current
-
-    history_entry = GoalHistory(
-        goal_id=goal.id,
-        date=date_type.today(),
-        delta=progress_data.delta,
-        note=progress_data.note,
-    )
-    db.add(history_entry)
-
-    if new_current >= goal.target and not goal.completed_at:
-        goal.completed_at = datetime.utcnow()
-
-    db.commit()
-    db.refresh(goal)
-
-    create_checkin(db, current_user.id, date_type.today())
-
+    response_cache.invalidate(current_user.id)
     return goal
 
 
@@ -227,6 +240,33 @@ def complete_goal(
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user),
 ):
+    goal = progress.apply_complete(db, current_user.id, goal_id, date_type.today())
+    if not goal:
+        raise HTTPException(status_code=404, detail="Goal not found")
+    response_cache.invalidate(current_user.id)
+    return goal
+
+
+@router.get("/{goal_id}/history", response_model=GoalHistoryResponse)
+def get_goal_history(
+    goal_id: str,
+    request: Request,
+    response: Response,
+    limit: int = Query(100, ge=1, le=1000),
+    cursor: Optional[str] = None,
+    date_from: Optional[date_type] = None,
+    date_to: Optional[date_type] = None,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+):
+    version = changes.goal_version(db, current_user.id, goal_id)
+    if version is None:
+        raise HTTPException(status_code=404, detail="Goal not found")
+    etag = make_etag("history", goal_id, version, limit, cursor, date_from, date_to)
+    not_modified = check_etag(request, response, etag)
+    if not_modified:
+        return not_modified
+
     goal = (
         db.query(Goal)
         .filter(
@@ -238,30 +278,14 @@ def complete_goal(
     if not goal:
         raise HTTPException(status_code=404, detail="Goal not found")
 
-    delta = goal.target - goal.current
-    goal.current = goal.target
-    goal.completed_at = datetime.utcnow()
+    page = history.history_page(db, goal, limit=limit, cursor=cursor, date_from=date_from, date_to=date_to)
+    return json_response(page, response)
 
-    if delta != 0:
-        history_entry = GoalHistory(
-            goal_id=goal.id,
-            date=date_type.today(),
-            delta=delta,
-            note="Отмечено как выполненное",
-        )
-        db.add(history_entry)
-
-    db.commit()
-    db.refresh(goal)
 
-    create_checkin(db, current_user.id, date_type.today())
-
-    return goal
-
-
-@router.get("/{goal_id}/history", response_model=GoalHistoryResponse)
-def get_goal_history(
+@router.get("/{goal_id}/progress-at", response_model=ProgressAtResponse)
+def get_progress_at(
     goal_id: str,
+    day: date_type = Query(..., alias="date"),
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user),
 ):
@@ -276,30 +300,4 @@ def get_goal_history(
     if not goal:
         raise HTTPException(status_code=404, detail="Goal not found")
 
-    history = (
-        db.query(GoalHistory)
-        .filter(GoalHistory.goal_id == goal.id)
-        .order_by(GoalHistory.date)
-        .all()
-    )
-
-    total_delta = sum(h.delta for h in history)
-    initial = max(0, goal.current - total_delta)
-
-    rows = []
-    acc = initial
-    for entry in history:
-        acc += entry.delta
-        done = min(acc, goal.target)
-        pct = int((done / goal.target) * 100) if goal.target > 0 else 0
-        rows.append(
-            HistoryEntry(
-                date=entry.date,
-                delta=entry.delta,
-                note=entry.note,
-                after=acc,
-                pct=pct,
-            )
-        )
-
-    return GoalHistoryResponse(initial=initial, rows=rows)
+    return history.progress_at(db, goal, day)
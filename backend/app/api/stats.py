@@ -1,113 +1,144 @@
-from datetime import date as date_type, timedelta
-from typing import List
+from datetime import date as date_type, datetime, time, timedelta
+from typing import Optional, Tuple
 
-from fastapi import APIRouter, Depends, Query
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, status
+from sqlalchemy import func
 from sqlalchemy.orm import Session
 
+from app.core import response_cache
+from app.core.etag import etag_matches, make_etag
 from app.core.security import get_current_user
 from app.database import get_db
-from app.models.checkin import CheckIn
 from app.models.goal import Goal
 from app.models.user import User
-from app.schemas.stats import ActivityPoint, FastestGoal, Streaks, UserStatsResponse
+from app.schemas.stats import ActivityResponse, UserStatsResponse
+from app.services import activity, changes, checkins, streaks as streak_index, user_stats
 
 router = APIRouter(prefix="/stats", tags=["stats"])
 
+MAX_ACTIVITY_YEARS = 20
 
-def calculate_streaks(checkins: List[CheckIn]) -> Streaks:
-    """Calculate current and longest streaks for a user."""
-    if not checkins:
-        return Streaks(current=0, longest=0)
 
-    dates = sorted(set(c.date for c in checkins))
-    today = date_type.today()
+def build_user_stats(db: Session, user_id, period: int, today: date_type, request: Optional[Request] = None):
+    """Cache entry for ``GET /stats``."""
+    etag = make_etag("stats", changes.user_version(db, user_id), today, period)
+    if request is not None and etag_matches(request, etag):
+        return response_cache.entry(etag)
+
+    summary = user_stats.get_user_stats(db, user_id)
+
+    total = summary.total_goals
+    completed = summary.completed_goals
+    rate = int((completed / total) * 100) if total > 0 else 0
+
+    fastest = None
+    if summary.fastest_goal_id is not None:
+        fastest_goal = db.get(Goal, summary.fastest_goal_id)
+        fastest = {
+            "goal_id": fastest_goal.id,
+            "name": fastest_goal.name,
+            "days": summary.fastest_goal_days,
+            "created_at": fastest_goal.created_at.date(),
+            "completed_at": fastest_goal.completed_at.date(),
+            "color": fastest_goal.color,
+        }
+
+    streaks = streak_index.current_streaks(summary, today)
+
+    start_date = today - timedelta(days=period - 1)
+    checkin_dates = checkins.days_between(db, user_id, start_date, today)
+    activity_series = []
+    for offset in range(period):
+        day = start_date + timedelta(days=offset)
+        activity_series.append({"date": day, "value": 1 if day in checkin_dates else 0})
 
-    current = 0
-    check_date = today
-    while check_date in dates:
-        current += 1
-        check_date -= timedelta(days=1)
+    avg_days = 0
+    if completed:
+        avg_days = summary.total_days_to_complete // completed
+
+    active_count = total - completed
+    active_rate = int((active_count / total) * 100) if total > 0 else 0
 
-    longest = 0
-    streak = 1
-    for idx in range(1, len(dates)):
-        if (dates[idx] - dates[idx - 1]).days == 1:
-            streak += 1
-        else:
-            longest = max(longest, streak)
-            streak = 1
-    longest = max(longest, streak)
+    thirty_days_ago = today - timedelta(days=30)
+    completed_last_30 = (
+        db.query(func.count(Goal.id))
+        .filter(
+            Goal.user_id == user_id,
+            Goal.completed_at >= datetime.combine(thirty_days_ago, time.min),
+        )
+        .scalar()
+    )
 
-    return Streaks(current=current, longest=longest)
+    # Built as plain data and serialised by orjson; the response model
+    # only documents the shape.
+    return response_cache.entry(
+        etag,
+        {
+            "total": total,
+            "completed": completed,
+            "rate": rate,
+            "fastest_goal": fastest,
+            "streaks": streaks.model_dump(),
+            "activity_series": activity_series,
+            "avg_days_to_complete": avg_days,
+            "active_rate": active_rate,
+            "completed_in_last_30_days": completed_last_30,
+        },
+    )
 
 
 @router.get("", response_model=UserStatsResponse)
 def get_user_stats(
+    request: Request,
     period: int = Query(30, ge=1, le=365),
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user),
 ):
-    goals = db.query(Goal).filter(Goal.user_id == current_user.id).all()
-    completed_goals = [goal for goal in goals if goal.completed_at is not None]
+    today = date_type.today()
+    return response_cache.cached_response(
+        request,
+        current_user.id,
+        ("stats", today, period),
+        lambda uncached_request: build_user_stats(db, current_user.id, period, today, uncached_request),
+    )
 
-    total = len(goals)
-    completed = len(completed_goals)
-    rate = int((completed / total) * 100) if total > 0 else 0
 
-    fastest = None
-    if completed_goals:
-        fastest_goal = min(
-            completed_goals,
-            key=lambda g: (g.completed_at.date() - g.created_at.date()).days,
-        )
-        days = (fastest_goal.completed_at.date() - fastest_goal.created_at.date()).days
-        fastest = FastestGoal(
-            goal_id=fastest_goal.id,
-            name=fastest_goal.name,
-            days=days,
-            created_at=fastest_goal.created_at.date(),
-            completed_at=fastest_goal.completed_at.date(),
-            color=fastest_goal.color,
+def activity_range(start: Optional[date_type], end: Optional[date_type]) -> Tuple[date_type, date_type]:
+    """Resolve and validate the ``from``/``to`` range of ``GET /stats/activity``."""
+    end = end or date_type.today()
+    start = start or end - timedelta(days=364)
+    if start > end:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="'from' must not be after 'to'")
+    if end.year - start.year >= MAX_ACTIVITY_YEARS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Range must span at most {MAX_ACTIVITY_YEARS} years",
         )
+    return start, end
 
-    checkins = db.query(CheckIn).filter(CheckIn.user_id == current_user.id).all()
-    streaks = calculate_streaks(checkins)
 
-    today = date_type.today()
-    start_date = today - timedelta(days=period - 1)
-    checkin_dates = set(c.date for c in checkins)
-    activity_series = [
-        ActivityPoint(date=start_date + timedelta(days=offset), value=1 if (start_date + timedelta(days=offset)) in checkin_dates else 0)
-        for offset in range(period)
-    ]
+def build_activity(db: Session, user_id, start: date_type, end: date_type, request: Optional[Request] = None):
+    """Cache entry for ``GET /stats/activity``."""
+    etag = make_etag("activity", changes.user_version(db, user_id), start, end)
+    if request is not None and etag_matches(request, etag):
+        return response_cache.entry(etag)
 
-    avg_days = 0
-    if completed_goals:
-        total_days = sum(
-            (goal.completed_at.date() - goal.created_at.date()).days for goal in completed_goals
-        )
-        avg_days = total_days // len(completed_goals)
+    years = activity.activity_bitmaps(db, user_id, start, end)
+    return response_cache.entry(etag, {"start": start, "end": end, "years": years})
 
-    active_count = len([goal for goal in goals if goal.completed_at is None])
-    active_rate = int((active_count / total) * 100) if total > 0 else 0
-
-    thirty_days_ago = today - timedelta(days=30)
-    completed_last_30 = len(
-        [
-            goal
-            for goal in completed_goals
-            if goal.completed_at.date() >= thirty_days_ago
-        ]
-    )
 
-    return UserStatsResponse(
-        total=total,
-        completed=completed,
-        rate=rate,
-        fastest_goal=fastest,
-        streaks=streaks,
-        activity_series=activity_series,
-        avg_days_to_complete=avg_days,
-        active_rate=active_rate,
-        completed_in_last_30_days=completed_last_30,
+@router.get("/activity", response_model=ActivityResponse)
+def get_activity(
+    request: Request,
+    start: Optional[date_type] = Query(None, alias="from"),
+    end: Optional[date_type] = Query(None, alias="to"),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+):
+    start, end = activity_range(start, end)
+    return response_cache.cached_response(
+        request,
+        current_user.id,
+        ("activity", start, end),
+        lambda uncached_request: build_activity(db, current_user.id, start, end, uncached_request),
     )
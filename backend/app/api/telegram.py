@@ -0,0 +1,48 @@
+"""Telegram webhook, mounted in both database modes (it does not touch the
+database itself; see ``app.services.telegram_updates``)."""
+
+import hmac
+from typing import Optional
+
+import orjson
+from fastapi import APIRouter, Header, HTTPException, Request, status
+
+from app.services import telegram_updates
+
+router = APIRouter(prefix="/telegram", tags=["telegram"])
+
+
+@router.post("/webhook")
+async def telegram_webhook(
+    request: Request,
+    x_telegram_bot_api_secret_token: Optional[str] = Header(None),
+):
+    secret = telegram_updates.TELEGRAM_WEBHOOK_SECRET
+    if not secret:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Webhook is not configured")
+    if not hmac.compare_digest((x_telegram_bot_api_secret_token or "").encode(), secret.encode()):
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Invalid secret token")
+
+    try:
+        update = orjson.loads(await request.body())
+    except orjson.JSONDecodeError:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid JSON")
+
+    queue = telegram_updates.updates
+    queue.counts["received"] += 1
+    try:
+        command = telegram_updates.parse_update(update) if isinstance(update, dict) else None
+    except ValueError:
+        # Answered with 200 all the same: a redelivery would not be valid either
+        queue.counts["invalid"] += 1
+        return {"ok": True}
+    if command is None:
+        queue.counts["ignored"] += 1
+    elif not queue.offer(command):
+        # Telegram redelivers updates that were not answered with 2xx
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Update queue is full",
+            headers={"Retry-After": "1"},
+        )
+    return {"ok": True}
@@ -0,0 +1,33 @@
+"""Rebuild derived per-user statistics from the source tables.
+
+Usage::
+
+    python -m app.commands.rebuild_stats             # every user
+    python -m app.commands.rebuild_stats --user-id <uuid>
+"""
+
+import argparse
+import uuid
+
+from app.database import SessionLocal
+from app.services import streaks, user_stats
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--user-id", type=uuid.UUID, default=None, help="rebuild a single user")
+    args = parser.parse_args(argv)
+
+    db = SessionLocal()
+    try:
+        rows = user_stats.rebuild_user_stats(db, args.user_id)
+        streaks.rebuild_streaks(db, args.user_id)
+        db.commit()
+    finally:
+        db.close()
+
+    print(f"Rebuilt user_stats for {rows} user(s)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,341 @@
+"""Load large volumes of synthetic users, goals, history and check-ins.
+
+Usage::
+
+    python -m app.commands.seed --users 1000000 --goals 10 --days 365 --workers 8
+
+Rows are generated in Python and streamed with ``COPY`` by ``--workers``
+processes, one transaction per chunk of ``--chunk-size`` users. The data
+keeps the invariants of the API:
+
+* ``goal_history`` has at most one row per goal and day, ``after`` is the
+  running total and never below 0, and ``goals.current`` is the sum of the
+  deltas;
+* ``completed_at`` is the time of the history row that reached ``target``
+  (a completed goal gets no further progress);
+* ``checkins`` has one row per user and day with any progress.
+
+Users have on average ``--goals`` goals (exponentially distributed, at
+most ``--max-goals``) and are active on a user-specific share of days
+(beta-distributed around ``--activity``). Goals are created during the
+last ``--days`` days. Every user's password is ``--password``; emails are
+``seed-<run>-<n>@example.com``.
+
+Before loading, foreign keys, unique constraints and secondary indexes of
+the four tables are dropped. They are recreated in parallel afterwards
+(even if the load fails), and their definitions are kept in
+``--restore-file`` until then. Primary keys stay because other tables
+reference them; ids are generated in ascending order per chunk so those
+inserts stay cheap. ``user_stats``, the streak index and, with
+CHECKIN_STORAGE=bitmap, the check-in bitmaps are rebuilt at the end.
+
+Do not run this against a database that serves traffic.
+"""
+
+import argparse
+import collections
+import io
+import math
+import multiprocessing
+import os
+import random
+import secrets
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date as date_type, timedelta
+from typing import Counter, List, Tuple
+
+from sqlalchemy import text
+
+from app.database import SessionLocal, engine
+from app.services import checkins, streaks, user_stats
+
+TABLES = ("users", "goals", "goal_history", "checkins")
+
+COLUMNS = {
+    "users": "id, email, name, hashed_password, telegram_id, created_at",
+    "goals": "id, user_id, name, unit, target, current, color, deadline, completed_at, created_at, updated_at",
+    "goal_history": "id, goal_id, date, delta, after, created_at",
+    "checkins": "id, user_id, date, created_at",
+}
+
+# Nibble after the run tag in generated ids, one per table
+ID_TAGS = {"users": "1", "goals": "2", "goal_history": "3", "checkins": "4"}
+
+GOAL_NAMES = ("Бег", "Чтение", "Английский", "Отжимания", "Медитация", "Вода", "Шаги", "Сон", "Гитара", "Код")
+UNITS = ("km", "pages", "minutes", "times", "hours", "glasses", "steps")
+COLORS = ("#3366FF", "#FF6633", "#33CC66", "#9933FF", "#FFCC00", "#00CCCC")
+STEPS = (1, 1, 1, 2, 5, 10, 30, 100)
+# Share of progress entries that are corrections (negative deltas)
+CORRECTION_RATE = 0.03
+DEADLINE_RATE = 0.6
+
+DEFERRED_CONSTRAINTS_SQL = """
+SELECT conrelid::regclass::text, quote_ident(conname), contype, pg_get_constraintdef(oid)
+FROM pg_constraint
+WHERE conrelid = ANY(CAST(:tables AS regclass[])) AND contype IN ('u', 'f')
+ORDER BY contype DESC, conname
+"""
+
+# Indexes not backing a primary key or constraint
+DEFERRED_INDEXES_SQL = """
+SELECT i.indexrelid::regclass::text, pg_get_indexdef(i.indexrelid)
+FROM pg_index i
+WHERE i.indrelid = ANY(CAST(:tables AS regclass[]))
+  AND NOT i.indisprimary
+  AND NOT EXISTS (SELECT 1 FROM pg_constraint c WHERE c.conrelid = i.indrelid AND c.conindid = i.indexrelid)
+ORDER BY 1
+"""
+
+
+def _timestamp(day: date_type, seconds: int) -> str:
+    return f"{day} {seconds // 3600:02d}:{seconds // 60 % 60:02d}:{seconds % 60:02d}+00"
+
+
+class ChunkWriter:
+    """COPY text buffers and id counters for one chunk."""
+
+    def __init__(self, run: str, chunk: int):
+        self.prefix = {table: f"{run}{tag}{chunk:07x}" for table, tag in ID_TAGS.items()}
+        self.counters = collections.Counter()
+        self.buffers = {table: io.StringIO() for table in TABLES}
+
+    def new_id(self, table: str) -> str:
+        self.counters[table] += 1
+        return f"{self.prefix[table]}{self.counters[table]:016x}"
+
+    def row(self, table: str, *values) -> None:
+        self.buffers[table].write("\t".join("\\N" if value is None else str(value) for value in values))
+        self.buffers[table].write("\n")
+
+    def copy(self, cursor) -> None:
+        for table in TABLES:
+            buffer = self.buffers[table]
+            buffer.seek(0)
+            cursor.copy_expert(f"COPY {table} ({COLUMNS[table]}) FROM STDIN", buffer)
+
+
+def _active_gap(rng: random.Random, activity: float) -> int:
+    """Days until the next active day (0 = today), geometrically distributed."""
+    if activity >= 1:
+        return 0
+    return int(math.log(1 - rng.random()) / math.log(1 - activity))
+
+
+def generate_user(out: ChunkWriter, rng: random.Random, number: int, options: dict) -> None:
+    today = options["today"]
+    days = options["days"]
+    user_id = out.new_id("users")
+    telegram_id = options["telegram_base"] + number if rng.random() < options["telegram_share"] else None
+    joined = today - timedelta(days=days + rng.randrange(30))
+    out.row(
+        "users",
+        user_id,
+        f"seed-{options['run']}-{number}@example.com",
+        f"User {number}",
+        options["password_hash"],
+        telegram_id,
+        _timestamp(joined, rng.randrange(86400)),
+    )
+
+    mean = options["activity"]
+    # Beta with the requested mean: most users are casual, some log daily
+    activity = max(0.01, rng.betavariate(2, 2 * (1 - mean) / mean)) if mean < 1 else 1.0
+    goal_count = min(options["max_goals"], round(rng.expovariate(1 / options["goals"]))) if options["goals"] else 0
+    active_days = {}
+
+    for index in range(goal_count):
+        goal_id = out.new_id("goals")
+        created = today - timedelta(days=rng.randrange(1, days + 1))
+        step = rng.choice(STEPS)
+        expected = activity * (today - created).days * step * 2
+        target = float(max(step, math.ceil(expected * rng.lognormvariate(0, 0.6))))
+        current = 0.0
+        completed_at = last_at = None
+
+        day = created + timedelta(days=_active_gap(rng, activity))
+        while day < today:
+            if rng.random() < CORRECTION_RATE:
+                delta = -min(current, float(step))
+            else:
+                delta = float(step * rng.randint(1, 3))
+            if delta:
+                current += delta
+                # Progress happens after the goal was created (before 08:00)
+                last_at = _timestamp(day, rng.randrange(8 * 3600, 86400))
+                out.row("goal_history", out.new_id("goal_history"), goal_id, day, delta, current, last_at)
+                if day not in active_days or last_at < active_days[day]:
+                    active_days[day] = last_at
+                if current >= target:
+                    completed_at = last_at
+                    break
+            day += timedelta(days=1 + _active_gap(rng, activity))
+
+        deadline = created + timedelta(days=rng.randrange(14, 365)) if rng.random() < DEADLINE_RATE else None
+        out.row(
+            "goals",
+            goal_id,
+            user_id,
+            f"{rng.choice(GOAL_NAMES)} {index + 1}",
+            rng.choice(UNITS),
+            target,
+            current,
+            rng.choice(COLORS),
+            deadline,
+            completed_at,
+            _timestamp(created, rng.randrange(8 * 3600)),
+            last_at,
+        )
+
+    for day, first_at in active_days.items():
+        out.row("checkins", out.new_id("checkins"), user_id, day, first_at)
+
+
+_options: dict = {}
+_connection = None
+
+
+def _init_worker(options: dict) -> None:
+    global _connection
+    _options.update(options)
+    _connection = engine.raw_connection()
+    with _connection.cursor() as cursor:
+        cursor.execute("SET synchronous_commit = off")
+    _connection.commit()
+
+
+def load_chunk(task: Tuple[int, int, int]) -> Counter[str]:
+    chunk, first_user, count = task
+    rng = random.Random(f"{_options['seed']}:{chunk}")
+    out = ChunkWriter(_options["run"], chunk)
+    for number in range(first_user, first_user + count):
+        generate_user(out, rng, number, _options)
+    with _connection.cursor() as cursor:
+        out.copy(cursor)
+    _connection.commit()
+    return out.counters
+
+
+def defer_indexes(restore_file: str) -> List[List[str]]:
+    """Drop secondary indexes and constraints; returns the statements
+    recreating them, grouped into steps that must run in order."""
+    with engine.begin() as conn:
+        constraints = conn.execute(text(DEFERRED_CONSTRAINTS_SQL), {"tables": list(TABLES)}).all()
+        indexes = conn.execute(text(DEFERRED_INDEXES_SQL), {"tables": list(TABLES)}).all()
+        unique = [f"ALTER TABLE {table} ADD CONSTRAINT {name} {definition}" for table, name, kind, definition in constraints if kind == "u"]
+        foreign = [f"ALTER TABLE {table} ADD CONSTRAINT {name} {definition}" for table, name, kind, definition in constraints if kind == "f"]
+        steps = [unique + [definition for _, definition in indexes], foreign]
+        with open(restore_file, "w") as fh:
+            fh.write("".join(f"{statement};\n" for step in steps for statement in step))
+
+        for table, name, kind, _ in sorted(constraints, key=lambda row: row[2] != "f"):
+            conn.execute(text(f"ALTER TABLE {table} DROP CONSTRAINT {name}"))
+        for name, _ in indexes:
+            conn.execute(text(f"DROP INDEX {name}"))
+    return steps
+
+
+def restore_indexes(steps: List[List[str]], workers: int, maintenance_work_mem: str) -> None:
+    def run(statement: str) -> None:
+        with engine.connect() as conn:
+            conn.execute(text("SELECT set_config('maintenance_work_mem', :value, false)"), {"value": maintenance_work_mem})
+            conn.execute(text(statement))
+            conn.commit()
+        print(f"  {statement[:100]}")
+
+    # Index builds run side by side; foreign keys one at a time, since
+    # validating them locks the referenced table too
+    with ThreadPoolExecutor(workers) as pool:
+        list(pool.map(run, steps[0]))
+    for statement in steps[1]:
+        run(statement)
+
+
+def rebuild_derived() -> None:
+    db = SessionLocal()
+    try:
+        for table in TABLES:
+            db.execute(text(f"ANALYZE {table}"))
+        if checkins.CHECKIN_STORAGE == "bitmap":
+            checkins.sync_table_to_bitmaps(db)
+        user_stats.rebuild_user_stats(db)
+        streaks.rebuild_streaks(db)
+        db.commit()
+    finally:
+        db.close()
+
+
+def main(argv=None) -> None:
+    from app.core.security import get_password_hash
+
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--users", type=int, required=True)
+    parser.add_argument("--goals", type=float, default=10, help="mean goals per user")
+    parser.add_argument("--max-goals", type=int, default=200)
+    parser.add_argument("--days", type=int, default=365, help="goals are created within this many days")
+    parser.add_argument("--activity", type=float, default=0.3, help="mean share of days a user logs progress")
+    parser.add_argument("--telegram-share", type=float, default=0.3, help="share of users with a Telegram id")
+    parser.add_argument("--password", default="password")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--chunk-size", type=int, default=1000, help="users per COPY transaction")
+    parser.add_argument("--seed", type=int, default=0, help="random seed; same seed, same data")
+    parser.add_argument("--keep-indexes", action="store_true", help="load with all indexes in place")
+    parser.add_argument("--restore-file", default="seed_restore.sql", help="where to keep the dropped DDL")
+    parser.add_argument("--maintenance-work-mem", default="1GB", help="per index build")
+    args = parser.parse_args(argv)
+    if not 0 < args.activity <= 1:
+        parser.error("--activity must be in (0, 1]")
+
+    with engine.connect() as conn:
+        telegram_base = conn.execute(text("SELECT coalesce(max(telegram_id), 0) + 1 FROM users")).scalar()
+    options = {
+        "run": secrets.token_hex(4),
+        "seed": args.seed,
+        "today": date_type.today(),
+        "days": args.days,
+        "goals": args.goals,
+        "max_goals": args.max_goals,
+        "activity": args.activity,
+        "telegram_share": args.telegram_share,
+        "telegram_base": telegram_base,
+        "password_hash": get_password_hash(args.password),
+    }
+    tasks = [
+        (chunk, first, min(args.chunk_size, args.users - first))
+        for chunk, first in enumerate(range(0, args.users, args.chunk_size))
+    ]
+
+    steps = None
+    if not args.keep_indexes:
+        steps = defer_indexes(args.restore_file)
+        print(f"Dropped {sum(map(len, steps))} index(es) and constraint(s); definitions in {args.restore_file}")
+
+    started = time.monotonic()
+    totals: Counter[str] = collections.Counter()
+    try:
+        context = multiprocessing.get_context("spawn")
+        with context.Pool(args.workers, initializer=_init_worker, initargs=(options,)) as pool:
+            for done, counts in enumerate(pool.imap_unordered(load_chunk, tasks), 1):
+                totals.update(counts)
+                if done % max(1, len(tasks) // 20) == 0 or done == len(tasks):
+                    elapsed = time.monotonic() - started
+                    rows = sum(totals.values())
+                    print(f"{done}/{len(tasks)} chunks, {rows} rows, {rows / elapsed:.0f} rows/s")
+    finally:
+        if steps is not None:
+            index_started = time.monotonic()
+            print("Recreating indexes and constraints")
+            restore_indexes(steps, args.workers, args.maintenance_work_mem)
+            os.remove(args.restore_file)
+            print(f"  done in {time.monotonic() - index_started:.1f}s")
+
+    rebuild_derived()
+    print(
+        f"Loaded {totals['users']} users, {totals['goals']} goals, {totals['goal_history']} history rows "
+        f"and {totals['checkins']} check-ins in {time.monotonic() - started:.1f}s "
+        f"(run {options['run']}, emails seed-{options['run']}-<n>@example.com)"
+    )
+
+
+if __name__ == "__main__":
+    main()
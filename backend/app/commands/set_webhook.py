@@ -0,0 +1,46 @@
+"""Point the bot's webhook at this deployment.
+
+    python -m app.commands.set_webhook https://goals.example.com
+
+Registers ``<base url>/api/telegram/webhook`` with TELEGRAM_WEBHOOK_SECRET
+as the secret token, for message updates only. ``--delete`` removes the
+webhook again.
+"""
+
+import argparse
+import asyncio
+
+from telegram import Bot
+
+from app.services.telegram_dispatch import TELEGRAM_API_URL, TELEGRAM_BOT_TOKEN
+from app.services.telegram_updates import TELEGRAM_WEBHOOK_SECRET
+
+
+async def run(base_url: str, delete: bool) -> bool:
+    async with Bot(TELEGRAM_BOT_TOKEN, base_url=f"{TELEGRAM_API_URL}/bot") as bot:
+        if delete:
+            return await bot.delete_webhook()
+        return await bot.set_webhook(
+            f"{base_url.rstrip('/')}/api/telegram/webhook",
+            secret_token=TELEGRAM_WEBHOOK_SECRET,
+            allowed_updates=["message"],
+            max_connections=100,
+        )
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("base_url", nargs="?", help="public URL of the API, e.g. https://goals.example.com")
+    parser.add_argument("--delete", action="store_true", help="remove the webhook")
+    args = parser.parse_args(argv)
+    if not TELEGRAM_BOT_TOKEN or not (args.delete or (args.base_url and TELEGRAM_WEBHOOK_SECRET)):
+        parser.error("TELEGRAM_BOT_TOKEN, TELEGRAM_WEBHOOK_SECRET and base_url are required")
+
+    ok = asyncio.run(run(args.base_url, args.delete))
+    if not ok:
+        raise SystemExit("Telegram refused the request")
+    print("Webhook removed" if args.delete else "Webhook set")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,40 @@
+"""Copy check-ins between the table and bitmap storages.
+
+Run after changing CHECKIN_STORAGE so the newly selected storage also has
+the check-ins recorded while the other one was active::
+
+    python -m app.commands.sync_checkins --to bitmap   # before CHECKIN_STORAGE=bitmap
+    python -m app.commands.sync_checkins --to table    # before switching back
+
+The streak index is rebuilt afterwards from the target storage.
+"""
+
+import argparse
+import uuid
+
+from app.database import SessionLocal
+from app.services import checkins, streaks
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--to", choices=["bitmap", "table"], required=True, help="storage to fill")
+    parser.add_argument("--user-id", type=uuid.UUID, default=None, help="sync a single user")
+    args = parser.parse_args(argv)
+
+    db = SessionLocal()
+    try:
+        if args.to == "bitmap":
+            rows = checkins.sync_table_to_bitmaps(db, args.user_id)
+        else:
+            rows = checkins.sync_bitmaps_to_table(db, args.user_id)
+        streaks.rebuild_streaks(db, args.user_id, storage=args.to)
+        db.commit()
+    finally:
+        db.close()
+
+    print(f"Synced {rows} row(s) into {args.to} storage")
+
+
+if __name__ == "__main__":
+    main()
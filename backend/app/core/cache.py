@@ -0,0 +1,279 @@
+"""Small caching primitives shared by the API.
+
+``TTLCache`` is an in-process, thread-safe LRU cache with per-entry expiry.
+``RedisCache`` keeps the same interface on top of a Redis-compatible server
+so several uvicorn workers can share entries and invalidations. Values
+stored in ``RedisCache`` must be JSON serialisable.
+
+Sync code running on the event loop (handlers under ``run_in_session``)
+must not block on Redis: inside ``deferred_deletes()`` ``RedisCache.delete``
+only records the key, and the block sends the deletes with the async
+client when it exits.
+
+``SingleFlight`` / ``AsyncSingleFlight`` coalesce concurrent computations
+of the same key within one process: the first caller runs the function,
+later callers wait for and share its result (or exception).
+"""
+
+import asyncio
+import contextlib
+import contextvars
+import json
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, Hashable, List, Optional, Tuple
+
+
+class CacheStats:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def hit(self) -> None:
+        with self._lock:
+            self.hits += 1
+
+    def miss(self) -> None:
+        with self._lock:
+            self.misses += 1
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+            }
+
+
+class TTLCache:
+    """Bounded LRU cache whose entries expire after ``ttl`` seconds."""
+
+    def __init__(self, maxsize: int, ttl: float):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.stats = CacheStats()
+        self._lock = threading.RLock()
+        self._data: "OrderedDict[Hashable, tuple]" = OrderedDict()
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        now = time.monotonic()
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is not None:
+                value, expires_at = entry
+                if expires_at > now:
+                    self._data.move_to_end(key)
+                    self.stats.hit()
+                    return value
+                del self._data[key]
+        self.stats.miss()
+        return None
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None) -> None:
+        ttl = self.ttl if ttl is None else ttl
+        if ttl <= 0:
+            return
+        with self._lock:
+            self._data[key] = (value, time.monotonic() + ttl)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def setdefault(self, key: Hashable, value: Any, ttl: Optional[float] = None) -> Any:
+        """Store ``value`` unless a live entry exists; return the stored value."""
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is not None and entry[1] > time.monotonic():
+                return entry[0]
+            self.set(key, value, ttl)
+            return value
+
+    def delete(self, key: Hashable) -> None:
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+    async def aget(self, key: Hashable) -> Optional[Any]:
+        return self.get(key)
+
+    async def aset(self, key: Hashable, value: Any, ttl: Optional[float] = None) -> None:
+        self.set(key, value, ttl)
+
+    async def asetdefault(self, key: Hashable, value: Any, ttl: Optional[float] = None) -> Any:
+        return self.setdefault(key, value, ttl)
+
+    def info(self) -> Dict[str, Any]:
+        with self._lock:
+            size = len(self._data)
+        return {"backend": "memory", "size": size, "maxsize": self.maxsize, **self.stats.snapshot()}
+
+
+class RedisCache:
+    """``TTLCache``-compatible cache stored in Redis under ``prefix``."""
+
+    def __init__(self, url: str, prefix: str, ttl: float):
+        import redis
+        import redis.asyncio
+
+        self.prefix = prefix
+        self.ttl = ttl
+        self.stats = CacheStats()
+        self.client = redis.Redis.from_url(url)
+        self.async_client = redis.asyncio.Redis.from_url(url)
+
+    def _key(self, key: Hashable) -> str:
+        return f"{self.prefix}:{key}"
+
+    def _load(self, raw: Optional[bytes]) -> Optional[Any]:
+        if raw is None:
+            self.stats.miss()
+            return None
+        self.stats.hit()
+        return json.loads(raw)
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        return self._load(self.client.get(self._key(key)))
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None) -> None:
+        ttl = self.ttl if ttl is None else ttl
+        if ttl <= 0:
+            return
+        self.client.set(self._key(key), json.dumps(value), px=int(ttl * 1000))
+
+    def setdefault(self, key: Hashable, value: Any, ttl: Optional[float] = None) -> Any:
+        ttl = self.ttl if ttl is None else ttl
+        if self.client.set(self._key(key), json.dumps(value), px=int(ttl * 1000), nx=True):
+            return value
+        raw = self.client.get(self._key(key))
+        return value if raw is None else json.loads(raw)
+
+    def delete(self, key: Hashable) -> None:
+        pending = _deferred_deletes.get()
+        if pending is not None:
+            pending.append((self, key))
+            return
+        self.client.delete(self._key(key))
+
+    async def adelete(self, key: Hashable) -> None:
+        await self.async_client.delete(self._key(key))
+
+    async def aget(self, key: Hashable) -> Optional[Any]:
+        return self._load(await self.async_client.get(self._key(key)))
+
+    async def aset(self, key: Hashable, value: Any, ttl: Optional[float] = None) -> None:
+        ttl = self.ttl if ttl is None else ttl
+        if ttl <= 0:
+            return
+        await self.async_client.set(self._key(key), json.dumps(value), px=int(ttl * 1000))
+
+    async def asetdefault(self, key: Hashable, value: Any, ttl: Optional[float] = None) -> Any:
+        ttl = self.ttl if ttl is None else ttl
+        if await self.async_client.set(self._key(key), json.dumps(value), px=int(ttl * 1000), nx=True):
+            return value
+        raw = await self.async_client.get(self._key(key))
+        return value if raw is None else json.loads(raw)
+
+    def info(self) -> Dict[str, Any]:
+        return {"backend": "redis", "prefix": self.prefix, **self.stats.snapshot()}
+
+
+_deferred_deletes: contextvars.ContextVar[Optional[List[Tuple[RedisCache, Hashable]]]] = contextvars.ContextVar(
+    "deferred_deletes", default=None
+)
+
+
+@contextlib.asynccontextmanager
+async def deferred_deletes() -> AsyncIterator[None]:
+    """Hold back ``RedisCache.delete`` calls made inside the block and send
+    them with the async client on exit, also when the block raises."""
+    pending: List[Tuple[RedisCache, Hashable]] = []
+    token = _deferred_deletes.set(pending)
+    try:
+        yield
+    finally:
+        _deferred_deletes.reset(token)
+        for cache, key in pending:
+            await cache.adelete(key)
+
+
+class SingleFlight:
+    """Coalesces concurrent ``do(key, fn)`` calls across threads."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls: Dict[Hashable, "_Call"] = {}
+        self.shared = 0
+
+    def do(self, key: Hashable, fn: Callable[[], Any]) -> Any:
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+            else:
+                self.shared += 1
+        if not leader:
+            call.done.wait()
+            return call.result()
+
+        try:
+            call.value = fn()
+        except BaseException as exc:
+            call.error = exc
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+        return call.value
+
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.value: Any = None
+        self.error: Optional[BaseException] = None
+
+    def result(self) -> Any:
+        if self.error is not None:
+            raise self.error
+        return self.value
+
+
+class AsyncSingleFlight:
+    """Coalesces concurrent ``await do(key, fn)`` calls on one event loop."""
+
+    def __init__(self):
+        self._calls: Dict[Hashable, asyncio.Future] = {}
+        self.shared = 0
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[Any]]) -> Any:
+        future = self._calls.get(key)
+        if future is not None:
+            self.shared += 1
+            # shield: a cancelled follower must not cancel the shared result
+            return await asyncio.shield(future)
+
+        future = self._calls[key] = asyncio.get_running_loop().create_future()
+        try:
+            value = await fn()
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except BaseException as exc:
+            future.set_exception(exc)
+            # Mark retrieved so an exception nobody else awaited is not logged
+            future.exception()
+            raise
+        else:
+            future.set_result(value)
+            return value
+        finally:
+            del self._calls[key]
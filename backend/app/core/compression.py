@@ -0,0 +1,128 @@
+"""Negotiated gzip/brotli compression for buffered responses.
+
+Bodies of at least ``COMPRESSION_MIN_SIZE`` bytes with a compressible
+content type are encoded with the client's preferred supported coding
+(``br`` when the optional ``brotli`` package is installed, else ``gzip``).
+Streaming responses pass through untouched.
+
+Each encoded representation gets its own strong ETag (``"<tag>-br"`` /
+``"<tag>-gzip"``), as required for byte-different bodies; ``check_etag``
+accepts either form in ``If-None-Match``. A 304 carries the encoded tag
+only when the client validated with it, since bodies below the minimum
+size are sent, and tagged, unencoded.
+"""
+
+import gzip
+import os
+from typing import Optional
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+try:
+    import brotli
+except ImportError:  # optional dependency
+    brotli = None
+
+COMPRESSION_MIN_SIZE = int(os.getenv("COMPRESSION_MIN_SIZE", "1024"))
+GZIP_LEVEL = int(os.getenv("GZIP_LEVEL", "6"))
+BROTLI_QUALITY = int(os.getenv("BROTLI_QUALITY", "4"))
+
+COMPRESSIBLE_TYPES = ("application/json", "text/")
+
+
+def _compress(body: bytes, encoding: str) -> bytes:
+    if encoding == "br":
+        return brotli.compress(body, quality=BROTLI_QUALITY)
+    return gzip.compress(body, compresslevel=GZIP_LEVEL)
+
+
+def choose_encoding(accept_encoding: str) -> Optional[str]:
+    """Best supported coding from an ``Accept-Encoding`` header."""
+    preferences = {}
+    for part in accept_encoding.split(","):
+        name, _, params = part.strip().partition(";")
+        quality = 1.0
+        if params.strip().startswith("q="):
+            try:
+                quality = float(params.strip()[2:])
+            except ValueError:
+                quality = 0.0
+        preferences[name.strip().lower()] = quality
+
+    supported = ["br", "gzip"] if brotli is not None else ["gzip"]
+    best, best_quality = None, 0.0
+    for encoding in supported:
+        quality = preferences.get(encoding, preferences.get("*", 0.0))
+        if quality > best_quality:
+            best, best_quality = encoding, quality
+    return best
+
+
+def _tag_etag(headers: MutableHeaders, encoding: str) -> None:
+    etag = headers.get("etag")
+    if etag and etag.endswith('"'):
+        headers["etag"] = f'{etag[:-1]}-{encoding}"'
+
+
+def _names_encoded(if_none_match: str, etag: Optional[str], encoding: str) -> bool:
+    """Whether ``If-None-Match`` lists the ``encoding`` form of ``etag``."""
+    if not etag or not etag.endswith('"'):
+        return False
+    candidates = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+    return f'{etag[:-1]}-{encoding}"' in candidates
+
+
+class CompressionMiddleware:
+    def __init__(self, app: ASGIApp, minimum_size: int = COMPRESSION_MIN_SIZE):
+        self.app = app
+        self.minimum_size = minimum_size
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        request_headers = Headers(scope=scope)
+        encoding = choose_encoding(request_headers.get("accept-encoding", ""))
+        start: Optional[Message] = None
+        passthrough = False
+
+        async def send_compressed(message: Message) -> None:
+            nonlocal start, passthrough
+            if passthrough:
+                await send(message)
+                return
+
+            if message["type"] == "http.response.start":
+                start = message
+                return
+
+            headers = MutableHeaders(raw=start["headers"])
+            headers.add_vary_header("Accept-Encoding")
+            body = message.get("body", b"")
+            if encoding is None:
+                passthrough = True
+            elif start["status"] == 304:
+                # Same validator the full response would have carried: the
+                # client's tag shows whether that body was encoded
+                if _names_encoded(request_headers.get("if-none-match", ""), headers.get("etag"), encoding):
+                    _tag_etag(headers, encoding)
+            elif (
+                not message.get("more_body", False)
+                and len(body) >= self.minimum_size
+                and "content-encoding" not in headers
+                and headers.get("content-type", "").startswith(COMPRESSIBLE_TYPES)
+            ):
+                body = _compress(body, encoding)
+                headers["content-encoding"] = encoding
+                headers["content-length"] = str(len(body))
+                _tag_etag(headers, encoding)
+                message = {**message, "body": body}
+            else:
+                passthrough = True
+
+            await send(start)
+            await send(message)
+
+        await self.app(scope, receive, send_compressed)
@@ -0,0 +1,40 @@
+"""Strong ETags for conditional GETs.
+
+Handlers derive a version token from a cheap indexed lookup, then call
+``check_etag`` before running their real queries. When the client's
+``If-None-Match`` already names the current version it gets an empty 304
+and nothing else is queried or serialised.
+"""
+
+import hashlib
+from typing import Optional
+
+from fastapi import Request, Response, status
+
+CACHE_CONTROL = "private, no-cache"
+
+
+def make_etag(*parts) -> str:
+    digest = hashlib.blake2b(repr(parts).encode(), digest_size=10).hexdigest()
+    return f'"{digest}"'
+
+
+def etag_matches(request: Request, etag: str) -> bool:
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    # If-None-Match uses the weak comparison, so W/"x" matches "x"; the
+    # compressed representations' tags ("x-br", "x-gzip") match as well.
+    candidates = {tag.strip().removeprefix("W/") for tag in header.split(",")}
+    return any(etag[:-1] + suffix in candidates for suffix in ('"', '-br"', '-gzip"'))
+
+
+def check_etag(request: Request, response: Response, etag: str) -> Optional[Response]:
+    """Tag ``response`` with ``etag``; return a 304 if the client is current."""
+    headers = {"ETag": etag, "Cache-Control": CACHE_CONTROL}
+    if etag_matches(request, etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    response.headers.update(headers)
+    return None
@@ -0,0 +1,104 @@
+"""Password hashing on a dedicated, bounded executor.
+
+bcrypt is deliberately slow. Running it on the shared request threadpool
+(or the event loop) lets a burst of logins starve every other endpoint, so
+hashes run on their own ``HASH_WORKERS`` threads instead. At most
+``HASH_QUEUE_LIMIT`` further requests may wait for a worker; beyond that
+callers get an immediate 503. Routes use the ``*_async`` variants so that
+waiting requests do not hold threadpool threads either.
+
+``PASSWORD_HASH_SCHEMES`` (first one is used for new hashes) and
+``BCRYPT_ROUNDS`` configure the hash. Hashes produced with another scheme
+or cost are upgraded the next time the user logs in.
+"""
+
+import asyncio
+import os
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Dict, Optional, Tuple
+
+from fastapi import HTTPException, status
+from passlib.context import CryptContext
+
+from app.core.timing import TimingStats
+
+PASSWORD_HASH_SCHEMES = [s.strip() for s in os.getenv("PASSWORD_HASH_SCHEMES", "bcrypt").split(",")]
+BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", "12"))
+HASH_WORKERS = int(os.getenv("HASH_WORKERS", str(os.cpu_count() or 2)))
+HASH_QUEUE_LIMIT = int(os.getenv("HASH_QUEUE_LIMIT", "32"))
+
+pwd_context = CryptContext(
+    schemes=PASSWORD_HASH_SCHEMES,
+    deprecated="auto",
+    bcrypt__rounds=BCRYPT_ROUNDS,
+    # Both bounds equal the configured cost so any other cost is rehashed
+    bcrypt__min_rounds=BCRYPT_ROUNDS,
+    bcrypt__max_rounds=BCRYPT_ROUNDS,
+)
+
+_executor = ThreadPoolExecutor(max_workers=HASH_WORKERS, thread_name_prefix="password-hash")
+_slots = threading.BoundedSemaphore(HASH_WORKERS + HASH_QUEUE_LIMIT)
+
+hash_timings = TimingStats()
+verify_timings = TimingStats()
+_rejected_lock = threading.Lock()
+_rejected = 0
+
+
+def _timed(stats: TimingStats, fn, *args):
+    started = time.perf_counter()
+    try:
+        return fn(*args)
+    finally:
+        stats.record(time.perf_counter() - started)
+
+
+def _submit(stats: TimingStats, fn, *args) -> Future:
+    global _rejected
+    if not _slots.acquire(blocking=False):
+        with _rejected_lock:
+            _rejected += 1
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Too many sign-in attempts in progress, try again shortly",
+            headers={"Retry-After": "1"},
+        )
+    future = _executor.submit(_timed, stats, fn, *args)
+    future.add_done_callback(lambda _: _slots.release())
+    return future
+
+
+def _verify_and_update(password: str, hashed_password: Optional[str]) -> Tuple[bool, Optional[str]]:
+    if not hashed_password:
+        return False, None
+    return pwd_context.verify_and_update(password, hashed_password)
+
+
+def hash_password(password: str) -> str:
+    return _submit(hash_timings, pwd_context.hash, password).result()
+
+
+async def hash_password_async(password: str) -> str:
+    return await asyncio.wrap_future(_submit(hash_timings, pwd_context.hash, password))
+
+
+def verify_and_update(password: str, hashed_password: Optional[str]) -> Tuple[bool, Optional[str]]:
+    """Return ``(is_valid, new_hash)``; ``new_hash`` is set when the stored
+    hash uses an outdated scheme or cost."""
+    return _submit(verify_timings, _verify_and_update, password, hashed_password).result()
+
+
+async def verify_and_update_async(password: str, hashed_password: Optional[str]) -> Tuple[bool, Optional[str]]:
+    return await asyncio.wrap_future(_submit(verify_timings, _verify_and_update, password, hashed_password))
+
+
+def hashing_info() -> Dict[str, Any]:
+    return {
+        "workers": HASH_WORKERS,
+        "queue_limit": HASH_QUEUE_LIMIT,
+        "rejected": _rejected,
+        "hash": hash_timings.snapshot(),
+        "verify": verify_timings.snapshot(),
+    }
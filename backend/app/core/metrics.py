@@ -0,0 +1,269 @@
+"""Prometheus metrics served at ``GET /metrics``.
+
+* ``http_request_duration_seconds`` / ``http_requests_total`` /
+  ``http_requests_in_progress`` - per route template (``/api/goals/{goal_id}``,
+  not the raw path), so label cardinality stays bounded; unknown paths are
+  reported as ``<unmatched>``.
+* ``http_request_db_queries`` / ``http_request_db_seconds`` - statements
+  executed and time spent in them per request, and ``db_query_duration_seconds``
+  for every statement, from the engines' cursor events.
+* Connection pool, password hashing, JWT and cache statistics are read from
+  the existing counters at scrape time, so they cost nothing per request.
+
+``METRICS_ENABLED=false`` removes the endpoint and all instrumentation.
+With several uvicorn workers set ``PROMETHEUS_MULTIPROC_DIR`` to an empty
+directory shared by them; request and query metrics are then aggregated
+across workers while the scrape-time statistics describe the worker that
+answered.
+"""
+
+import contextvars
+import os
+import time
+from typing import Dict, Iterator, List, Optional
+
+from prometheus_client import CONTENT_TYPE_LATEST, CollectorRegistry, Counter, Gauge, Histogram, generate_latest
+from prometheus_client.core import CounterMetricFamily, GaugeMetricFamily, SummaryMetricFamily
+from prometheus_client.multiprocess import MultiProcessCollector
+from sqlalchemy import event
+from starlette.requests import Request
+from starlette.responses import Response
+from starlette.routing import Match
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "true").lower() in ("1", "true", "yes")
+PROMETHEUS_MULTIPROC_DIR = os.getenv("PROMETHEUS_MULTIPROC_DIR")
+
+UNMATCHED = "<unmatched>"
+
+REQUEST_DURATION = Histogram(
+    "http_request_duration_seconds",
+    "Time from receiving a request to sending the last body chunk",
+    ["method", "route"],
+    buckets=(0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10),
+)
+REQUESTS = Counter("http_requests", "Requests answered", ["method", "route", "status"])
+IN_PROGRESS = Gauge(
+    "http_requests_in_progress", "Requests being handled", ["method", "route"], multiprocess_mode="livesum"
+)
+REQUEST_QUERIES = Histogram(
+    "http_request_db_queries",
+    "SQL statements executed per request",
+    ["method", "route"],
+    buckets=(0, 1, 2, 3, 5, 8, 13, 21, 50, 100),
+)
+REQUEST_DB_SECONDS = Histogram(
+    "http_request_db_seconds",
+    "Time spent executing SQL per request",
+    ["method", "route"],
+    buckets=(0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5),
+)
+QUERY_DURATION = Histogram(
+    "db_query_duration_seconds",
+    "SQL statement execution time",
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5),
+)
+
+# [statements, seconds] of the request being handled
+_request_db: contextvars.ContextVar[Optional[List[float]]] = contextvars.ContextVar("request_db", default=None)
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    context._metrics_started = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    elapsed = time.perf_counter() - context._metrics_started
+    QUERY_DURATION.observe(elapsed)
+    totals = _request_db.get()
+    if totals is not None:
+        totals[0] += 1
+        totals[1] += elapsed
+
+
+def instrument_engine(engine) -> None:
+    """Time every statement run through ``engine`` (a sync ``Engine``; pass
+    ``async_engine.sync_engine`` for asyncpg)."""
+    event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+
+
+class RouteTemplates:
+    """Route template for a request scope, e.g. ``/api/goals/{goal_id}``.
+
+    Routes are indexed by segment count and first two path segments, so a
+    request is only matched against the handful of templates that could
+    fit (``/api/goals/<id>/progress`` against four); templates with a
+    parameter in that prefix are tried for every request.
+    """
+
+    def __init__(self, app):
+        self.app = app
+        self._index: Optional[Dict[tuple, list]] = None
+        self._anywhere: list = []
+
+    @staticmethod
+    def _key(path: str) -> tuple:
+        parts = path.split("/")
+        return len(parts), tuple(parts[1:3])
+
+    def _build(self) -> Dict[tuple, list]:
+        # Built on first use: routers are included after the middleware
+        index: Dict[tuple, list] = {}
+        for route in self.app.router.routes:
+            path = getattr(route, "path", "")
+            if not hasattr(route, "path_regex") or "{" in "/".join(path.split("/")[:3]) or ":path}" in path:
+                self._anywhere.append(route)
+            else:
+                index.setdefault(self._key(path), []).append(route)
+        return index
+
+    def __call__(self, scope: Scope) -> str:
+        if self._index is None:
+            self._index = self._build()
+        path, method = scope["path"], scope["method"]
+        partial = None
+        for route in self._index.get(self._key(path), ()):
+            if route.path_regex.match(path):
+                if route.methods is None or method in route.methods:
+                    return route.path
+                partial = partial or route.path
+        for route in self._anywhere:
+            match, _ = route.matches(scope)
+            if match == Match.FULL:
+                return route.path
+            if match == Match.PARTIAL:
+                partial = partial or route.path
+        return partial or UNMATCHED
+
+
+class MetricsMiddleware:
+    def __init__(self, app: ASGIApp, templates: RouteTemplates):
+        self.app = app
+        self.templates = templates
+        # Labelled children, resolved once per label set
+        self._children: Dict[tuple, tuple] = {}
+        self._counters: Dict[tuple, Counter] = {}
+
+    def _route_children(self, method: str, route: str) -> tuple:
+        children = self._children.get((method, route))
+        if children is None:
+            children = self._children[(method, route)] = (
+                IN_PROGRESS.labels(method, route),
+                REQUEST_DURATION.labels(method, route),
+                REQUEST_QUERIES.labels(method, route),
+                REQUEST_DB_SECONDS.labels(method, route),
+            )
+        return children
+
+    def _counter(self, method: str, route: str, status: int) -> Counter:
+        counter = self._counters.get((method, route, status))
+        if counter is None:
+            counter = self._counters[(method, route, status)] = REQUESTS.labels(method, route, str(status))
+        return counter
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        method = scope["method"]
+        route = self.templates(scope)
+        in_progress, duration, queries, db_seconds = self._route_children(method, route)
+        totals = [0, 0.0]
+        token = _request_db.set(totals)
+        status = 500
+        started = time.perf_counter()
+
+        async def send_with_status(message: Message) -> None:
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        in_progress.inc()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            in_progress.dec()
+            _request_db.reset(token)
+            duration.observe(time.perf_counter() - started)
+            self._counter(method, route, status).inc()
+            queries.observe(totals[0])
+            db_seconds.observe(totals[1])
+
+
+class StatsCollector:
+    """Exposes the app's own pool, hashing, JWT and cache counters."""
+
+    def __init__(self, engine):
+        self.engine = engine
+
+    def describe(self) -> list:
+        # Nothing to check for name clashes; avoids a collect() at register time
+        return []
+
+    @staticmethod
+    def _timings(name: str, documentation: str, snapshot: dict) -> Iterator:
+        yield SummaryMetricFamily(name, documentation, count_value=snapshot["count"], sum_value=snapshot["seconds_total"])
+        yield GaugeMetricFamily(f"{name}_max", f"{documentation} (slowest)", value=snapshot["seconds_max"])
+
+    def collect(self) -> Iterator:
+        from app.core import hashing, response_cache, security, user_cache
+        from app.core.pool import pool_status
+
+        pool = pool_status(self.engine)
+        connections = GaugeMetricFamily("db_pool_connections", "Pooled connections by state", labels=["state"])
+        for state in ("checked_out", "checked_in", "overflow"):
+            if state in pool:
+                connections.add_metric([state], pool[state])
+        yield connections
+        if "size" in pool:
+            yield GaugeMetricFamily("db_pool_size", "Persistent connections in the pool", value=pool["size"])
+        yield from self._timings("db_pool_checkout_wait_seconds", "Time to get a pooled connection", pool["checkout_wait"])
+
+        hashing_stats = hashing.hashing_info()
+        yield from self._timings("password_hash_seconds", "bcrypt hash time", hashing_stats["hash"])
+        yield from self._timings("password_verify_seconds", "bcrypt verify time", hashing_stats["verify"])
+        yield CounterMetricFamily(
+            "password_hash_rejected", "Hash requests refused with 503 (queue full)", value=hashing_stats["rejected"]
+        )
+        yield from self._timings("jwt_encode_seconds", "Access token signing time", security.jwt_encode_timings.snapshot())
+        yield from self._timings(
+            "jwt_decode_seconds", "Access token verification time (token cache misses)", security.jwt_decode_timings.snapshot()
+        )
+
+        caches = {
+            "tokens": user_cache.token_cache,
+            "users": user_cache.user_cache,
+            "telegram_init_data": security.init_data_cache,
+        }
+        if response_cache.enabled:
+            caches["responses"] = response_cache.responses
+        lookups = CounterMetricFamily("cache_lookups", "Cache lookups by result", labels=["cache", "result"])
+        for name, cache in caches.items():
+            stats = cache.stats.snapshot()
+            lookups.add_metric([name, "hit"], stats["hits"])
+            lookups.add_metric([name, "miss"], stats["misses"])
+        yield lookups
+
+
+def setup(app, engine) -> None:
+    """Instrument ``app`` and ``engine`` and add ``GET /metrics``."""
+    instrument_engine(engine)
+
+    registry = CollectorRegistry()
+    if PROMETHEUS_MULTIPROC_DIR:
+        MultiProcessCollector(registry)
+    else:
+        from prometheus_client import REGISTRY
+
+        registry = REGISTRY
+    registry.register(StatsCollector(engine))
+
+    app.add_middleware(MetricsMiddleware, templates=RouteTemplates(app))
+
+    @app.get("/metrics", include_in_schema=False)
+    def metrics(request: Request) -> Response:
+        # Set as a header: media_type would append a second charset
+        return Response(generate_latest(registry), headers={"Content-Type": CONTENT_TYPE_LATEST})
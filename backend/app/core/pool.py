@@ -0,0 +1,88 @@
+"""Connection pool configuration and live pool statistics.
+
+Pool behaviour is driven by environment variables:
+
+* ``DB_POOL_MODE`` - ``queue`` (default) keeps a local pool per worker;
+  ``pgbouncer`` disables local pooling (NullPool) and server-side prepared
+  statements so the app can sit behind PgBouncer in transaction mode.
+* ``DB_POOL_SIZE`` / ``DB_MAX_OVERFLOW`` - persistent and burst connections
+  per worker process.
+* ``DB_POOL_TIMEOUT`` - seconds to wait for a free connection.
+* ``DB_POOL_RECYCLE`` - seconds after which a connection is replaced.
+* ``DB_POOL_PRE_PING`` - test connections before handing them out.
+"""
+
+import os
+import time
+from typing import Any, Dict
+from uuid import uuid4
+
+from sqlalchemy.pool import AsyncAdaptedQueuePool, NullPool, QueuePool
+
+from app.core.timing import TimingStats
+
+DB_POOL_MODE = os.getenv("DB_POOL_MODE", "queue")
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "5"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "30"))
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "1800"))
+DB_POOL_PRE_PING = os.getenv("DB_POOL_PRE_PING", "true").lower() in ("1", "true", "yes")
+
+
+class _TimedPoolMixin:
+    """Measures how long each connection checkout takes (queueing plus
+    connecting when a new connection has to be opened)."""
+
+    wait_stats: TimingStats
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            self.wait_stats.record(time.perf_counter() - started)
+
+
+def _timed(pool_class):
+    # A dedicated subclass per engine, so stats survive Pool.recreate()
+    return type(f"Timed{pool_class.__name__}", (_TimedPoolMixin, pool_class), {"wait_stats": TimingStats()})
+
+
+def engine_options(is_async: bool = False) -> Dict[str, Any]:
+    """Keyword arguments for ``create_engine`` / ``create_async_engine``."""
+    if DB_POOL_MODE == "pgbouncer":
+        options: Dict[str, Any] = {"poolclass": _timed(NullPool)}
+        if is_async:
+            # asyncpg prepares every statement; transaction pooling hands the
+            # next statement to a different server connection.
+            options["connect_args"] = {
+                "statement_cache_size": 0,
+                "prepared_statement_cache_size": 0,
+                "prepared_statement_name_func": lambda: f"__asyncpg_{uuid4()}__",
+            }
+        return options
+
+    return {
+        "poolclass": _timed(AsyncAdaptedQueuePool if is_async else QueuePool),
+        "pool_size": DB_POOL_SIZE,
+        "max_overflow": DB_MAX_OVERFLOW,
+        "pool_timeout": DB_POOL_TIMEOUT,
+        "pool_recycle": DB_POOL_RECYCLE,
+        "pool_pre_ping": DB_POOL_PRE_PING,
+    }
+
+
+def pool_status(engine) -> Dict[str, Any]:
+    """Live statistics for ``engine``'s pool."""
+    pool = engine.pool
+    status: Dict[str, Any] = {"mode": DB_POOL_MODE, "pool": type(pool).__name__}
+    if isinstance(pool, QueuePool):
+        status.update(
+            size=pool.size(),
+            checked_in=pool.checkedin(),
+            checked_out=pool.checkedout(),
+            overflow=max(pool.overflow(), 0),
+            max_overflow=DB_MAX_OVERFLOW,
+        )
+    status["checkout_wait"] = getattr(pool, "wait_stats", TimingStats()).snapshot()
+    return status
@@ -0,0 +1,143 @@
+"""Per-user cache of rendered JSON responses.
+
+Read endpoints that recompute a lot (``/api/stats``, ``/api/stats/activity``,
+``/api/goals``) keep their rendered body, ETag and extra headers here, so a
+second tab asking the same question is answered without touching the
+database. Concurrent misses for the same key run the computation once
+(singleflight, per worker process).
+
+Keys are namespaced per user and carry the user's cache generation. The
+goals write handlers call ``invalidate(user_id)``, which drops the
+generation; a computation that started before the write stores its result
+under the old generation, where nothing reads it any more.
+
+* ``RESPONSE_CACHE_BACKEND`` - ``memory`` (default, LRU + TTL per worker),
+  ``redis`` (shared by all workers via ``REDIS_URL``) or ``off``. With the
+  in-process backend other workers may serve a response up to one TTL old
+  after a write.
+* ``RESPONSE_CACHE_TTL`` - seconds a response is kept.
+* ``RESPONSE_CACHE_SIZE`` - entries kept by the in-process backend.
+"""
+
+import os
+import uuid
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+from fastapi import Request, Response, status
+
+from app.core.cache import AsyncSingleFlight, RedisCache, SingleFlight, TTLCache
+from app.core.etag import CACHE_CONTROL, etag_matches, make_etag
+from app.core.responses import render_json
+
+RESPONSE_CACHE_BACKEND = os.getenv("RESPONSE_CACHE_BACKEND", "memory")
+RESPONSE_CACHE_TTL = float(os.getenv("RESPONSE_CACHE_TTL", "30"))
+RESPONSE_CACHE_SIZE = int(os.getenv("RESPONSE_CACHE_SIZE", "10000"))
+REDIS_URL = os.getenv("REDIS_URL", "redis://localhost:6379/0")
+
+# Generations only need to outlive the entries filed under them
+GENERATION_TTL = 24 * 60 * 60
+
+Entry = Dict[str, Any]
+
+enabled = RESPONSE_CACHE_BACKEND != "off"
+if RESPONSE_CACHE_BACKEND == "redis":
+    responses = RedisCache(REDIS_URL, prefix="goaltracker:response", ttl=RESPONSE_CACHE_TTL)
+    generations = RedisCache(REDIS_URL, prefix="goaltracker:generation", ttl=GENERATION_TTL)
+else:
+    responses = TTLCache(maxsize=RESPONSE_CACHE_SIZE, ttl=RESPONSE_CACHE_TTL)
+    generations = TTLCache(maxsize=RESPONSE_CACHE_SIZE, ttl=GENERATION_TTL)
+
+_flights = SingleFlight()
+_async_flights = AsyncSingleFlight()
+
+
+def entry(etag: str, content: Any = None, headers: Optional[Dict[str, str]] = None) -> Entry:
+    """A cacheable response; without ``content`` it can only answer 304."""
+    return {
+        "etag": etag,
+        "body": render_json(content).decode() if content is not None else None,
+        "headers": headers or {},
+    }
+
+
+def _key(user_id, generation: str, parts) -> str:
+    return f"{user_id}:{generation}:{make_etag(*parts)[1:-1]}"
+
+
+def _respond(request: Request, cached: Entry, state: str) -> Response:
+    headers = {"ETag": cached["etag"], "Cache-Control": CACHE_CONTROL, "X-Cache": state}
+    if etag_matches(request, cached["etag"]) or cached["body"] is None:
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    headers.update(cached["headers"])
+    return Response(cached["body"].encode(), media_type="application/json", headers=headers)
+
+
+def cached_response(request: Request, user_id, parts, build: Callable[[Optional[Request]], Entry]) -> Response:
+    """Serve ``build``'s entry for ``parts`` from the cache, building it once
+    on a miss.
+
+    ``build`` receives the request only when its result is not shared (the
+    cache is off), so it may then return a body-less entry for a client
+    that is already current.
+    """
+    if not enabled:
+        return _respond(request, build(request), "off")
+
+    generation = generations.get(str(user_id)) or generations.setdefault(str(user_id), uuid.uuid4().hex)
+    key = _key(user_id, generation, parts)
+
+    found = responses.get(key)
+    if found is not None:
+        return _respond(request, found, "hit")
+
+    computed = []
+
+    def compute() -> Entry:
+        value = build(None)
+        responses.set(key, value)
+        computed.append(True)
+        return value
+
+    value = _flights.do(key, compute)
+    return _respond(request, value, "miss" if computed else "coalesced")
+
+
+async def acached_response(
+    request: Request, user_id, parts, build: Callable[[Optional[Request]], Awaitable[Entry]]
+) -> Response:
+    """``cached_response`` for the async routers."""
+    if not enabled:
+        return _respond(request, await build(request), "off")
+
+    generation = await generations.aget(str(user_id)) or await generations.asetdefault(str(user_id), uuid.uuid4().hex)
+    key = _key(user_id, generation, parts)
+
+    found = await responses.aget(key)
+    if found is not None:
+        return _respond(request, found, "hit")
+
+    computed = []
+
+    async def compute() -> Entry:
+        value = await build(None)
+        await responses.aset(key, value)
+        computed.append(True)
+        return value
+
+    value = await _async_flights.do(key, compute)
+    return _respond(request, value, "miss" if computed else "coalesced")
+
+
+def invalidate(user_id) -> None:
+    """Forget every cached response of ``user_id``."""
+    if enabled:
+        generations.delete(str(user_id))
+
+
+def cache_info() -> Dict[str, Any]:
+    return {
+        "backend": RESPONSE_CACHE_BACKEND,
+        "ttl": RESPONSE_CACHE_TTL,
+        "coalesced": _flights.shared + _async_flights.shared,
+        **(responses.info() if enabled else {}),
+    }
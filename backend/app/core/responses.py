@@ -0,0 +1,36 @@
+"""JSON response helpers.
+
+``OrjsonResponse`` is the application's default response class. Large
+list endpoints skip per-row Pydantic validation altogether: they build
+plain dicts from selected column tuples and hand them to ``json_response``.
+"""
+
+import uuid
+from typing import Any, Optional
+
+import orjson
+from fastapi import Response
+from fastapi.responses import ORJSONResponse
+
+
+def _default(value: Any) -> Any:
+    # asyncpg returns its own uuid.UUID subclass, which orjson does not
+    # serialise natively
+    if isinstance(value, uuid.UUID):
+        return str(value)
+    raise TypeError
+
+
+def render_json(content: Any) -> bytes:
+    return orjson.dumps(content, default=_default, option=orjson.OPT_NON_STR_KEYS)
+
+
+class OrjsonResponse(ORJSONResponse):
+    def render(self, content: Any) -> bytes:
+        return render_json(content)
+
+
+def json_response(content: Any, response: Optional[Response] = None) -> OrjsonResponse:
+    """Serialise ``content`` with orjson, keeping headers set on ``response``."""
+    headers = dict(response.headers) if response is not None else None
+    return OrjsonResponse(content, headers=headers)
@@ -1,34 +1,47 @@
 import os
 import hashlib
 import hmac
+import time
 from datetime import datetime, timedelta
 from typing import Optional, Dict, Any
-from urllib.parse import parse_qs
+from urllib.parse import parse_qsl
 
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
 from jose import JWTError, jwt
-from passlib.context import CryptContext
+import orjson
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
-from app.database import get_db
+from app.core.cache import TTLCache
+from app.core.hashing import hash_password, verify_and_update
+from app.core.timing import TimingStats
+from app.core.user_cache import dump_user, load_user, token_cache, token_key, user_cache
+from app.database import get_async_db, get_db
 from app.models.user import User
 
 SECRET_KEY = os.getenv("SECRET_KEY")
 ALGORITHM = os.getenv("ALGORITHM", "HS256")
 ACCESS_TOKEN_EXPIRE_MINUTES = int(os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES", "30"))
 TELEGRAM_BOT_TOKEN = os.getenv("TELEGRAM_BOT_TOKEN")
+# Login Widget and Mini App data older than this (seconds) is rejected
+TELEGRAM_AUTH_MAX_AGE = 86400
+TELEGRAM_INIT_DATA_CACHE_SIZE = int(os.getenv("TELEGRAM_INIT_DATA_CACHE_SIZE", "10000"))
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/auth/login")
 
+jwt_encode_timings = TimingStats()
+# Only tokens missing from token_cache are decoded
+jwt_decode_timings = TimingStats()
+
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
-    return pwd_context.verify(plain_password, hashed_password)
+    return verify_and_update(plain_password, hashed_password)[0]
 
 
 def get_password_hash(password: str) -> str:
-    return pwd_context.hash(password)
+    return hash_password(password)
 
 
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
@@ -38,74 +51,135 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     else:
         expire = datetime.utcnow() + timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
     to_encode.update({"exp": expire})
+    started = time.perf_counter()
     encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
+    jwt_encode_timings.record(time.perf_counter() - started)
     return encoded_jwt
 
 
-def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)) -> User:
-    credentials_exception = HTTPException(
+def _credentials_exception() -> HTTPException:
+    return HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
         headers={"WWW-Authenticate": "Bearer"},
     )
+
+
+def decode_user_id(token: str) -> str:
+    """Return the ``sub`` claim of a valid access token."""
+    key = token_key(token)
+    user_id = token_cache.get(key)
+    if user_id is not None:
+        return user_id
+
+    started = time.perf_counter()
     try:
         payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
         user_id: str = payload.get("sub")
         if user_id is None:
-            raise credentials_exception
+            raise _credentials_exception()
     except JWTError:
-        raise credentials_exception
+        raise _credentials_exception()
+    finally:
+        jwt_decode_timings.record(time.perf_counter() - started)
+
+    if "exp" in payload:
+        token_cache.set(key, user_id, ttl=payload["exp"] - time.time())
+    return user_id
+
+
+def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)) -> User:
+    user_id = decode_user_id(token)
+
+    cached = user_cache.get(user_id)
+    if cached is not None:
+        return load_user(cached)
 
     user = db.query(User).filter(User.id == user_id).first()
     if user is None:
-        raise credentials_exception
+        raise _credentials_exception()
+    user_cache.set(user_id, dump_user(user))
     return user
 
 
-def verify_telegram_auth(auth_data: Dict[str, Any]) -> bool:
-    """
-    Verify Telegram Login Widget authentication data.
-    Returns True if the data is valid, False otherwise.
+async def get_current_user_async(
+    token: str = Depends(oauth2_scheme), db: AsyncSession = Depends(get_async_db)
+) -> User:
+    user_id = decode_user_id(token)
+
+    cached = await user_cache.aget(user_id)
+    if cached is not None:
+        return load_user(cached)
+
+    user = (await db.execute(select(User).where(User.id == user_id))).scalar_one_or_none()
+    if user is None:
+        raise _credentials_exception()
+    await user_cache.aset(user_id, dump_user(user))
+    return user
+
+
+def _telegram_keys(bot_token: Optional[str]):
+    """HMAC states keyed for the Login Widget and the Mini App.
+
+    Deriving the keys and keying HMAC is done once; each verification
+    only ``copy()``-s the prepared state.
     """
+    if not bot_token:
+        return None, None
+    widget_key = hashlib.sha256(bot_token.encode()).digest()
+    web_app_key = hmac.new(b"WebAppData", bot_token.encode(), hashlib.sha256).digest()
+    return hmac.new(widget_key, digestmod=hashlib.sha256), hmac.new(web_app_key, digestmod=hashlib.sha256)
+
+
+_widget_hmac, _web_app_hmac = _telegram_keys(TELEGRAM_BOT_TOKEN)
+
+# Verified Mini App initData by digest, kept until its auth_date expires:
+# the app re-sends the same initData on every launch and reload
+init_data_cache = TTLCache(maxsize=TELEGRAM_INIT_DATA_CACHE_SIZE, ttl=TELEGRAM_AUTH_MAX_AGE)
+
+
+def _require_bot_token() -> None:
     if not TELEGRAM_BOT_TOKEN:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Telegram bot token not configured"
         )
 
-    check_hash = auth_data.get('hash')
-    if not check_hash:
-        return False
 
-    # Remove hash from data
-    auth_data_copy = {k: v for k, v in auth_data.items() if k != 'hash'}
+def _signature_matches(prepared, data_check_string: str, check_hash: str) -> bool:
+    mac = prepared.copy()
+    mac.update(data_check_string.encode())
+    return hmac.compare_digest(mac.hexdigest().encode(), check_hash.encode())
+
 
-    # Create data check string
-    data_check_arr = [f"{k}={v}" for k, v in sorted(auth_data_copy.items())]
-    data_check_string = '\n'.join(data_check_arr)
+def _auth_age(auth_date: Any) -> Optional[float]:
+    """Seconds since ``auth_date``, or None if it is not a timestamp."""
+    try:
+        return time.time() - int(auth_date)
+    except (ValueError, TypeError):
+        return None
+
+
+def verify_telegram_auth(auth_data: Dict[str, Any]) -> bool:
+    """
+    Verify Telegram Login Widget authentication data.
+    Returns True if the data is valid, False otherwise.
+    """
+    _require_bot_token()
 
-    # Calculate hash
-    secret_key = hashlib.sha256(TELEGRAM_BOT_TOKEN.encode()).digest()
-    calculated_hash = hmac.new(
-        secret_key,
-        data_check_string.encode(),
-        hashlib.sha256
-    ).hexdigest()
+    check_hash = auth_data.get('hash')
+    if not check_hash:
+        return False
 
-    # Verify hash
-    if calculated_hash != check_hash:
+    data_check_string = '\n'.join(f"{k}={v}" for k, v in sorted(auth_data.items()) if k != 'hash')
+    if not _signature_matches(_widget_hmac, data_check_string, str(check_hash)):
         return False
 
-    # Check auth_date (should not be older than 24 hours)
+    # auth_date should not be older than TELEGRAM_AUTH_MAX_AGE
     auth_date = auth_data.get('auth_date')
     if auth_date:
-        try:
-            auth_timestamp = int(auth_date)
-            current_timestamp = int(datetime.utcnow().timestamp())
-            # 24 hours = 86400 seconds
-            if current_timestamp - auth_timestamp > 86400:
-                return False
-        except (ValueError, TypeError):
+        age = _auth_age(auth_date)
+        if age is None or age > TELEGRAM_AUTH_MAX_AGE:
             return False
 
     return True
@@ -116,67 +190,41 @@ def verify_telegram_web_app_data(init_data: str) -> Optional[Dict[str, Any]]:
     Verify Telegram Mini App initData.
     Returns parsed data if valid, None otherwise.
     """
-    if not TELEGRAM_BOT_TOKEN:
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail="Telegram bot token not configured"
-        )
+    _require_bot_token()
+
+    cache_key = hashlib.sha256(init_data.encode()).digest()
+    cached = init_data_cache.get(cache_key)
+    if cached is not None:
+        return cached
 
     try:
-        # Parse init_data
-        parsed_data = parse_qs(init_data)
+        # First value of every non-empty field, as parse_qs would give
+        fields: Dict[str, Any] = {}
+        for key, value in parse_qsl(init_data):
+            fields.setdefault(key, value)
 
-        # Get hash
-        hash_value = parsed_data.get('hash', [None])[0]
+        hash_value = fields.pop('hash', None)
         if not hash_value:
             return None
 
-        # Remove hash and create data check string
-        data_check_pairs = []
-        for key in sorted(parsed_data.keys()):
-            if key == 'hash':
-                continue
-            value = parsed_data[key][0]
-            data_check_pairs.append(f"{key}={value}")
-
-        data_check_string = '\n'.join(data_check_pairs)
-
-        # Calculate hash
-        secret_key = hmac.new(
-            b"WebAppData",
-            TELEGRAM_BOT_TOKEN.encode(),
-            hashlib.sha256
-        ).digest()
-
-        calculated_hash = hmac.new(
-            secret_key,
-            data_check_string.encode(),
-            hashlib.sha256
-        ).hexdigest()
-
-        # Verify hash
-        if calculated_hash != hash_value:
+        data_check_string = '\n'.join(f"{k}={v}" for k, v in sorted(fields.items()))
+        if not _signature_matches(_web_app_hmac, data_check_string, hash_value):
             return None
 
-        # Check auth_date
-        auth_date = parsed_data.get('auth_date', [None])[0]
+        ttl = TELEGRAM_AUTH_MAX_AGE
+        auth_date = fields.get('auth_date')
         if auth_date:
-            try:
-                auth_timestamp = int(auth_date)
-                current_timestamp = int(datetime.utcnow().timestamp())
-                # 24 hours = 86400 seconds
-                if current_timestamp - auth_timestamp > 86400:
-                    return None
-            except (ValueError, TypeError):
+            age = _auth_age(auth_date)
+            if age is None or age > TELEGRAM_AUTH_MAX_AGE:
                 return None
+            ttl = TELEGRAM_AUTH_MAX_AGE - age
 
-        # Parse user data
-        import json
-        user_data = parsed_data.get('user', [None])[0]
-        if user_data:
-            parsed_data['user'] = json.loads(user_data)
+        if fields.get('user'):
+            fields['user'] = orjson.loads(fields['user'])
+        fields['hash'] = hash_value
 
-        return parsed_data
+        init_data_cache.set(cache_key, fields, ttl=ttl)
+        return fields
 
-    except Exception as e:
+    except Exception:
         return None
@@ -0,0 +1,202 @@
+"""Opt-in SQL profiler for development and pre-release load tests.
+
+With ``SQL_PROFILE=true`` every statement run through the app's engine is
+timed from the ``before/after_cursor_execute`` events and attributed to
+the request being handled. After each request:
+
+* the number of statements and time spent in them is logged;
+* statements of the same shape (the SQL with literals and bound values
+  replaced by ``?``) executed ``SQL_PROFILE_REPEAT_THRESHOLD`` or more
+  times are logged as N+1 candidates, typically lazy loads of
+  ``Goal.history``, ``User.goals`` or ``User.checkins`` in a loop.
+
+Statements slower than ``SQL_PROFILE_SLOW_MS`` are logged with their
+parameters and, unless ``SQL_PROFILE_EXPLAIN=false``, the output of
+``EXPLAIN (ANALYZE, BUFFERS)``. The explained statement runs a second time
+inside a savepoint that is rolled back, so writes are not applied twice,
+but it does take the time and locks again: do not enable this in
+production.
+
+``SQL_PROFILE_HEADER=true`` (development only) also adds
+``X-SQL-Profile: queries=7; time_ms=12.3; repeated=1`` to every response.
+"""
+
+import contextlib
+import contextvars
+import functools
+import logging
+import os
+import re
+import time
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from sqlalchemy import event
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+SQL_PROFILE = os.getenv("SQL_PROFILE", "false").lower() in ("1", "true", "yes")
+SQL_PROFILE_SLOW_MS = float(os.getenv("SQL_PROFILE_SLOW_MS", "100"))
+SQL_PROFILE_EXPLAIN = os.getenv("SQL_PROFILE_EXPLAIN", "true").lower() in ("1", "true", "yes")
+SQL_PROFILE_REPEAT_THRESHOLD = int(os.getenv("SQL_PROFILE_REPEAT_THRESHOLD", "3"))
+SQL_PROFILE_HEADER = os.getenv("SQL_PROFILE_HEADER", "false").lower() in ("1", "true", "yes")
+
+HEADER = "X-SQL-Profile"
+EXPLAIN_SAVEPOINT = "sql_profiler_explain"
+# Running these twice has effects a rolled-back savepoint does not undo
+NOT_EXPLAINED_RE = re.compile(r"advisory_|pg_notify|\bNOTIFY\b|\bLISTEN\b|nextval|setval", re.IGNORECASE)
+
+_SHAPE_RULES = [
+    (re.compile(r"'(?:[^']|'')*'"), "?"),  # string literals
+    (re.compile(r"%\(\w+\)s|\$\d+|%s"), "?"),  # psycopg2 / asyncpg parameters
+    (re.compile(r"\b\d+(?:\.\d+)?\b"), "?"),  # numbers
+    (re.compile(r"\?(?:\s*,\s*\?)+"), "?, ..."),  # expanded IN lists
+    (re.compile(r"\s+"), " "),
+]
+
+logger = logging.getLogger(__name__)
+
+
+@functools.lru_cache(maxsize=2048)
+def statement_shape(statement: str) -> str:
+    """``statement`` with values replaced, so repeats of a query compare equal."""
+    for pattern, replacement in _SHAPE_RULES:
+        statement = pattern.sub(replacement, statement)
+    return statement.strip()
+
+
+class RequestProfile:
+    def __init__(self, label: str):
+        self.label = label
+        self.queries = 0
+        self.seconds = 0.0
+        self.shapes: Dict[str, List[float]] = {}
+
+    def record(self, statement: str, seconds: float) -> None:
+        self.queries += 1
+        self.seconds += seconds
+        self.shapes.setdefault(statement_shape(statement), []).append(seconds)
+
+    def repeated(self, threshold: int = SQL_PROFILE_REPEAT_THRESHOLD) -> List[Tuple[str, List[float]]]:
+        """Shapes executed at least ``threshold`` times, most frequent first."""
+        found = [(shape, timings) for shape, timings in self.shapes.items() if len(timings) >= threshold]
+        return sorted(found, key=lambda item: -len(item[1]))
+
+    def header(self) -> str:
+        return f"queries={self.queries}; time_ms={self.seconds * 1000:.1f}; repeated={len(self.repeated())}"
+
+
+_profile: contextvars.ContextVar[Optional[RequestProfile]] = contextvars.ContextVar("sql_profile", default=None)
+
+
+def _explain(conn, statement: str, parameters) -> str:
+    """Plan of ``statement`` as executed, run on a separate cursor of the
+    same connection so the original result is left alone."""
+    cursor = conn.connection.cursor()
+    try:
+        cursor.execute(f"SAVEPOINT {EXPLAIN_SAVEPOINT}")
+        try:
+            cursor.execute(f"EXPLAIN (ANALYZE, BUFFERS) {statement}", parameters)
+            return "\n".join(row[0] for row in cursor.fetchall())
+        except Exception as exc:
+            # e.g. an INSERT whose primary key now exists; the estimate still helps
+            cursor.execute(f"ROLLBACK TO SAVEPOINT {EXPLAIN_SAVEPOINT}")
+            cursor.execute(f"EXPLAIN {statement}", parameters)
+            plan = "\n".join(row[0] for row in cursor.fetchall())
+            return f"(ANALYZE failed: {str(exc).strip()}; estimated plan)\n{plan}"
+        finally:
+            cursor.execute(f"ROLLBACK TO SAVEPOINT {EXPLAIN_SAVEPOINT}")
+    finally:
+        cursor.close()
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    context._profiler_started = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    elapsed = time.perf_counter() - context._profiler_started
+    profile = _profile.get()
+    if profile is not None:
+        profile.record(statement, elapsed)
+    if elapsed * 1000 < SQL_PROFILE_SLOW_MS:
+        return
+
+    plan = None
+    if SQL_PROFILE_EXPLAIN and not executemany and conn.in_transaction() and not NOT_EXPLAINED_RE.search(statement):
+        try:
+            plan = _explain(conn, statement, parameters)
+        except Exception as exc:
+            plan = f"(EXPLAIN failed: {exc})"
+    logger.warning(
+        "slow query (%.1f ms)%s\n%s\nparameters: %r%s",
+        elapsed * 1000,
+        f" in {profile.label}" if profile is not None else "",
+        statement,
+        parameters,
+        f"\n{plan}" if plan else "",
+    )
+
+
+def instrument_engine(engine) -> None:
+    """Profile every statement run through ``engine`` (a sync ``Engine``;
+    pass ``async_engine.sync_engine`` for asyncpg)."""
+    event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+
+
+def report(profile: RequestProfile) -> None:
+    logger.info("%s: %d queries, %.1f ms in SQL", profile.label, profile.queries, profile.seconds * 1000)
+    for shape, timings in profile.repeated():
+        logger.warning(
+            "possible N+1 in %s: %d x %.1f ms total: %s",
+            profile.label,
+            len(timings),
+            sum(timings) * 1000,
+            shape,
+        )
+
+
+@contextlib.contextmanager
+def profile(label: str) -> Iterator[RequestProfile]:
+    """Attribute the statements run inside the block to ``label`` and
+    report them at the end, e.g. around a job outside any request."""
+    current = RequestProfile(label)
+    token = _profile.set(current)
+    try:
+        yield current
+    finally:
+        _profile.reset(token)
+        report(current)
+
+
+class SQLProfilerMiddleware:
+    def __init__(self, app: ASGIApp, header: bool = SQL_PROFILE_HEADER):
+        self.app = app
+        self.header = header
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        with profile(f"{scope['method']} {scope['path']}") as current:
+
+            async def send_with_header(message: Message) -> None:
+                if self.header and message["type"] == "http.response.start":
+                    headers = list(message.get("headers", []))
+                    headers.append((HEADER.lower().encode(), current.header().encode()))
+                    message = {**message, "headers": headers}
+                await send(message)
+
+            await self.app(scope, receive, send_with_header)
+
+
+def setup(app, engine) -> None:
+    """Profile ``engine`` and the requests served by ``app``."""
+    instrument_engine(engine)
+    app.add_middleware(SQLProfilerMiddleware)
+    logger.setLevel(logging.INFO)
+    if not logging.getLogger().handlers:
+        # uvicorn only configures its own loggers
+        handler = logging.StreamHandler()
+        handler.setFormatter(logging.Formatter("%(levelname)s:     %(name)s %(message)s"))
+        logger.addHandler(handler)
@@ -0,0 +1,28 @@
+import threading
+from typing import Any, Dict
+
+
+class TimingStats:
+    """Thread-safe count/total/max accumulator for durations in seconds."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def record(self, seconds: float) -> None:
+        with self._lock:
+            self.count += 1
+            self.total += seconds
+            if seconds > self.max:
+                self.max = seconds
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "count": self.count,
+                "seconds_total": round(self.total, 6),
+                "seconds_avg": round(self.total / self.count, 6) if self.count else 0.0,
+                "seconds_max": round(self.max, 6),
+            }
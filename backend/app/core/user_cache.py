@@ -0,0 +1,94 @@
+"""Caches used to resolve the authenticated user without a DB round trip.
+
+* Decoded access tokens are cached in-process by token hash until ``exp``.
+* Resolved users are cached by ``sub`` for ``USER_CACHE_TTL`` seconds.
+  ``USER_CACHE_BACKEND=redis`` moves this cache to ``REDIS_URL`` so every
+  worker sees the same entries and invalidations; with the default
+  in-process backend other workers may serve a modified user for up to
+  one TTL.
+
+Users are invalidated after any commit that updates or deletes them
+through the ORM.
+"""
+
+import hashlib
+import os
+import uuid
+from datetime import datetime
+from typing import Any, Dict
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session, make_transient_to_detached, object_session
+
+from app.core.cache import RedisCache, TTLCache
+from app.models.user import User
+
+USER_CACHE_BACKEND = os.getenv("USER_CACHE_BACKEND", "memory")
+USER_CACHE_TTL = float(os.getenv("USER_CACHE_TTL", "60"))
+USER_CACHE_SIZE = int(os.getenv("USER_CACHE_SIZE", "10000"))
+REDIS_URL = os.getenv("REDIS_URL", "redis://localhost:6379/0")
+
+token_cache = TTLCache(maxsize=USER_CACHE_SIZE, ttl=USER_CACHE_TTL)
+
+if USER_CACHE_BACKEND == "redis":
+    user_cache = RedisCache(REDIS_URL, prefix="goaltracker:user", ttl=USER_CACHE_TTL)
+else:
+    user_cache = TTLCache(maxsize=USER_CACHE_SIZE, ttl=USER_CACHE_TTL)
+
+
+def token_key(token: str) -> str:
+    return hashlib.sha256(token.encode()).hexdigest()
+
+
+def dump_user(user: User) -> Dict[str, Any]:
+    # hashed_password is left out on purpose: nothing downstream of
+    # get_current_user needs it and it should not sit in a shared cache.
+    return {
+        "id": str(user.id),
+        "email": user.email,
+        "name": user.name,
+        "telegram_id": user.telegram_id,
+        "created_at": user.created_at.isoformat() if user.created_at else None,
+        "updated_at": user.updated_at.isoformat() if user.updated_at else None,
+    }
+
+
+def load_user(data: Dict[str, Any]) -> User:
+    """Rebuild a detached ``User`` from a cached entry."""
+    user = User(
+        id=uuid.UUID(data["id"]),
+        email=data["email"],
+        name=data["name"],
+        telegram_id=data["telegram_id"],
+        created_at=datetime.fromisoformat(data["created_at"]) if data["created_at"] else None,
+        updated_at=datetime.fromisoformat(data["updated_at"]) if data["updated_at"] else None,
+    )
+    make_transient_to_detached(user)
+    return user
+
+
+def invalidate_user(user_id) -> None:
+    user_cache.delete(str(user_id))
+
+
+def cache_info() -> Dict[str, Any]:
+    return {"tokens": token_cache.info(), "users": user_cache.info()}
+
+
+@event.listens_for(User, "after_update")
+@event.listens_for(User, "after_delete")
+def _remember_changed_user(mapper, connection, target):
+    session = object_session(target)
+    if session is not None:
+        session.info.setdefault("changed_user_ids", set()).add(target.id)
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_changed_users(session):
+    for user_id in session.info.pop("changed_user_ids", ()):
+        invalidate_user(user_id)
+
+
+@event.listens_for(Session, "after_rollback")
+def _forget_changed_users(session):
+    session.info.pop("changed_user_ids", None)
@@ -1,15 +1,33 @@
 import os
 
 from sqlalchemy import create_engine
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 
+from app.core.cache import deferred_deletes
+from app.core.pool import engine_options
+
 DATABASE_URL = os.getenv("DATABASE_URL")
 
-engine = create_engine(DATABASE_URL)
+# "sync" serves requests from the threadpool over psycopg2, "async" serves
+# them from the event loop over asyncpg. Both share the same handlers.
+DATABASE_MODE = os.getenv("DATABASE_MODE", "sync")
+
+engine = create_engine(DATABASE_URL, **engine_options())
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 Base = declarative_base()
 
+ASYNC_DATABASE_URL = make_url(DATABASE_URL).set(drivername="postgresql+asyncpg")
+
+async_engine = create_async_engine(ASYNC_DATABASE_URL, **engine_options(is_async=True))
+AsyncSessionLocal = async_sessionmaker(
+    bind=async_engine,
+    autoflush=False,
+    expire_on_commit=False,
+)
+
 
 def get_db():
     db = SessionLocal()
@@ -17,3 +35,19 @@ def get_db():
         yield db
     finally:
         db.close()
+
+
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
+
+
+async def run_in_session(db: AsyncSession, handler, **kwargs):
+    """Run a sync ``handler(db=..., **kwargs)`` on the async session.
+
+    The handler's ORM calls go through the asyncpg connection via
+    ``AsyncSession.run_sync``, so no threadpool worker is tied up. Cache
+    invalidations it makes are sent to Redis once it returns.
+    """
+    async with deferred_deletes():
+        return await db.run_sync(lambda session: handler(db=session, **kwargs))
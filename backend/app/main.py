@@ -1,9 +1,40 @@
-from fastapi import FastAPI
+import asyncio
+import contextlib
+
+from fastapi import FastAPI, Request, status
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+
+from app.api import telegram
+from app.core import metrics, response_cache, sql_profiler
+from app.core.compression import CompressionMiddleware
+from app.core.hashing import hashing_info
+from app.core.pool import pool_status
+from app.core.responses import OrjsonResponse
+from app.core.user_cache import cache_info
+from app.database import DATABASE_MODE, async_engine, engine
+from app.services import telegram_updates
+
+if DATABASE_MODE == "async":
+    from app.api.aio import auth, goals, stats
+else:
+    from app.api import auth, goals, stats
+
+
+@contextlib.asynccontextmanager
+async def lifespan(app: FastAPI):
+    consumer = None
+    if telegram_updates.TELEGRAM_WEBHOOK_SECRET:
+        # Applies the progress commands queued by the Telegram webhook
+        consumer = asyncio.create_task(telegram_updates.updates.run())
+    yield
+    if consumer is not None:
+        await telegram_updates.updates.drain()
+        consumer.cancel()
 
-from app.api import auth, goals, stats
 
-app = FastAPI(title="GoalTracker API", version="1.0.0")
+app = FastAPI(title="GoalTracker API", version="1.0.0", default_response_class=OrjsonResponse, lifespan=lifespan)
 
 # CORS
 app.add_middleware(
@@ -12,12 +43,32 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["ETag", "X-Next-Cursor", sql_profiler.HEADER],
 )
+app.add_middleware(CompressionMiddleware)
+
+instrumented_engine = async_engine.sync_engine if DATABASE_MODE == "async" else engine
+if sql_profiler.SQL_PROFILE:
+    sql_profiler.setup(app, instrumented_engine)
+if metrics.METRICS_ENABLED:
+    # Outermost, so request timings include compression and CORS
+    metrics.setup(app, instrumented_engine)
+
+
+@app.exception_handler(PoolTimeoutError)
+async def pool_timeout_handler(request: Request, exc: PoolTimeoutError):
+    # Every pooled connection stayed busy for DB_POOL_TIMEOUT seconds
+    return JSONResponse(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        content={"detail": "Database is busy, try again later"},
+    )
+
 
 # Include routers with /api prefix
 app.include_router(auth.router, prefix="/api")
 app.include_router(goals.router, prefix="/api")
 app.include_router(stats.router, prefix="/api")
+app.include_router(telegram.router, prefix="/api")
 
 
 @app.get("/")
@@ -28,3 +79,24 @@ def read_root():
 @app.get("/health")
 def health_check():
     return {"status": "healthy"}
+
+
+@app.get("/health/db")
+def database_health():
+    active_engine = async_engine.sync_engine if DATABASE_MODE == "async" else engine
+    return {"database_mode": DATABASE_MODE, **pool_status(active_engine)}
+
+
+@app.get("/health/cache")
+def cache_health():
+    return {**cache_info(), "responses": response_cache.cache_info()}
+
+
+@app.get("/health/telegram")
+async def telegram_health():
+    return telegram_updates.updates.stats()
+
+
+@app.get("/health/hashing")
+def hashing_health():
+    return hashing_info()
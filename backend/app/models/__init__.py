@@ -1,6 +1,11 @@
 from app.models.user import User
 from app.models.goal import Goal
 from app.models.goal_history import GoalHistory
+from app.models.goal_tombstone import GoalTombstone
 from app.models.checkin import CheckIn
+from app.models.checkin_bitmap import CheckinBitmap
+from app.models.job import Job
+from app.models.notification import Notification
+from app.models.user_stats import UserStats
 
-__all__ = ["User", "Goal", "GoalHistory", "CheckIn"]
+__all__ = ["User", "Goal", "GoalHistory", "GoalTombstone", "CheckIn", "CheckinBitmap", "Job", "Notification", "UserStats"]
@@ -0,0 +1,21 @@
+from sqlalchemy import Column, ForeignKey, LargeBinary, SmallInteger
+from sqlalchemy.dialects.postgresql import UUID
+
+from app.database import Base
+
+# 366 bits, enough for a leap year
+BITMAP_BYTES = 46
+
+
+class CheckinBitmap(Base):
+    """A user's check-ins for one calendar year, one bit per day.
+
+    Bit ``n`` (``get_bit``/``set_bit`` numbering, i.e. LSB-first within
+    each byte) is day ``n`` of the year, 0 being January 1st.
+    """
+
+    __tablename__ = "checkin_bitmaps"
+
+    user_id = Column(UUID(as_uuid=True), ForeignKey("users.id", ondelete="CASCADE"), primary_key=True)
+    year = Column(SmallInteger, primary_key=True)
+    days = Column(LargeBinary(BITMAP_BYTES), nullable=False)
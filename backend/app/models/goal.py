@@ -1,18 +1,22 @@
 import uuid
 
-from sqlalchemy import Column, Date, DateTime, Float, ForeignKey, String
+from sqlalchemy import BigInteger, Column, Date, DateTime, Float, ForeignKey, Index, String, text
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 
 from app.database import Base
 
+# 64-bit id of the writing transaction. Delta sync compares it against the
+# oldest transaction still running, so late commits are never skipped.
+CURRENT_XID = "(pg_current_xact_id()::text)::bigint"
+
 
 class Goal(Base):
     __tablename__ = "goals"
 
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
-    user_id = Column(UUID(as_uuid=True), ForeignKey("users.id"), nullable=False, index=True)
+    user_id = Column(UUID(as_uuid=True), ForeignKey("users.id"), nullable=False)
     name = Column(String, nullable=False)
     unit = Column(String, nullable=False)
     target = Column(Float, nullable=False)
@@ -22,6 +26,24 @@ class Goal(Base):
     completed_at = Column(DateTime(timezone=True), nullable=True)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+    change_xid = Column(BigInteger, nullable=False, server_default=text(CURRENT_XID), onupdate=text(CURRENT_XID))
 
     user = relationship("User", back_populates="goals")
     history = relationship("GoalHistory", back_populates="goal", cascade="all, delete-orphan")
+
+    __table_args__ = (
+        Index("ix_goals_user_id_completed_at", "user_id", "completed_at"),
+        Index("ix_goals_user_id_change_xid", "user_id", "change_xid"),
+        # Listing sorts and filters (app/services/goal_list.py)
+        Index("ix_goals_user_id_name", "user_id", "name", "id"),
+        Index("ix_goals_user_id_deadline", "user_id", "deadline", "id"),
+        Index(
+            "ix_goals_user_id_deadline_active",
+            "user_id",
+            "deadline",
+            "id",
+            postgresql_where=completed_at.is_(None),
+        ),
+        Index("ix_goals_user_id_color", "user_id", "color"),
+        Index("ix_goals_user_id_progress", "user_id", (current / target), "id"),
+    )
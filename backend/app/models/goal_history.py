@@ -1,6 +1,6 @@
 import uuid
 
-from sqlalchemy import Column, Date, DateTime, Float, ForeignKey, String
+from sqlalchemy import Column, Date, DateTime, Float, ForeignKey, Index, String
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
@@ -10,12 +10,24 @@ from app.database import Base
 
 class GoalHistory(Base):
     __tablename__ = "goal_history"
-
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
-    goal_id = Column(UUID(as_uuid=True), ForeignKey("goals.id"), nullable=False, index=True)
+    goal_id = Column(UUID(as_uuid=True), ForeignKey("goals.id"), nullable=False)
     date = Column(Date, nullable=False)
     delta = Column(Float, nullable=False)
+    # Goal's ``current`` right after this entry was applied
+    after = Column(Float, nullable=False)
     note = Column(String, nullable=True)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
 
     goal = relationship("Goal", back_populates="history")
+
+    __table_args__ = (
+        Index(
+            "ix_goal_history_goal_id_date_created_at",
+            "goal_id",
+            "date",
+            "created_at",
+            "id",
+            postgresql_include=["delta", "after"],
+        ),
+    )
@@ -0,0 +1,21 @@
+from sqlalchemy import BigInteger, Column, DateTime, ForeignKey, Index, text
+from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy.sql import func
+
+from app.database import Base
+from app.models.goal import CURRENT_XID
+
+
+class GoalTombstone(Base):
+    """Marker left behind by a deleted goal for delta sync clients."""
+
+    __tablename__ = "goal_tombstones"
+
+    goal_id = Column(UUID(as_uuid=True), primary_key=True)
+    user_id = Column(UUID(as_uuid=True), ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+    deleted_xid = Column(BigInteger, nullable=False, server_default=text(CURRENT_XID))
+    deleted_at = Column(DateTime(timezone=True), server_default=func.now())
+
+    __table_args__ = (
+        Index("ix_goal_tombstones_user_id_deleted_xid", "user_id", "deleted_xid"),
+    )
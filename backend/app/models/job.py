@@ -0,0 +1,36 @@
+import uuid
+
+from sqlalchemy import Column, DateTime, Index, Integer, String, Text, text
+from sqlalchemy.dialects.postgresql import JSONB, UUID
+from sqlalchemy.sql import func
+
+from app.database import Base
+
+
+class Job(Base):
+    """Unit of background work claimed by ``python -m app.worker``."""
+
+    __tablename__ = "jobs"
+
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    kind = Column(String(64), nullable=False)
+    payload = Column(JSONB, nullable=False, default=dict, server_default=text("'{}'::jsonb"))
+    # queued -> running -> done, or back to queued with a later run_at until
+    # max_attempts is reached, then failed
+    status = Column(String(16), nullable=False, default="queued", server_default="queued")
+    attempts = Column(Integer, nullable=False, default=0, server_default="0")
+    max_attempts = Column(Integer, nullable=False, default=5, server_default="5")
+    run_at = Column(DateTime(timezone=True), nullable=False, server_default=func.now())
+    # Scheduled and periodic jobs are enqueued once per key
+    dedupe_key = Column(String(255), nullable=True, unique=True)
+    locked_by = Column(String(128), nullable=True)
+    locked_at = Column(DateTime(timezone=True), nullable=True)
+    last_error = Column(Text, nullable=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    finished_at = Column(DateTime(timezone=True), nullable=True)
+
+    __table_args__ = (
+        Index("ix_jobs_queued_run_at", "run_at", postgresql_where=text("status = 'queued'")),
+        Index("ix_jobs_running_locked_at", "locked_at", postgresql_where=text("status = 'running'")),
+        Index("ix_jobs_finished_at", "finished_at", postgresql_where=text("status IN ('done', 'failed')")),
+    )
@@ -0,0 +1,37 @@
+import uuid
+
+from sqlalchemy import BigInteger, Column, DateTime, ForeignKey, Index, Integer, String, Text
+from sqlalchemy import text as sql_text
+from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy.sql import func
+
+from app.database import Base
+
+
+class Notification(Base):
+    """Outgoing Telegram message (reminder or digest) awaiting delivery."""
+
+    __tablename__ = "notifications"
+
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    user_id = Column(UUID(as_uuid=True), ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+    chat_id = Column(BigInteger, nullable=False)
+    kind = Column(String(32), nullable=False)
+    # One message per reminder occasion, e.g. "digest:<user>:<date>"
+    dedupe_key = Column(String(255), nullable=False, unique=True)
+    text = Column(Text, nullable=False)
+    # pending -> sending -> sent, or failed when Telegram refuses the chat
+    # or the retries run out
+    status = Column(String(16), nullable=False, default="pending", server_default="pending")
+    attempts = Column(Integer, nullable=False, default=0, server_default="0")
+    next_attempt_at = Column(DateTime(timezone=True), nullable=False, server_default=func.now())
+    locked_at = Column(DateTime(timezone=True), nullable=True)
+    last_error = Column(Text, nullable=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    sent_at = Column(DateTime(timezone=True), nullable=True)
+
+    __table_args__ = (
+        Index("ix_notifications_pending_next_attempt_at", "next_attempt_at", postgresql_where=sql_text("status = 'pending'")),
+        Index("ix_notifications_sending_locked_at", "locked_at", postgresql_where=sql_text("status = 'sending'")),
+        Index("ix_notifications_user_id", "user_id"),
+    )
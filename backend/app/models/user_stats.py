@@ -0,0 +1,23 @@
+from sqlalchemy import BigInteger, Column, Date, DateTime, ForeignKey, Integer
+from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy.sql import func
+
+from app.database import Base
+
+
+class UserStats(Base):
+    """Per-user goal aggregates maintained by the goal write paths."""
+
+    __tablename__ = "user_stats"
+
+    user_id = Column(UUID(as_uuid=True), ForeignKey("users.id", ondelete="CASCADE"), primary_key=True)
+    total_goals = Column(Integer, nullable=False, default=0, server_default="0")
+    completed_goals = Column(Integer, nullable=False, default=0, server_default="0")
+    total_days_to_complete = Column(BigInteger, nullable=False, default=0, server_default="0")
+    fastest_goal_id = Column(UUID(as_uuid=True), ForeignKey("goals.id", ondelete="SET NULL"), nullable=True)
+    fastest_goal_days = Column(Integer, nullable=True)
+    # The most recent run of consecutive check-in days ends at last_checkin_date
+    current_streak_start = Column(Date, nullable=True)
+    last_checkin_date = Column(Date, nullable=True)
+    longest_streak = Column(Integer, nullable=False, default=0, server_default="0")
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
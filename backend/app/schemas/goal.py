@@ -1,5 +1,5 @@
 from datetime import date, datetime
-from typing import Optional
+from typing import List, Literal, Optional
 from uuid import UUID
 
 from pydantic import BaseModel, Field
@@ -40,3 +40,32 @@ class GoalResponse(BaseModel):
 
     class Config:
         from_attributes = True
+
+
+class ProgressBatchItem(BaseModel):
+    goal_id: UUID
+    delta: float
+    note: Optional[str] = None
+    client_timestamp: Optional[datetime] = None
+
+
+class ProgressBatch(BaseModel):
+    items: List[ProgressBatchItem] = Field(..., min_length=1, max_length=500)
+
+
+class ProgressBatchResult(BaseModel):
+    goal_id: UUID
+    status: Literal["applied", "not_found"]
+    after: Optional[float] = None
+
+
+class ProgressBatchResponse(BaseModel):
+    results: List[ProgressBatchResult]
+    goals: List[GoalResponse]
+
+
+class GoalChangesResponse(BaseModel):
+    full: bool
+    goals: List[GoalResponse]
+    deleted: List[UUID]
+    cursor: str
@@ -18,3 +18,10 @@ class HistoryEntry(BaseModel):
 class GoalHistoryResponse(BaseModel):
     initial: float
     rows: List[HistoryEntry]
+    next_cursor: Optional[str] = None
+
+
+class ProgressAtResponse(BaseModel):
+    date: date
+    current: float
+    pct: int
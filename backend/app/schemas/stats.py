@@ -34,3 +34,16 @@ class UserStatsResponse(BaseModel):
     avg_days_to_complete: int
     active_rate: int
     completed_in_last_30_days: int
+
+
+class ActivityYear(BaseModel):
+    year: int
+    days: int
+    # base64 bitset, bit n (LSB-first) = check-in on day n of the year
+    bits: str
+
+
+class ActivityResponse(BaseModel):
+    start: date
+    end: date
+    years: List[ActivityYear]
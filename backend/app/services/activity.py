@@ -0,0 +1,31 @@
+"""Check-in activity as one bitset per calendar year.
+
+Bit ``n`` of a year's bitset is set when the user checked in on day ``n``
+of that year (0 = January 1st). Bits are packed LSB-first: day ``n`` lives
+in byte ``n // 8`` under mask ``1 << (n % 8)``. The packed bytes are sent
+base64 encoded, so a full year costs 61-62 bytes on the wire.
+"""
+
+import base64
+from datetime import date as date_type
+from typing import Any, Dict, List
+
+from sqlalchemy.orm import Session
+
+from app.services import checkins
+
+
+def days_in_year(year: int) -> int:
+    return (date_type(year + 1, 1, 1) - date_type(year, 1, 1)).days
+
+
+def activity_bitmaps(db: Session, user_id, start: date_type, end: date_type) -> List[Dict[str, Any]]:
+    """Per-year bitsets of check-ins between ``start`` and ``end`` inclusive."""
+    bits_by_year = checkins.year_bitmaps(db, user_id, start, end)
+
+    years = []
+    for current_year in range(start.year, end.year + 1):
+        days = days_in_year(current_year)
+        bits = bits_by_year.get(current_year, 0).to_bytes((days + 7) // 8, "little")
+        years.append({"year": current_year, "days": days, "bits": base64.b64encode(bits).decode()})
+    return years
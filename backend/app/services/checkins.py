@@ -0,0 +1,180 @@
+"""Check-in storage.
+
+``CHECKIN_STORAGE`` selects where check-ins live:
+
+* ``table`` (default) - one ``checkins`` row per user per day.
+* ``bitmap`` - one ``checkin_bitmaps`` row per user per year holding a
+  366-bit bitmap. Recording a day is an atomic ``set_bit`` upsert, and
+  reads work on whole years with bit operations.
+
+Migration 202610181500 backfills the bitmaps from the table. When
+switching storage on a running deployment, run
+``python -m app.commands.sync_checkins`` in the matching direction to
+carry over check-ins recorded in the meantime. The ``checkins`` table is
+left in place either way.
+"""
+
+import os
+from datetime import date as date_type, timedelta
+from typing import Dict, Set
+
+from sqlalchemy import Date, Integer, SmallInteger, cast, extract, func, literal, select, text
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.orm import Session
+
+from app.models.checkin import CheckIn
+from app.models.checkin_bitmap import BITMAP_BYTES, CheckinBitmap
+
+CHECKIN_STORAGE = os.getenv("CHECKIN_STORAGE", "table")
+
+# (user_id, date) rows for the streak rebuild, whichever storage is active
+DAYS_SQL = {
+    "table": "SELECT user_id, date FROM checkins",
+    "bitmap": """
+        SELECT b.user_id, make_date(b.year, 1, 1) + n AS date
+        FROM checkin_bitmaps b, generate_series(0, length(b.days) * 8 - 1) AS n
+        WHERE get_bit(b.days, n) = 1
+    """,
+}
+
+# Rebuilds the bitmaps of the selected users from both stores, so check-ins
+# already in checkin_bitmaps are kept
+TABLE_TO_BITMAP_SQL = """
+WITH all_days AS (
+    SELECT user_id, date FROM checkins {where}
+    UNION
+    SELECT user_id, date FROM ({bitmap_days}) AS b {where}
+), days AS (
+    SELECT user_id, EXTRACT(YEAR FROM date)::int AS year, date - date_trunc('year', date)::date AS day
+    FROM all_days
+), bytes AS (
+    SELECT user_id, year, day / 8 AS idx, bit_or(1 << (day % 8)) AS value
+    FROM days
+    GROUP BY user_id, year, day / 8
+), years AS (
+    SELECT DISTINCT user_id, year FROM bytes
+)
+INSERT INTO checkin_bitmaps (user_id, year, days)
+SELECT
+    y.user_id,
+    y.year,
+    decode(string_agg(lpad(to_hex(COALESCE(b.value, 0)), 2, '0'), '' ORDER BY i), 'hex')
+FROM years y
+CROSS JOIN generate_series(0, {size} - 1) AS i
+LEFT JOIN bytes b ON b.user_id = y.user_id AND b.year = y.year AND b.idx = i
+GROUP BY y.user_id, y.year
+ON CONFLICT (user_id, year) DO UPDATE SET days = EXCLUDED.days
+"""
+
+
+def _day_bit(day: date_type) -> int:
+    return day.timetuple().tm_yday - 1
+
+
+def _empty_with(day: date_type) -> bytes:
+    bits = bytearray(BITMAP_BYTES)
+    offset = _day_bit(day)
+    bits[offset // 8] |= 1 << (offset % 8)
+    return bytes(bits)
+
+
+def record_cte(user_id_column, day: date_type):
+    """CTE recording ``day`` for ``user_id_column``; yields a row only if the
+    day was not recorded yet."""
+    if CHECKIN_STORAGE == "bitmap":
+        bit = _day_bit(day)
+        insert = pg_insert(CheckinBitmap).from_select(
+            ["user_id", "year", "days"],
+            select(user_id_column, literal(day.year, SmallInteger), literal(_empty_with(day))),
+        )
+        return (
+            insert.on_conflict_do_update(
+                index_elements=[CheckinBitmap.user_id, CheckinBitmap.year],
+                set_={"days": func.set_bit(CheckinBitmap.days, bit, 1)},
+                where=func.get_bit(CheckinBitmap.days, bit) == 0,
+            )
+            .returning(CheckinBitmap.year)
+            .cte("c")
+        )
+
+    return (
+        pg_insert(CheckIn)
+        .from_select(
+            ["id", "user_id", "date"],
+            select(func.gen_random_uuid(), user_id_column, literal(day, Date)),
+        )
+        .on_conflict_do_nothing(index_elements=["user_id", "date"])
+        .returning(CheckIn.date)
+        .cte("c")
+    )
+
+
+def record(db: Session, user_id, day: date_type) -> bool:
+    """Record ``day``; returns True if it was not recorded yet."""
+    recorded = record_cte(literal(user_id, CheckIn.user_id.type), day)
+    return db.execute(select(func.count()).select_from(recorded)).scalar() > 0
+
+
+def year_bitmaps(db: Session, user_id, start: date_type, end: date_type) -> Dict[int, int]:
+    """``{year: bits}`` for the years touching ``start``..``end``, as Python
+    ints (bit ``n`` = day ``n``) with days outside the range cleared."""
+    if CHECKIN_STORAGE == "bitmap":
+        rows = db.query(CheckinBitmap.year, CheckinBitmap.days).filter(
+            CheckinBitmap.user_id == user_id,
+            CheckinBitmap.year >= start.year,
+            CheckinBitmap.year <= end.year,
+        )
+        bitmaps = {year: int.from_bytes(days, "little") for year, days in rows}
+    else:
+        year = cast(extract("year", CheckIn.date), Integer)
+        day_of_year = CheckIn.date - func.make_date(year, 1, 1)
+        rows = (
+            db.query(year, func.array_agg(day_of_year))
+            .filter(CheckIn.user_id == user_id, CheckIn.date >= start, CheckIn.date <= end)
+            .group_by(year)
+        )
+        bitmaps = {}
+        for row_year, offsets in rows:
+            bits = 0
+            for offset in offsets:
+                bits |= 1 << offset
+            bitmaps[row_year] = bits
+
+    # Clear bits before start / after end in the boundary years
+    if start.year in bitmaps:
+        bitmaps[start.year] &= ~((1 << _day_bit(start)) - 1)
+    if end.year in bitmaps:
+        bitmaps[end.year] &= (1 << (_day_bit(end) + 1)) - 1
+    return bitmaps
+
+
+def days_between(db: Session, user_id, start: date_type, end: date_type) -> Set[date_type]:
+    """Dates with a check-in between ``start`` and ``end`` inclusive."""
+    days = set()
+    for year, bits in year_bitmaps(db, user_id, start, end).items():
+        jan_first = date_type(year, 1, 1)
+        while bits:
+            lowest = bits & -bits
+            days.add(jan_first + timedelta(days=lowest.bit_length() - 1))
+            bits ^= lowest
+    return days
+
+
+def sync_table_to_bitmaps(db: Session, user_id=None) -> int:
+    """Merge ``checkins`` rows into ``checkin_bitmaps``."""
+    where = "WHERE user_id = :user_id" if user_id is not None else ""
+    sql = TABLE_TO_BITMAP_SQL.format(where=where, bitmap_days=DAYS_SQL["bitmap"], size=BITMAP_BYTES)
+    return db.execute(text(sql), {"user_id": user_id}).rowcount
+
+
+def sync_bitmaps_to_table(db: Session, user_id=None) -> int:
+    """Insert every day set in ``checkin_bitmaps`` into ``checkins``."""
+    where = "WHERE days.user_id = :user_id" if user_id is not None else ""
+    sql = f"""
+        INSERT INTO checkins (id, user_id, date)
+        SELECT gen_random_uuid(), days.user_id, days.date
+        FROM ({DAYS_SQL['bitmap']}) AS days
+        {where}
+        ON CONFLICT (user_id, date) DO NOTHING
+    """
+    return db.execute(text(sql), {"user_id": user_id}).rowcount
@@ -0,0 +1,131 @@
+"""Filtered, sorted and keyset-paginated goal listing.
+
+Every sort is ``(key, id)`` so it is total, and each one is served by a
+composite index on ``(user_id, key, id)`` (see migration 202610181400).
+A page continues strictly after the ``(key, id)`` of the previous page's
+last row, so deep pages cost the same as the first one.
+
+Deadlines are nullable and sort last in both directions. NULL never
+satisfies a row comparison, so goals with and without a deadline are read
+as two consecutive index ranges instead of one ``OR`` condition.
+"""
+
+import operator
+import uuid
+from datetime import date as date_type
+from typing import Any, Dict, List, Optional, Tuple
+
+from fastapi import HTTPException, status
+from sqlalchemy import tuple_
+from sqlalchemy.orm import Query, Session
+
+from app.core.pagination import decode_cursor, encode_cursor
+from app.models.goal import Goal
+
+# sort -> (key, descending, nullable)
+SORTS = {
+    "name_asc": (Goal.name, False, False),
+    "progress_desc": (Goal.current / Goal.target, True, False),
+    "deadline_asc": (Goal.deadline, False, True),
+    "deadline_desc": (Goal.deadline, True, True),
+}
+DEFAULT_SORT = "deadline_asc"
+
+
+def build_query(db: Session, columns, user_id, status_filter: Optional[str], color: Optional[str], today: date_type) -> Query:
+    query = db.query(*columns).filter(Goal.user_id == user_id)
+
+    if status_filter == "completed":
+        query = query.filter(Goal.completed_at.isnot(None))
+    elif status_filter == "active":
+        query = query.filter(Goal.completed_at.is_(None))
+    elif status_filter == "overdue":
+        query = query.filter(
+            Goal.completed_at.is_(None),
+            Goal.deadline.isnot(None),
+            Goal.deadline < today,
+        )
+
+    if color:
+        query = query.filter(Goal.color == color.upper())
+    return query
+
+
+def _ordered(query: Query, key, descending: bool) -> Query:
+    if descending:
+        return query.order_by(key.desc(), Goal.id.desc())
+    return query.order_by(key.asc(), Goal.id.asc())
+
+
+def _decode_after(after: str, sort: str) -> Tuple[Any, uuid.UUID]:
+    state = decode_cursor(after)
+    try:
+        value = state["v"]
+        if value is not None and sort.startswith("deadline"):
+            value = date_type.fromisoformat(value)
+        elif value is not None and sort == "progress_desc":
+            value = float(value)
+        if state["s"] != sort:
+            raise ValueError("cursor belongs to another sort")
+        return value, uuid.UUID(state["i"])
+    except (KeyError, TypeError, ValueError):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor")
+
+
+def segments(query: Query, sort: str, after: Optional[str] = None) -> List[Query]:
+    """Ordered queries whose concatenated results are the listing after ``after``."""
+    key, descending, nullable = SORTS[sort]
+    after_id_cmp = operator.lt if descending else operator.gt
+    after_value, after_id = _decode_after(after, sort) if after else (None, None)
+
+    parts = []
+    if not after or after_value is not None:
+        with_key = query.filter(key.isnot(None)) if nullable else query
+        if after:
+            with_key = with_key.filter(after_id_cmp(tuple_(key, Goal.id), tuple_(after_value, after_id)))
+        parts.append(_ordered(with_key, key, descending))
+    if nullable:
+        without_key = query.filter(key.is_(None))
+        if after and after_value is None:
+            without_key = without_key.filter(after_id_cmp(Goal.id, after_id))
+        parts.append(_ordered(without_key, key, descending))
+    return parts
+
+
+def list_goals(
+    db: Session,
+    columns,
+    user_id,
+    status_filter: Optional[str] = None,
+    color: Optional[str] = None,
+    sort: str = DEFAULT_SORT,
+    today: Optional[date_type] = None,
+    limit: Optional[int] = None,
+    after: Optional[str] = None,
+) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+    """Return ``(rows, next_cursor)``; without ``limit`` every goal is returned."""
+    if sort not in SORTS:
+        sort = DEFAULT_SORT
+    key = SORTS[sort][0]
+    query = build_query(db, (*columns, key.label("sort_key")), user_id, status_filter, color, today or date_type.today())
+
+    rows = []
+    for part in segments(query, sort, after):
+        if limit is not None:
+            part = part.limit(limit + 1 - len(rows))
+        rows.extend(part.all())
+        if limit is not None and len(rows) > limit:
+            break
+
+    next_cursor = None
+    if limit is not None and len(rows) > limit:
+        rows = rows[:limit]
+        last = rows[-1]
+        next_cursor = encode_cursor({"s": sort, "v": last.sort_key, "i": last.id})
+
+    items = []
+    for row in rows:
+        item = row._asdict()
+        del item["sort_key"]
+        items.append(item)
+    return items, next_cursor
@@ -0,0 +1,108 @@
+"""Goal history reads backed by the stored ``after`` snapshots.
+
+Every history row stores the goal's value right after it was applied, so
+neither a history page nor a point-in-time lookup needs to re-accumulate
+deltas. Pages are ordered by ``(date, created_at, id)`` and paginated by
+keyset on that key; each request is an index range scan of ``limit`` rows
+no matter how long the history is.
+"""
+
+import uuid
+from datetime import date as date_type, datetime
+from typing import Any, Dict, Optional
+
+from fastapi import HTTPException, status
+from sqlalchemy import tuple_
+from sqlalchemy.orm import Session
+
+from app.core.pagination import decode_cursor, encode_cursor
+from app.models.goal import Goal
+from app.models.goal_history import GoalHistory
+
+ORDER = (GoalHistory.date, GoalHistory.created_at, GoalHistory.id)
+
+
+def _pct(value: float, target: float) -> int:
+    return int((min(value, target) / target) * 100) if target > 0 else 0
+
+
+def _cursor_key(cursor: str):
+    state = decode_cursor(cursor)
+    try:
+        return (
+            date_type.fromisoformat(state["d"]),
+            datetime.fromisoformat(state["c"]),
+            uuid.UUID(state["i"]),
+        )
+    except (KeyError, TypeError, ValueError):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor")
+
+
+def initial_value(db: Session, goal: Goal) -> float:
+    """Goal value before its first history entry."""
+    first = (
+        db.query(GoalHistory.after, GoalHistory.delta)
+        .filter(GoalHistory.goal_id == goal.id)
+        .order_by(*ORDER)
+        .first()
+    )
+    if first is None:
+        return goal.current
+    return max(0.0, first.after - first.delta)
+
+
+def history_page(
+    db: Session,
+    goal: Goal,
+    limit: int,
+    cursor: Optional[str] = None,
+    date_from: Optional[date_type] = None,
+    date_to: Optional[date_type] = None,
+) -> Dict[str, Any]:
+    query = db.query(
+        GoalHistory.date,
+        GoalHistory.created_at,
+        GoalHistory.id,
+        GoalHistory.delta,
+        GoalHistory.note,
+        GoalHistory.after,
+    ).filter(GoalHistory.goal_id == goal.id)
+    if cursor:
+        query = query.filter(tuple_(*ORDER) > tuple_(*_cursor_key(cursor)))
+    if date_from:
+        query = query.filter(GoalHistory.date >= date_from)
+    if date_to:
+        query = query.filter(GoalHistory.date <= date_to)
+    entries = query.order_by(*ORDER).limit(limit + 1).all()
+
+    next_cursor = None
+    if len(entries) > limit:
+        entries = entries[:limit]
+        last = entries[-1]
+        next_cursor = encode_cursor({"d": last.date, "c": last.created_at.isoformat(), "i": last.id})
+
+    rows = [
+        {
+            "date": entry.date,
+            "delta": entry.delta,
+            "note": entry.note,
+            "after": entry.after,
+            "pct": _pct(entry.after, goal.target),
+        }
+        for entry in entries
+    ]
+    return {"initial": initial_value(db, goal), "rows": rows, "next_cursor": next_cursor}
+
+
+def progress_at(db: Session, goal: Goal, day: date_type) -> Dict[str, Any]:
+    """Goal value at the end of ``day``: the latest snapshot on or before it."""
+    value = (
+        db.query(GoalHistory.after)
+        .filter(GoalHistory.goal_id == goal.id, GoalHistory.date <= day)
+        .order_by(*(column.desc() for column in ORDER))
+        .limit(1)
+        .scalar()
+    )
+    if value is None:
+        value = initial_value(db, goal)
+    return {"date": day, "current": value, "pct": _pct(value, goal.target)}
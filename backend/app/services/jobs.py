@@ -0,0 +1,192 @@
+"""Postgres-backed job queue.
+
+Jobs are rows in ``jobs``. ``enqueue`` adds one inside the caller's
+transaction, so a job only becomes visible once the work that asked for it
+commits. Workers (``python -m app.worker``) claim due jobs with
+``SELECT ... FOR UPDATE SKIP LOCKED``: any number of worker processes can
+poll the table without ever handing out the same job twice.
+
+A failed job goes back to ``queued`` with ``run_at`` pushed out
+exponentially (``JOB_BACKOFF_BASE`` doubling per attempt, capped at
+``JOB_BACKOFF_MAX``, +-20% jitter) until ``max_attempts`` is reached, then
+stays ``failed``. Jobs left ``running`` by a worker that died are requeued
+after ``JOB_LOCK_TIMEOUT`` seconds. Finished jobs are deleted after
+``JOB_RETENTION_DAYS``.
+"""
+
+import os
+import random
+from datetime import datetime, timedelta, timezone
+from typing import Any, Callable, Dict, List, NamedTuple, Optional
+
+from sqlalchemy import case, delete, func, select, text, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.engine import Row
+from sqlalchemy.orm import Session
+
+from app.models.job import Job
+
+JOB_MAX_ATTEMPTS = int(os.getenv("JOB_MAX_ATTEMPTS", "5"))
+JOB_BACKOFF_BASE = float(os.getenv("JOB_BACKOFF_BASE", "10"))
+JOB_BACKOFF_MAX = float(os.getenv("JOB_BACKOFF_MAX", "3600"))
+JOB_LOCK_TIMEOUT = float(os.getenv("JOB_LOCK_TIMEOUT", "600"))
+JOB_RETENTION_DAYS = int(os.getenv("JOB_RETENTION_DAYS", "7"))
+
+# Workers LISTEN here to pick up new jobs without waiting for the next poll
+NOTIFY_CHANNEL = "jobs"
+
+Handler = Callable[[Session, Dict[str, Any]], Any]
+HANDLERS: Dict[str, Handler] = {}
+
+
+def handler(kind: str) -> Callable[[Handler], Handler]:
+    """Register ``fn(db, payload)`` as the handler for ``kind`` jobs."""
+
+    def register(fn: Handler) -> Handler:
+        HANDLERS[kind] = fn
+        return fn
+
+    return register
+
+
+class Periodic(NamedTuple):
+    """A job enqueued once per ``every``, at ``offset`` into each period (UTC)."""
+
+    kind: str
+    every: timedelta
+    offset: timedelta = timedelta(0)
+    payload: Optional[Dict[str, Any]] = None
+
+
+def enqueue(
+    db: Session,
+    kind: str,
+    payload: Optional[Dict[str, Any]] = None,
+    run_at: Optional[datetime] = None,
+    max_attempts: Optional[int] = None,
+    dedupe_key: Optional[str] = None,
+) -> bool:
+    """Add a job in the current transaction.
+
+    Returns False when a job with ``dedupe_key`` already exists.
+    """
+    values: Dict[str, Any] = {
+        "kind": kind,
+        "payload": payload or {},
+        "max_attempts": max_attempts or JOB_MAX_ATTEMPTS,
+        "dedupe_key": dedupe_key,
+    }
+    if run_at is not None:
+        values["run_at"] = run_at
+    inserted = db.execute(
+        pg_insert(Job).values(**values).on_conflict_do_nothing(index_elements=["dedupe_key"]).returning(Job.id)
+    ).first()
+    if inserted is None:
+        return False
+    if run_at is None or run_at <= datetime.now(timezone.utc):
+        # Delivered on commit, dropped on rollback
+        db.execute(text("SELECT pg_notify(:channel, :kind)"), {"channel": NOTIFY_CHANNEL, "kind": kind})
+    return True
+
+
+def claim(db: Session, worker_id: str, limit: int) -> List[Row]:
+    """Mark up to ``limit`` due jobs as running for ``worker_id``.
+
+    The caller commits, which releases the row locks; the jobs stay
+    reserved through their ``running`` status.
+    """
+    due = (
+        select(Job.id)
+        .where(Job.status == "queued", Job.run_at <= func.now())
+        .order_by(Job.run_at)
+        .limit(limit)
+        .with_for_update(skip_locked=True)
+        .cte("due")
+    )
+    return db.execute(
+        update(Job)
+        .where(Job.id == due.c.id)
+        .values(status="running", attempts=Job.attempts + 1, locked_by=worker_id, locked_at=func.now())
+        .returning(Job.id, Job.kind, Job.payload, Job.attempts, Job.max_attempts)
+    ).all()
+
+
+def _owned(job: Row):
+    # A job requeued after JOB_LOCK_TIMEOUT and claimed again has a higher
+    # attempt count, so a late finish from the first worker is ignored.
+    return (Job.id == job.id, Job.status == "running", Job.attempts == job.attempts)
+
+
+def complete(db: Session, job: Row) -> None:
+    db.execute(
+        update(Job)
+        .where(*_owned(job))
+        .values(status="done", locked_by=None, locked_at=None, last_error=None, finished_at=func.now())
+    )
+
+
+def backoff(attempts: int) -> float:
+    """Seconds to wait before retrying a job that failed ``attempts`` times."""
+    delay = min(JOB_BACKOFF_MAX, JOB_BACKOFF_BASE * 2 ** (attempts - 1))
+    return delay * random.uniform(0.8, 1.2)
+
+
+def fail(db: Session, job: Row, error: str) -> bool:
+    """Schedule a retry, or mark the job failed; returns True if it will retry."""
+    retry = job.attempts < job.max_attempts
+    if retry:
+        values = {
+            "status": "queued",
+            "run_at": func.now() + timedelta(seconds=backoff(job.attempts)),
+        }
+    else:
+        values = {"status": "failed", "finished_at": func.now()}
+    db.execute(
+        update(Job).where(*_owned(job)).values(locked_by=None, locked_at=None, last_error=error[:4000], **values)
+    )
+    return retry
+
+
+def requeue_stale(db: Session) -> int:
+    """Release jobs running for longer than ``JOB_LOCK_TIMEOUT`` (their
+    worker most likely died)."""
+    stale = Job.locked_at < func.now() - timedelta(seconds=JOB_LOCK_TIMEOUT)
+    result = db.execute(
+        update(Job)
+        .where(Job.status == "running", stale)
+        .values(
+            status=case((Job.attempts >= Job.max_attempts, "failed"), else_="queued"),
+            finished_at=case((Job.attempts >= Job.max_attempts, func.now()), else_=None),
+            last_error="worker stopped before finishing the job",
+            locked_by=None,
+            locked_at=None,
+        )
+    )
+    return result.rowcount
+
+
+def prune(db: Session) -> int:
+    """Delete finished jobs older than ``JOB_RETENTION_DAYS``."""
+    cutoff = func.now() - timedelta(days=JOB_RETENTION_DAYS)
+    return db.execute(
+        delete(Job).where(Job.status.in_(("done", "failed")), Job.finished_at < cutoff)
+    ).rowcount
+
+
+def schedule_periodic(db: Session, schedules: List[Periodic], now: Optional[datetime] = None) -> int:
+    """Enqueue the current period's run of each schedule (once, whichever
+    worker gets there first); returns how many were new."""
+    now = now or datetime.now(timezone.utc)
+    epoch = datetime(1970, 1, 1, tzinfo=timezone.utc)
+    added = 0
+    for schedule in schedules:
+        periods = (now - epoch - schedule.offset) // schedule.every
+        slot = epoch + schedule.offset + periods * schedule.every
+        added += enqueue(
+            db,
+            schedule.kind,
+            schedule.payload,
+            run_at=slot,
+            dedupe_key=f"{schedule.kind}@{slot.isoformat()}",
+        )
+    return added
@@ -0,0 +1,237 @@
+"""Single-statement goal mutations.
+
+Each mutation is one ``WITH ... UPDATE ... RETURNING`` statement that
+updates the goal atomically in the database (no read-modify-write in
+Python), appends the history row and upserts today's check-in. Concurrent
+progress taps from the web app and Telegram therefore never lose updates.
+The follow-up ``user_stats`` bookkeeping only runs when a goal is newly
+completed or the user's first check-in of the day was inserted, and it
+shares the same transaction.
+"""
+
+import uuid
+from datetime import date as date_type, datetime, timedelta, timezone
+from typing import Any, Dict, List, Optional, Tuple
+
+from sqlalchemy import Date, Float, String, and_, case, cast, exists, func, literal, select, text, update
+from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy.engine import Row
+from sqlalchemy.orm import Session
+
+from app.models.goal import CURRENT_XID, Goal
+from app.models.goal_history import GoalHistory
+from app.services import checkins, streaks, user_stats
+
+COMPLETED_NOTE = "Отмечено как выполненное"
+MANUAL_NOTE = "Значение изменено вручную"
+
+
+def _uuid():
+    return literal(uuid.uuid4(), UUID(as_uuid=True))
+
+
+def _locked_goal(goal_id, user_id):
+    """CTE locking the goal row, exposing its values before the update."""
+    return (
+        select(
+            Goal.id,
+            Goal.current,
+            Goal.completed_at,
+            (cast(Goal.completed_at, Date) - cast(Goal.created_at, Date)).label("days_to_complete"),
+        )
+        .where(Goal.id == goal_id, Goal.user_id == user_id)
+        .with_for_update()
+        .cte("old")
+    )
+
+
+def _history_cte(goal_cte, today: date_type, delta, note: Optional[str], where=None):
+    """CTE appending a history row that snapshots the goal's new ``current``."""
+    query = select(
+        _uuid(),
+        goal_cte.c.id,
+        literal(today, Date),
+        delta,
+        goal_cte.c.current,
+        literal(note, String),
+    )
+    if where is not None:
+        query = query.where(where)
+    columns = ["id", "goal_id", "date", "delta", "after", "note"]
+    return GoalHistory.__table__.insert().from_select(columns, query).cte("h")
+
+
+def create_checkin(db: Session, user_id, today: date_type) -> None:
+    """Record today's checkin in the current transaction."""
+    if checkins.record(db, user_id, today):
+        streaks.record_checkin(db, user_id, today)
+
+
+def _finish(db: Session, row: Optional[Row], today: date_type) -> Optional[Dict[str, Any]]:
+    """Apply summary bookkeeping for the mutated goal and commit."""
+    if row is None:
+        db.rollback()
+        return None
+
+    if row.completed_at is not None and row.completed_at != row.previous_completed_at:
+        # Newly completed, or completed again with a new timestamp
+        user_stats.record_goal_completed(db, row, row.previous_days)
+    if row.checked_in:
+        streaks.record_checkin(db, row.user_id, today)
+
+    db.commit()
+    return dict(row._mapping)
+
+
+def apply_progress(db: Session, user_id, goal_id, delta: float, note: Optional[str], today: date_type):
+    """``current = GREATEST(0, current + delta)``; returns the goal or None."""
+    old = _locked_goal(goal_id, user_id)
+    new_current = func.greatest(0, Goal.current + literal(delta, Float))
+    goal = (
+        update(Goal)
+        .where(Goal.id == old.c.id)
+        .values(
+            current=new_current,
+            completed_at=case(
+                (and_(Goal.completed_at.is_(None), new_current >= Goal.target), func.now()),
+                else_=Goal.completed_at,
+            ),
+        )
+        .returning(
+            *Goal.__table__.c,
+            old.c.completed_at.label("previous_completed_at"),
+            old.c.days_to_complete.label("previous_days"),
+        )
+        .cte("g")
+    )
+    history = _history_cte(goal, today, literal(delta, Float), note)
+    checkin = checkins.record_cte(goal.c.user_id, today)
+
+    stmt = select(goal, exists(select(checkin)).label("checked_in")).add_cte(history)
+    return _finish(db, db.execute(stmt).first(), today)
+
+
+def apply_complete(db: Session, user_id, goal_id, today: date_type):
+    """Set ``current = target`` and stamp ``completed_at``."""
+    old = _locked_goal(goal_id, user_id)
+    goal = (
+        update(Goal)
+        .where(Goal.id == old.c.id)
+        .values(current=Goal.target, completed_at=func.now())
+        .returning(
+            *Goal.__table__.c,
+            (Goal.target - old.c.current).label("delta"),
+            old.c.completed_at.label("previous_completed_at"),
+            old.c.days_to_complete.label("previous_days"),
+        )
+        .cte("g")
+    )
+    history = _history_cte(goal, today, goal.c.delta, COMPLETED_NOTE, where=goal.c.delta != 0)
+    checkin = checkins.record_cte(goal.c.user_id, today)
+
+    stmt = select(goal, exists(select(checkin)).label("checked_in")).add_cte(history)
+    return _finish(db, db.execute(stmt).first(), today)
+
+
+def apply_update(db: Session, user_id, goal_id, values: Dict[str, Any], today: date_type):
+    """Update goal fields; returns the goal or None."""
+    old = _locked_goal(goal_id, user_id)
+    statement = update(Goal).where(Goal.id == old.c.id)
+    if values:
+        statement = statement.values(**values)
+    else:
+        # Nothing to change, but still lock the row and return it
+        statement = statement.values(id=Goal.id)
+    goal = statement.returning(
+        *Goal.__table__.c,
+        (Goal.current - old.c.current).label("delta"),
+        old.c.completed_at.label("previous_completed_at"),
+        old.c.days_to_complete.label("previous_days"),
+    ).cte("g")
+    checkin = checkins.record_cte(goal.c.user_id, today)
+
+    stmt = select(goal, exists(select(checkin)).label("checked_in"))
+    if "current" in values:
+        # Keep history snapshots in line with a directly edited value
+        stmt = stmt.add_cte(_history_cte(goal, today, goal.c.delta, MANUAL_NOTE, where=goal.c.delta != 0))
+    return _finish(db, db.execute(stmt).first(), today)
+
+
+def _as_utc(timestamp: Optional[datetime]) -> Optional[datetime]:
+    """``timestamp`` as an aware datetime; naive values are taken as UTC."""
+    if timestamp is None or timestamp.tzinfo is not None:
+        return timestamp
+    return timestamp.replace(tzinfo=timezone.utc)
+
+
+def apply_progress_batch(db: Session, user_id, items: List[Any], today: date_type) -> Tuple[List[Dict[str, Any]], List[Goal]]:
+    """Apply many progress deltas in one transaction.
+
+    Ownership is checked and every touched goal locked with a single
+    ``SELECT ... FOR UPDATE``; items are then applied in ``client_timestamp``
+    order (request order for ties, untimestamped items last) and written
+    with batched statements.
+    Returns per-item results in request order and the updated goals.
+    """
+    goal_ids = sorted({item.goal_id for item in items})
+    # The database's now(), like the other write paths, so batch and single
+    # writes order consistently whatever the API host's clock says
+    rows = (
+        db.query(Goal, func.now())
+        .filter(Goal.id.in_(goal_ids), Goal.user_id == user_id)
+        .order_by(Goal.id)
+        .with_for_update()
+        .all()
+    )
+    goals = {goal.id: goal for goal, _ in rows}
+    now = rows[0][1] if rows else None
+
+    results: List[Optional[Dict[str, Any]]] = [None] * len(items)
+    newly_completed = []
+    order = sorted(
+        range(len(items)),
+        key=lambda i: (items[i].client_timestamp is None, _as_utc(items[i].client_timestamp), i),
+    )
+    applied = 0
+    for index in order:
+        item = items[index]
+        goal = goals.get(item.goal_id)
+        if goal is None:
+            results[index] = {"goal_id": item.goal_id, "status": "not_found"}
+            continue
+
+        goal.current = max(0, goal.current + item.delta)
+        if goal.completed_at is None and goal.current >= goal.target:
+            goal.completed_at = now
+            newly_completed.append(goal)
+        # Bumped even when ``current`` is unchanged (zero or clamped delta)
+        # so the new history row changes the goal's ETag
+        goal.change_xid = text(CURRENT_XID)
+        # One transaction shares one now(); spacing the rows keeps history
+        # ordered by ``created_at`` in the order they were applied
+        db.add(
+            GoalHistory(
+                goal_id=goal.id,
+                date=today,
+                delta=item.delta,
+                after=goal.current,
+                note=item.note,
+                created_at=now + timedelta(microseconds=applied),
+            )
+        )
+        applied += 1
+        results[index] = {"goal_id": item.goal_id, "status": "applied", "after": goal.current}
+
+    if not goals:
+        db.rollback()
+        return results, []
+
+    db.flush()
+    for goal in newly_completed:
+        user_stats.record_goal_completed(db, goal)
+    create_checkin(db, user_id, today)
+    db.commit()
+
+    # Reload everything touched in one query instead of a refresh per goal
+    updated = db.query(Goal).filter(Goal.id.in_(list(goals))).order_by(Goal.id).all()
+    return results, updated
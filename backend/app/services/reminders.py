@@ -0,0 +1,103 @@
+"""Set-based discovery of Telegram reminders.
+
+Each finder is a single ``INSERT ... SELECT`` into ``notifications`` for
+every Telegram-linked user it applies to. ``dedupe_key`` makes re-running a
+finder for the same day a no-op, so the periodic jobs may safely retry.
+Delivery is done by ``app.services.telegram_dispatch``.
+"""
+
+from datetime import date as date_type, timedelta
+
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+# Streaks shorter than this are not worth a "streak broken" message
+STREAK_REMINDER_MIN_DAYS = 3
+
+OVERDUE_SQL = """
+INSERT INTO notifications (id, user_id, chat_id, kind, dedupe_key, text)
+SELECT
+    gen_random_uuid(),
+    u.id,
+    u.telegram_id,
+    'overdue',
+    'overdue:' || u.id || ':' || :today,
+    'Вчера истёк срок: ' || string_agg('«' || g.name || '»', ', ' ORDER BY g.name)
+        || '. Отметьте прогресс или перенесите дедлайн.'
+FROM goals g
+JOIN users u ON u.id = g.user_id
+WHERE g.deadline = :yesterday
+  AND g.completed_at IS NULL
+  AND u.telegram_id IS NOT NULL
+GROUP BY u.id, u.telegram_id
+ON CONFLICT (dedupe_key) DO NOTHING
+"""
+
+# Nothing checked in yesterday, so the run that ended the day before is over
+BROKEN_STREAK_SQL = """
+INSERT INTO notifications (id, user_id, chat_id, kind, dedupe_key, text)
+SELECT
+    gen_random_uuid(),
+    u.id,
+    u.telegram_id,
+    'streak',
+    'streak:' || u.id || ':' || s.last_checkin_date,
+    format(
+        'Серия из %s дн. прервалась. Отметьте прогресс сегодня, чтобы начать новую.',
+        s.last_checkin_date - s.current_streak_start + 1
+    )
+FROM user_stats s
+JOIN users u ON u.id = s.user_id
+WHERE s.last_checkin_date = :day_before_yesterday
+  AND s.last_checkin_date - s.current_streak_start + 1 >= :min_days
+  AND u.telegram_id IS NOT NULL
+ON CONFLICT (dedupe_key) DO NOTHING
+"""
+
+DIGEST_SQL = """
+INSERT INTO notifications (id, user_id, chat_id, kind, dedupe_key, text)
+SELECT
+    gen_random_uuid(),
+    u.id,
+    u.telegram_id,
+    'digest',
+    'digest:' || u.id || ':' || :today,
+    format(
+        'Сводка на %s: активных целей — %s, из них просрочено — %s. Текущая серия — %s дн.',
+        to_char(CAST(:today AS date), 'DD.MM.YYYY'),
+        g.active,
+        g.overdue,
+        CASE
+            WHEN s.last_checkin_date >= CAST(:today AS date) - 1
+            THEN s.last_checkin_date - s.current_streak_start + 1
+            ELSE 0
+        END
+    )
+FROM users u
+JOIN (
+    SELECT user_id, count(*) AS active, count(*) FILTER (WHERE deadline < :today) AS overdue
+    FROM goals
+    WHERE completed_at IS NULL
+    GROUP BY user_id
+) g ON g.user_id = u.id
+LEFT JOIN user_stats s ON s.user_id = u.id
+WHERE u.telegram_id IS NOT NULL
+ON CONFLICT (dedupe_key) DO NOTHING
+"""
+
+
+def queue_overdue(db: Session, today: date_type) -> int:
+    """One message per user listing goals whose deadline was yesterday."""
+    params = {"today": today, "yesterday": today - timedelta(days=1)}
+    return db.execute(text(OVERDUE_SQL), params).rowcount
+
+
+def queue_broken_streaks(db: Session, today: date_type) -> int:
+    """Tell users whose streak ended because they skipped yesterday."""
+    params = {"day_before_yesterday": today - timedelta(days=2), "min_days": STREAK_REMINDER_MIN_DAYS}
+    return db.execute(text(BROKEN_STREAK_SQL), params).rowcount
+
+
+def queue_digests(db: Session, today: date_type) -> int:
+    """Daily summary for every user with at least one active goal."""
+    return db.execute(text(DIGEST_SQL), {"today": today}).rowcount
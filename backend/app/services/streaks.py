@@ -0,0 +1,124 @@
+"""Per-user check-in streak index stored on ``user_stats``.
+
+The index keeps the start of the latest run of consecutive check-in days,
+the last check-in date and the longest run seen so far. Appending today's
+check-in only needs those three values, so it is O(1) regardless of how
+long the user's history is.
+"""
+
+from datetime import date as date_type, timedelta
+from typing import Any, Optional, Tuple
+
+from sqlalchemy import case, func, text
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.orm import Session
+
+from app.models.user_stats import UserStats
+from app.schemas.stats import Streaks
+from app.services import checkins
+
+
+REBUILD_SQL = """
+WITH days AS (
+    SELECT
+        user_id,
+        date,
+        date - (row_number() OVER (PARTITION BY user_id ORDER BY date))::int AS run_key
+    FROM ({days}) AS checkin_days
+    {where}
+), runs AS (
+    SELECT user_id, min(date) AS run_start, max(date) AS run_end, count(*) AS run_length
+    FROM days
+    GROUP BY user_id, run_key
+), latest AS (
+    SELECT DISTINCT ON (user_id)
+        user_id,
+        run_start,
+        run_end,
+        max(run_length) OVER (PARTITION BY user_id) AS longest
+    FROM runs
+    ORDER BY user_id, run_end DESC
+)
+UPDATE user_stats s SET
+    current_streak_start = latest.run_start,
+    last_checkin_date = latest.run_end,
+    longest_streak = COALESCE(latest.longest, 0)
+FROM user_stats target
+LEFT JOIN latest ON latest.user_id = target.user_id
+WHERE s.user_id = target.user_id
+{target_where}
+"""
+
+
+def id_range_filter(column: str) -> str:
+    """SQL condition for ``:after < column <= :until``; a None bound is open."""
+    return (
+        f"(CAST(:after AS uuid) IS NULL OR {column} > CAST(:after AS uuid))"
+        f" AND (CAST(:until AS uuid) IS NULL OR {column} <= CAST(:until AS uuid))"
+    )
+
+
+def rebuild_streaks(
+    db: Session, user_id=None, storage: Optional[str] = None, id_range: Optional[Tuple[Any, Any]] = None
+) -> int:
+    """Recompute the streak index from the check-in storage, for one user,
+    the users in an ``(after, until]`` id range, or everyone."""
+    days = checkins.DAYS_SQL[storage or checkins.CHECKIN_STORAGE]
+    if user_id is not None:
+        sql = REBUILD_SQL.format(
+            days=days,
+            where="WHERE user_id = :user_id",
+            target_where="AND target.user_id = :user_id",
+        )
+        params = {"user_id": user_id}
+    elif id_range is not None:
+        sql = REBUILD_SQL.format(
+            days=days,
+            where=f"WHERE {id_range_filter('user_id')}",
+            target_where=f"AND {id_range_filter('target.user_id')}",
+        )
+        params = {"after": id_range[0], "until": id_range[1]}
+    else:
+        sql = REBUILD_SQL.format(days=days, where="", target_where="")
+        params = {}
+    return db.execute(text(sql), params).rowcount
+
+
+def record_checkin(db: Session, user_id, day: date_type) -> None:
+    """Extend the streak index with a newly inserted check-in for ``day``."""
+    continues_run = UserStats.last_checkin_date == day - timedelta(days=1)
+    run_length = case(
+        (continues_run, day - UserStats.current_streak_start + 1),
+        else_=1,
+    )
+
+    result = db.execute(
+        pg_insert(UserStats)
+        .values(user_id=user_id, current_streak_start=day, last_checkin_date=day, longest_streak=1)
+        .on_conflict_do_update(
+            index_elements=[UserStats.user_id],
+            set_={
+                "current_streak_start": case(
+                    (continues_run, UserStats.current_streak_start),
+                    else_=day,
+                ),
+                "last_checkin_date": day,
+                "longest_streak": func.greatest(UserStats.longest_streak, run_length),
+            },
+            where=UserStats.last_checkin_date.is_(None) | (UserStats.last_checkin_date < day),
+        )
+    )
+
+    if result.rowcount == 0:
+        # Out-of-order check-in (older than the last one): fall back to a
+        # full recompute for this user.
+        rebuild_streaks(db, user_id)
+
+
+def current_streaks(stats: UserStats, today: date_type) -> Streaks:
+    """Read streaks from the index. The current streak only counts if the
+    user has checked in today."""
+    current = 0
+    if stats.last_checkin_date == today and stats.current_streak_start is not None:
+        current = (today - stats.current_streak_start).days + 1
+    return Streaks(current=current, longest=stats.longest_streak)
@@ -0,0 +1,285 @@
+"""Delivery of queued notifications through the Telegram Bot API.
+
+``dispatch()`` drains the ``notifications`` outbox with an asyncio
+pipeline:
+
+* a claimer moves due ``pending`` rows to ``sending`` in batches
+  (``FOR UPDATE SKIP LOCKED``) and feeds a bounded queue;
+* ``TELEGRAM_SENDERS`` sender tasks take messages off the queue, wait until
+  the chat may receive another one (``TELEGRAM_CHAT_RATE`` messages per
+  second) and then for the bot-wide token bucket
+  (``TELEGRAM_GLOBAL_RATE``), and call ``sendMessage``;
+* results are written back in batches, one ``UPDATE ... FROM unnest(...)``
+  per flush.
+
+A 429 holds the chat back for ``retry_after`` and the message is
+retried in place (long pauses are rescheduled instead). Network errors and
+5xx responses are retried later with backoff up to ``NOTIFY_MAX_ATTEMPTS``;
+a chat that blocked the bot or no longer exists fails the message at once.
+
+Only one dispatcher runs at a time (a Postgres advisory lock), which is
+what makes the global bucket global. ``TELEGRAM_API_URL`` points the bot at
+another Bot API server, e.g. the fake one used by the benchmarks.
+"""
+
+import asyncio
+import logging
+import os
+import time
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncEngine, create_async_engine
+from telegram import Bot
+from telegram.error import BadRequest, Forbidden, RetryAfter, TelegramError
+from telegram.request import HTTPXRequest
+
+from app.core.pool import engine_options
+from app.database import ASYNC_DATABASE_URL
+
+TELEGRAM_BOT_TOKEN = os.getenv("TELEGRAM_BOT_TOKEN")
+TELEGRAM_API_URL = os.getenv("TELEGRAM_API_URL", "https://api.telegram.org").rstrip("/")
+TELEGRAM_GLOBAL_RATE = float(os.getenv("TELEGRAM_GLOBAL_RATE", "30"))
+TELEGRAM_CHAT_RATE = float(os.getenv("TELEGRAM_CHAT_RATE", "1"))
+TELEGRAM_SENDERS = int(os.getenv("TELEGRAM_SENDERS", "64"))
+NOTIFY_MAX_ATTEMPTS = int(os.getenv("NOTIFY_MAX_ATTEMPTS", "5"))
+
+DISPATCH_LOCK_KEY = 0x6E6F7469  # pg_try_advisory_lock key, "noti"
+CLAIM_BATCH = 500
+FLUSH_SIZE = 200
+FLUSH_INTERVAL = 0.5
+# Rows stuck in "sending" this long belonged to a dispatcher that died
+SENDING_TIMEOUT = 300
+# Longer flood waits release the message instead of holding a sender
+MAX_INLINE_RETRY_AFTER = 10
+MAX_INLINE_RETRIES = 3
+
+RESULT_STATS = {"sent": "sent", "failed": "failed", "pending": "retry_later"}
+
+logger = logging.getLogger(__name__)
+
+REQUEUE_SQL = """
+UPDATE notifications
+SET status = 'pending', locked_at = NULL
+WHERE status = 'sending' AND locked_at < now() - make_interval(secs => :timeout)
+"""
+
+CLAIM_SQL = """
+UPDATE notifications n
+SET status = 'sending', locked_at = now(), attempts = n.attempts + 1
+FROM (
+    SELECT id FROM notifications
+    WHERE status = 'pending' AND next_attempt_at <= now()
+    ORDER BY next_attempt_at
+    LIMIT :limit
+    FOR UPDATE SKIP LOCKED
+) due
+WHERE n.id = due.id
+RETURNING n.id, n.chat_id, n.text, n.attempts
+"""
+
+FLUSH_SQL = """
+UPDATE notifications n
+SET
+    status = r.status,
+    sent_at = CASE WHEN r.status = 'sent' THEN now() END,
+    last_error = r.error,
+    locked_at = NULL,
+    next_attempt_at = now() + make_interval(secs => r.delay)
+FROM unnest(
+    CAST(:ids AS uuid[]), CAST(:statuses AS text[]), CAST(:errors AS text[]), CAST(:delays AS float8[])
+) AS r(id, status, error, delay)
+WHERE n.id = r.id
+"""
+
+
+class TokenBucket:
+    """Reservation-based token bucket for one event loop.
+
+    Each ``acquire`` takes a token immediately, letting the balance go
+    negative, and sleeps until its reserved slot; waiters are therefore
+    served in order without polling.
+    """
+
+    def __init__(self, rate: float, capacity: float = 1):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+
+    async def acquire(self) -> None:
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        self.tokens -= 1
+        if self.tokens < 0:
+            await asyncio.sleep(-self.tokens / self.rate)
+
+
+class ChatSlot:
+    __slots__ = ("lock", "next_at")
+
+    def __init__(self):
+        self.lock = asyncio.Lock()
+        self.next_at = 0.0
+
+
+class ChatLimiter:
+    """Keeps messages to one chat ``1 / rate`` seconds apart.
+
+    The interval is counted from when a message actually goes out (after
+    the global bucket), not from when it was queued, and messages to the
+    same chat are sent one at a time.
+    """
+
+    def __init__(self, rate: float, max_chats: int = 10000):
+        self.interval = 1 / rate
+        self.max_chats = max_chats
+        self.slots: Dict[int, ChatSlot] = {}
+
+    def slot(self, chat_id: int) -> ChatSlot:
+        slot = self.slots.get(chat_id)
+        if slot is None:
+            if len(self.slots) >= self.max_chats:
+                now = time.monotonic()
+                self.slots = {
+                    key: value for key, value in self.slots.items() if value.lock.locked() or value.next_at > now
+                }
+            slot = self.slots[chat_id] = ChatSlot()
+        return slot
+
+
+def retry_delay(attempts: int) -> float:
+    return min(3600.0, 30.0 * 2 ** (attempts - 1))
+
+
+class Dispatcher:
+    def __init__(
+        self,
+        bot: Bot,
+        engine: AsyncEngine,
+        global_rate: float = TELEGRAM_GLOBAL_RATE,
+        chat_rate: float = TELEGRAM_CHAT_RATE,
+        senders: int = TELEGRAM_SENDERS,
+    ):
+        self.bot = bot
+        self.engine = engine
+        # No burst allowance: Telegram counts messages per second, not on average
+        self.global_bucket = TokenBucket(global_rate)
+        self.chats = ChatLimiter(chat_rate)
+        self.senders = senders
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=senders * 4)
+        self.results: List[tuple] = []
+        self.stats = {"sent": 0, "failed": 0, "retry_later": 0, "rate_limited": 0}
+
+    async def _claim(self, deadline: float) -> None:
+        while time.monotonic() < deadline:
+            async with self.engine.begin() as conn:
+                rows = (await conn.execute(text(CLAIM_SQL), {"limit": CLAIM_BATCH})).all()
+            if not rows:
+                break
+            for row in rows:
+                await self.queue.put(row)
+        for _ in range(self.senders):
+            await self.queue.put(None)
+
+    async def _send(self, row) -> tuple:
+        slot = self.chats.slot(row.chat_id)
+        inline_retries = 0
+        async with slot.lock:
+            while True:
+                delay = slot.next_at - time.monotonic()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+                await self.global_bucket.acquire()
+                slot.next_at = time.monotonic() + self.chats.interval
+                try:
+                    await self.bot.send_message(row.chat_id, row.text)
+                    return (row.id, "sent", None, 0.0)
+                except RetryAfter as exc:
+                    self.stats["rate_limited"] += 1
+                    retry_after = float(exc.retry_after)
+                    slot.next_at = time.monotonic() + retry_after
+                    if retry_after > MAX_INLINE_RETRY_AFTER or inline_retries >= MAX_INLINE_RETRIES:
+                        return (row.id, "pending", str(exc), retry_after)
+                    inline_retries += 1
+                except (Forbidden, BadRequest) as exc:
+                    # Blocked bot, deleted account or unknown chat: retrying won't help
+                    return (row.id, "failed", str(exc), 0.0)
+                except TelegramError as exc:
+                    if row.attempts >= NOTIFY_MAX_ATTEMPTS:
+                        return (row.id, "failed", str(exc), 0.0)
+                    return (row.id, "pending", str(exc), retry_delay(row.attempts))
+
+    async def _sender(self) -> None:
+        while True:
+            row = await self.queue.get()
+            if row is None:
+                return
+            result = await self._send(row)
+            self.stats[RESULT_STATS[result[1]]] += 1
+            self.results.append(result)
+            if len(self.results) >= FLUSH_SIZE:
+                await self._flush()
+
+    async def _flush(self) -> None:
+        if not self.results:
+            return
+        batch, self.results = self.results, []
+        ids, statuses, errors, delays = zip(*batch)
+        params = {"ids": list(ids), "statuses": list(statuses), "errors": list(errors), "delays": list(delays)}
+        async with self.engine.begin() as conn:
+            await conn.execute(text(FLUSH_SQL), params)
+
+    async def _flush_periodically(self) -> None:
+        while True:
+            await asyncio.sleep(FLUSH_INTERVAL)
+            await self._flush()
+
+    async def run(self, max_seconds: float) -> Dict[str, Any]:
+        started = time.monotonic()
+        async with self.engine.begin() as conn:
+            await conn.execute(text(REQUEUE_SQL), {"timeout": SENDING_TIMEOUT})
+
+        flusher = asyncio.create_task(self._flush_periodically())
+        try:
+            await asyncio.gather(self._claim(started + max_seconds), *(self._sender() for _ in range(self.senders)))
+        finally:
+            flusher.cancel()
+            await self._flush()
+        elapsed = time.monotonic() - started
+        return {**self.stats, "seconds": round(elapsed, 2)}
+
+
+async def dispatch(
+    max_seconds: float = 50,
+    token: Optional[str] = None,
+    api_url: Optional[str] = None,
+    **options,
+) -> Optional[Dict[str, Any]]:
+    """Send due notifications for up to ``max_seconds`` (then stop claiming
+    and finish what is in flight). Returns None if another dispatcher is
+    running or no bot token is configured."""
+    token = token or TELEGRAM_BOT_TOKEN
+    if not token:
+        logger.warning("TELEGRAM_BOT_TOKEN is not set, not sending notifications")
+        return None
+
+    senders = options.get("senders", TELEGRAM_SENDERS)
+    engine = create_async_engine(ASYNC_DATABASE_URL, **engine_options(is_async=True))
+    try:
+        async with engine.connect() as lock_conn:
+            locked = (await lock_conn.execute(text("SELECT pg_try_advisory_lock(:key)"), {"key": DISPATCH_LOCK_KEY})).scalar()
+            await lock_conn.commit()
+            if not locked:
+                return None
+            try:
+                request = HTTPXRequest(connection_pool_size=senders, pool_timeout=30)
+                bot = Bot(token, base_url=f"{api_url or TELEGRAM_API_URL}/bot", request=request)
+                async with bot:
+                    return await Dispatcher(bot, engine, **options).run(max_seconds)
+            finally:
+                await lock_conn.execute(text("SELECT pg_advisory_unlock(:key)"), {"key": DISPATCH_LOCK_KEY})
+                await lock_conn.commit()
+    finally:
+        await engine.dispose()
@@ -0,0 +1,235 @@
+"""Progress updates sent to the bot as chat commands (``/add <goal> <amount>``).
+
+``POST /api/telegram/webhook`` only parses an update and puts the command
+on ``updates``, a bounded in-process queue, so Telegram gets its 200 within
+a millisecond even during bursts. ``UpdateQueue.run`` (started with the
+app) drains the queue in batches of whatever has accumulated:
+
+* one query resolves every sender's Telegram id to a user, one more loads
+  those users' goals, matched by name case-insensitively (active goals
+  first);
+* each user's commands are applied in one
+  ``progress.apply_progress_batch`` transaction, in message order and with
+  the semantics of ``POST /api/goals/{id}/progress`` (``current`` never
+  drops below 0, completion, history, check-in and stats).
+
+A full queue makes the webhook answer 503, which Telegram retries later.
+Commands still queued when the process stops are applied during shutdown
+for up to ``SHUTDOWN_TIMEOUT`` seconds; anything left after that, or lost
+to a crash, is not redelivered.
+
+* ``TELEGRAM_WEBHOOK_SECRET`` - the ``secret_token`` given to setWebhook
+  (``python -m app.commands.set_webhook``); the webhook is disabled
+  without it.
+* ``TELEGRAM_UPDATE_QUEUE_SIZE`` - commands buffered per worker process.
+* ``TELEGRAM_UPDATE_BATCH`` - commands applied per batch at most.
+"""
+
+import asyncio
+import collections
+import logging
+import math
+import os
+import re
+import time
+from datetime import date as date_type, datetime, timezone
+from typing import Any, Counter, Deque, Dict, List, NamedTuple, Optional
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+
+from app.core import response_cache
+from app.core.cache import deferred_deletes
+from app.database import DATABASE_MODE, AsyncSessionLocal, SessionLocal
+from app.models.goal import Goal
+from app.models.user import User
+from app.schemas.goal import ProgressBatchItem
+from app.services import progress
+
+TELEGRAM_WEBHOOK_SECRET = os.getenv("TELEGRAM_WEBHOOK_SECRET")
+TELEGRAM_UPDATE_QUEUE_SIZE = int(os.getenv("TELEGRAM_UPDATE_QUEUE_SIZE", "10000"))
+TELEGRAM_UPDATE_BATCH = int(os.getenv("TELEGRAM_UPDATE_BATCH", "500"))
+
+SHUTDOWN_TIMEOUT = 5.0
+TELEGRAM_NOTE = "Из Telegram"
+# update_ids remembered to drop Telegram's redeliveries
+SEEN_UPDATES = 10000
+LATENCY_SAMPLES = 1000
+# Largest |amount| accepted; bigger ones are typos or abuse (and a long
+# enough digit string parses to inf)
+MAX_AMOUNT = 1_000_000
+
+COMMAND_RE = re.compile(r"^/add(?:@\w+)?\s+(?P<goal>.+?)\s+(?P<amount>[+-]?\d+(?:[.,]\d+)?)\s*$", re.DOTALL)
+
+logger = logging.getLogger(__name__)
+
+
+class BotCommand(NamedTuple):
+    update_id: int
+    telegram_id: int
+    goal_name: str
+    delta: float
+    sent_at: datetime
+    # time.monotonic() when the webhook received it
+    received_at: float
+
+
+def parse_update(update: Dict[str, Any]) -> Optional[BotCommand]:
+    """The ``/add`` command carried by ``update``, or None for anything else.
+
+    Raises ``ValueError`` for an ``/add`` whose amount is not finite or
+    exceeds ``MAX_AMOUNT``.
+    """
+    message = update.get("message")
+    if not isinstance(message, dict) or not isinstance(message.get("text"), str):
+        return None
+    sender = message.get("from") or {}
+    match = COMMAND_RE.match(message["text"])
+    if match is None or "id" not in sender or "update_id" not in update:
+        return None
+    delta = float(match["amount"].replace(",", "."))
+    if not math.isfinite(delta) or abs(delta) > MAX_AMOUNT:
+        raise ValueError(f"amount out of range: {match['amount'][:20]}")
+    return BotCommand(
+        update_id=update["update_id"],
+        telegram_id=sender["id"],
+        goal_name=match["goal"].strip(),
+        delta=delta,
+        sent_at=datetime.fromtimestamp(message.get("date") or time.time(), timezone.utc),
+        received_at=time.monotonic(),
+    )
+
+
+def apply_commands(db: Session, commands: List[BotCommand]) -> Counter[str]:
+    """Apply a batch of commands; returns counts by outcome."""
+    counts: Counter[str] = collections.Counter()
+    users = dict(
+        db.execute(
+            select(User.telegram_id, User.id).where(User.telegram_id.in_({c.telegram_id for c in commands}))
+        ).all()
+    )
+    goal_ids: Dict[tuple, Any] = {}
+    if users:
+        rows = db.execute(
+            select(Goal.user_id, Goal.name, Goal.id)
+            .where(Goal.user_id.in_(users.values()))
+            .order_by(Goal.completed_at.is_not(None), Goal.created_at)
+        ).all()
+        for user_id, name, goal_id in rows:
+            goal_ids.setdefault((user_id, name.casefold()), goal_id)
+    db.rollback()
+
+    items: Dict[Any, List[ProgressBatchItem]] = collections.defaultdict(list)
+    for command in commands:
+        user_id = users.get(command.telegram_id)
+        goal_id = goal_ids.get((user_id, command.goal_name.casefold()))
+        if user_id is None:
+            counts["unknown_user"] += 1
+        elif goal_id is None:
+            counts["unknown_goal"] += 1
+        else:
+            items[user_id].append(
+                ProgressBatchItem(goal_id=goal_id, delta=command.delta, note=TELEGRAM_NOTE, client_timestamp=command.sent_at)
+            )
+
+    today = date_type.today()
+    for user_id, user_items in items.items():
+        try:
+            _, goals = progress.apply_progress_batch(db, user_id, user_items, today)
+        except Exception:
+            db.rollback()
+            logger.exception("could not apply %d Telegram command(s) of user %s", len(user_items), user_id)
+            counts["errors"] += len(user_items)
+            continue
+        if goals:
+            response_cache.invalidate(user_id)
+        counts["applied"] += len(user_items)
+    return counts
+
+
+async def apply_batch(commands: List[BotCommand]) -> Counter[str]:
+    """``apply_commands`` on the connection type the app is running with."""
+    if DATABASE_MODE == "async":
+        # Cache invalidations go out with the async Redis client, not from the loop
+        async with AsyncSessionLocal() as db, deferred_deletes():
+            return await db.run_sync(apply_commands, commands)
+    db = SessionLocal()
+    try:
+        return await run_in_threadpool(apply_commands, db, commands)
+    finally:
+        db.close()
+
+
+class UpdateQueue:
+    def __init__(self, maxsize: int = TELEGRAM_UPDATE_QUEUE_SIZE, batch_size: int = TELEGRAM_UPDATE_BATCH):
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize)
+        self.batch_size = batch_size
+        self.counts: Counter[str] = collections.Counter()
+        self.latencies: Deque[float] = collections.deque(maxlen=LATENCY_SAMPLES)
+        self._seen: Deque[int] = collections.deque(maxlen=SEEN_UPDATES)
+        self._seen_ids = set()
+
+    def offer(self, command: BotCommand) -> bool:
+        """Queue ``command``; False if the queue is full."""
+        if command.update_id in self._seen_ids:
+            self.counts["duplicate"] += 1
+            return True
+        try:
+            self.queue.put_nowait(command)
+        except asyncio.QueueFull:
+            self.counts["rejected"] += 1
+            return False
+        if len(self._seen) == self._seen.maxlen:
+            self._seen_ids.discard(self._seen[0])
+        self._seen.append(command.update_id)
+        self._seen_ids.add(command.update_id)
+        self.counts["queued"] += 1
+        return True
+
+    async def _next_batch(self) -> List[BotCommand]:
+        batch = [await self.queue.get()]
+        while len(batch) < self.batch_size and not self.queue.empty():
+            batch.append(self.queue.get_nowait())
+        return batch
+
+    async def run(self, apply=apply_batch) -> None:
+        """Apply queued commands until cancelled."""
+        while True:
+            batch = await self._next_batch()
+            try:
+                self.counts.update(await apply(batch))
+            except Exception:
+                logger.exception("could not apply %d Telegram command(s)", len(batch))
+                self.counts["errors"] += len(batch)
+            finally:
+                done = time.monotonic()
+                self.latencies.extend(done - command.received_at for command in batch)
+                self.counts["batches"] += 1
+                for _ in batch:
+                    self.queue.task_done()
+
+    async def drain(self, timeout: float = SHUTDOWN_TIMEOUT) -> None:
+        """Wait (up to ``timeout``) until everything queued has been applied."""
+        try:
+            await asyncio.wait_for(self.queue.join(), timeout)
+        except asyncio.TimeoutError:
+            logger.warning("%d Telegram command(s) not applied before shutdown", self.queue.qsize())
+
+    def stats(self) -> Dict[str, Any]:
+        latencies = sorted(self.latencies)
+
+        def ms(fraction: float) -> float:
+            if not latencies:
+                return 0.0
+            return round(latencies[min(len(latencies) - 1, int(fraction * len(latencies)))] * 1000, 1)
+
+        return {
+            "depth": self.queue.qsize(),
+            "capacity": self.queue.maxsize,
+            **self.counts,
+            "latency_ms": {"p50": ms(0.5), "p95": ms(0.95), "max": ms(1.0)},
+        }
+
+
+updates = UpdateQueue()
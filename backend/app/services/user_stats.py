@@ -0,0 +1,209 @@
+"""Incrementally maintained per-user goal statistics.
+
+Every goal write path updates the ``user_stats`` row inside its own
+transaction, so ``GET /api/stats`` can answer from a single row instead of
+loading every goal the user has ever created.
+"""
+
+from typing import Any, List, Optional, Tuple
+
+from sqlalchemy import Date, case, cast, or_, select, text, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.orm import Session
+
+from app.models.goal import Goal
+from app.models.user_stats import UserStats
+from app.services.streaks import id_range_filter, rebuild_streaks
+
+
+REBUILD_SQL = """
+INSERT INTO user_stats (
+    user_id, total_goals, completed_goals, total_days_to_complete,
+    fastest_goal_id, fastest_goal_days, updated_at
+)
+SELECT
+    u.id,
+    COALESCE(agg.total_goals, 0),
+    COALESCE(agg.completed_goals, 0),
+    COALESCE(agg.total_days_to_complete, 0),
+    fastest.id,
+    fastest.days,
+    now()
+FROM users u
+LEFT JOIN (
+    SELECT
+        user_id,
+        count(*) AS total_goals,
+        count(completed_at) AS completed_goals,
+        COALESCE(sum(completed_at::date - created_at::date), 0) AS total_days_to_complete
+    FROM goals
+    {goals_where}
+    GROUP BY user_id
+) agg ON agg.user_id = u.id
+LEFT JOIN (
+    SELECT DISTINCT ON (user_id)
+        user_id, id, completed_at::date - created_at::date AS days
+    FROM goals
+    WHERE completed_at IS NOT NULL {goals_and}
+    ORDER BY user_id, days, completed_at
+) fastest ON fastest.user_id = u.id
+{where}
+ON CONFLICT (user_id) DO UPDATE SET
+    total_goals = EXCLUDED.total_goals,
+    completed_goals = EXCLUDED.completed_goals,
+    total_days_to_complete = EXCLUDED.total_days_to_complete,
+    fastest_goal_id = EXCLUDED.fastest_goal_id,
+    fastest_goal_days = EXCLUDED.fastest_goal_days,
+    updated_at = EXCLUDED.updated_at
+"""
+
+
+def days_to_complete():
+    """SQL expression for the number of whole days a goal took to complete."""
+    return cast(Goal.completed_at, Date) - cast(Goal.created_at, Date)
+
+
+# Every ``size``-th user id; consecutive bounds delimit one rebuild batch
+RANGE_BOUNDS_SQL = text(
+    """
+    SELECT id FROM (SELECT id, row_number() OVER (ORDER BY id) AS n FROM users) AS numbered
+    WHERE n % :size = 0
+    ORDER BY id
+    """
+)
+
+
+def rebuild_user_stats(db: Session, user_id=None, id_range: Optional[Tuple[Any, Any]] = None) -> int:
+    """Recompute summary rows from the goals table, for one user, the users
+    in an ``(after, until]`` id range, or everyone. Returns affected rows."""
+    if user_id is not None:
+        result = db.execute(
+            text(REBUILD_SQL.format(where="WHERE u.id = :user_id", goals_where="", goals_and="")),
+            {"user_id": user_id},
+        )
+    elif id_range is not None:
+        # Repeated on goals: a range on u.id is not pushed into the aggregates
+        result = db.execute(
+            text(
+                REBUILD_SQL.format(
+                    where=f"WHERE {id_range_filter('u.id')}",
+                    goals_where=f"WHERE {id_range_filter('user_id')}",
+                    goals_and=f"AND {id_range_filter('user_id')}",
+                )
+            ),
+            {"after": id_range[0], "until": id_range[1]},
+        )
+    else:
+        result = db.execute(text(REBUILD_SQL.format(where="", goals_where="", goals_and="")))
+    return result.rowcount
+
+
+def id_ranges(db: Session, size: int) -> List[Tuple[Optional[str], Optional[str]]]:
+    """``(after, until]`` user id ranges of ``size`` users covering everyone;
+    the first range starts and the last one ends open."""
+    bounds = [str(row[0]) for row in db.execute(RANGE_BOUNDS_SQL, {"size": size})]
+    return list(zip([None] + bounds, bounds + [None]))
+
+
+def rebuild_locked(db: Session, user_id=None, id_range: Optional[Tuple[Any, Any]] = None) -> int:
+    """Rebuild ``user_stats`` and the streak index for one user or an id range.
+
+    The rows are locked first, so the rebuild reads goals and check-ins
+    after every incremental update already applied to them has committed,
+    and later ones wait and apply on top of the rebuilt values.
+    """
+    if user_id is not None:
+        condition, params = "user_id = :user_id", {"user_id": user_id}
+    else:
+        condition, params = id_range_filter("user_id"), {"after": id_range[0], "until": id_range[1]}
+    db.execute(text(f"SELECT user_id FROM user_stats WHERE {condition} ORDER BY user_id FOR UPDATE"), params)
+    rows = rebuild_user_stats(db, user_id, id_range=id_range)
+    rebuild_streaks(db, user_id, id_range=id_range)
+    return rows
+
+
+def get_user_stats(db: Session, user_id) -> UserStats:
+    """Load the summary row, building it on first access."""
+    stats = db.get(UserStats, user_id)
+    if stats is None:
+        rebuild_user_stats(db, user_id)
+        rebuild_streaks(db, user_id)
+        db.commit()
+        stats = db.get(UserStats, user_id)
+    return stats
+
+
+def refresh_fastest_goal(db: Session, user_id, exclude_goal_id=None) -> None:
+    """Re-select the fastest completed goal after the current one went away."""
+    days = days_to_complete()
+    query = db.query(Goal.id, days.label("days")).filter(
+        Goal.user_id == user_id,
+        Goal.completed_at.isnot(None),
+    )
+    if exclude_goal_id is not None:
+        query = query.filter(Goal.id != exclude_goal_id)
+    fastest = query.order_by(days, Goal.completed_at).first()
+
+    db.execute(
+        update(UserStats)
+        .where(UserStats.user_id == user_id)
+        .values(
+            fastest_goal_id=fastest.id if fastest else None,
+            fastest_goal_days=fastest.days if fastest else None,
+        )
+    )
+
+
+def record_goal_created(db: Session, user_id) -> None:
+    db.execute(
+        pg_insert(UserStats)
+        .values(user_id=user_id, total_goals=1)
+        .on_conflict_do_update(
+            index_elements=[UserStats.user_id],
+            set_={"total_goals": UserStats.total_goals + 1},
+        )
+    )
+
+
+def record_goal_completed(db: Session, goal: Goal, previous_days: Optional[int] = None) -> None:
+    """Account for ``goal`` reaching completion.
+
+    The goal must already be flushed with its new ``completed_at``.
+    ``previous_days`` is set when an already completed goal is completed
+    again, in which case only its duration changes.
+    """
+    days = select(days_to_complete()).where(Goal.id == goal.id).scalar_subquery()
+    is_faster = or_(UserStats.fastest_goal_days.is_(None), days < UserStats.fastest_goal_days)
+
+    values = {
+        "total_days_to_complete": UserStats.total_days_to_complete + days - (previous_days or 0),
+        "fastest_goal_id": case((is_faster, goal.id), else_=UserStats.fastest_goal_id),
+        "fastest_goal_days": case((is_faster, days), else_=UserStats.fastest_goal_days),
+    }
+    if previous_days is None:
+        values["completed_goals"] = UserStats.completed_goals + 1
+
+    db.execute(update(UserStats).where(UserStats.user_id == goal.user_id).values(**values))
+
+    if previous_days is not None:
+        # The goal may have been the fastest one and just got slower.
+        refresh_fastest_goal(db, goal.user_id)
+
+
+def record_goal_deleted(db: Session, goal: Goal) -> None:
+    """Account for ``goal`` being removed. Call before the goal is deleted."""
+    values = {"total_goals": UserStats.total_goals - 1}
+    if goal.completed_at is not None:
+        days = (goal.completed_at.date() - goal.created_at.date()).days
+        values["completed_goals"] = UserStats.completed_goals - 1
+        values["total_days_to_complete"] = UserStats.total_days_to_complete - days
+
+    fastest_goal_id = db.execute(
+        update(UserStats)
+        .where(UserStats.user_id == goal.user_id)
+        .values(**values)
+        .returning(UserStats.fastest_goal_id)
+    ).scalar()
+
+    if fastest_goal_id == goal.id:
+        refresh_fastest_goal(db, goal.user_id, exclude_goal_id=goal.id)
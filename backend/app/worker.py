@@ -0,0 +1,229 @@
+"""Background job worker.
+
+Runs next to the API server and executes jobs from the ``jobs`` table
+(see ``app.services.jobs``)::
+
+    uvicorn app.main:app ...
+    python -m app.worker                  # one worker process
+    python -m app.worker --processes 4    # four, for more throughput
+
+Each job runs in its own transaction together with marking it done, so a
+job's database effects and its completion commit (or roll back) as one.
+Between batches every worker enqueues due periodic jobs and requeues
+jobs abandoned by crashed workers. Idle workers wait on ``LISTEN jobs``
+(new jobs wake them immediately), polling every ``JOB_POLL_INTERVAL``
+seconds as a fallback, e.g. behind PgBouncer in transaction mode.
+
+``JOB_NIGHTLY_HOUR`` is the UTC hour of the nightly stats rebuild (run as
+one job per ``STATS_REBUILD_BATCH`` users) and
+``NOTIFY_DIGEST_HOUR`` the one of the Telegram daily digest; queued
+Telegram messages are sent every minute.
+"""
+
+import argparse
+import asyncio
+import logging
+import multiprocessing
+import os
+import select
+import signal
+import socket
+import time
+import traceback
+from datetime import date as date_type, timedelta
+from typing import Any, Dict
+
+from sqlalchemy.orm import Session
+
+from app.database import SessionLocal, engine
+from app.services import jobs, reminders, telegram_dispatch, user_stats
+
+JOB_BATCH_SIZE = int(os.getenv("JOB_BATCH_SIZE", "10"))
+JOB_POLL_INTERVAL = float(os.getenv("JOB_POLL_INTERVAL", "5"))
+JOB_NIGHTLY_HOUR = int(os.getenv("JOB_NIGHTLY_HOUR", "3"))
+STATS_REBUILD_BATCH = int(os.getenv("STATS_REBUILD_BATCH", "1000"))
+NOTIFY_DIGEST_HOUR = int(os.getenv("NOTIFY_DIGEST_HOUR", "6"))
+MAINTENANCE_INTERVAL = 30.0
+
+logger = logging.getLogger("app.worker")
+
+PERIODIC = [
+    jobs.Periodic("rebuild_stats", every=timedelta(days=1), offset=timedelta(hours=JOB_NIGHTLY_HOUR)),
+    jobs.Periodic("sweep_overdue_goals", every=timedelta(days=1), offset=timedelta(minutes=5)),
+    jobs.Periodic("queue_digests", every=timedelta(days=1), offset=timedelta(hours=NOTIFY_DIGEST_HOUR)),
+    jobs.Periodic("dispatch_notifications", every=timedelta(minutes=1)),
+    jobs.Periodic("prune_jobs", every=timedelta(hours=1)),
+]
+
+
+@jobs.handler("rebuild_stats")
+def rebuild_stats(db: Session, payload: Dict[str, Any]) -> None:
+    """Recompute ``user_stats`` and the streak index.
+
+    With ``user_id`` for that user, with ``after``/``until`` for that user
+    id range. Without either (the nightly run) it only enqueues one range
+    job per ``STATS_REBUILD_BATCH`` users, so each transaction locks and
+    holds a small batch of ``user_stats`` rows rather than all of them.
+    """
+    if "user_id" in payload:
+        user_stats.rebuild_locked(db, payload["user_id"])
+    elif "until" in payload:
+        user_stats.rebuild_locked(db, id_range=(payload["after"], payload["until"]))
+    else:
+        ranges = user_stats.id_ranges(db, STATS_REBUILD_BATCH)
+        for after, until in ranges:
+            jobs.enqueue(db, "rebuild_stats", {"after": after, "until": until})
+        logger.info("queued %d stats rebuild batch(es)", len(ranges))
+
+
+@jobs.handler("sweep_overdue_goals")
+def sweep_overdue_goals(db: Session, payload: Dict[str, Any]) -> None:
+    """Queue reminders for goals that became overdue and streaks that broke."""
+    today = date_type.today()
+    overdue = reminders.queue_overdue(db, today)
+    streaks = reminders.queue_broken_streaks(db, today)
+    logger.info("queued %d overdue and %d broken-streak reminder(s)", overdue, streaks)
+
+
+@jobs.handler("queue_digests")
+def queue_digests(db: Session, payload: Dict[str, Any]) -> None:
+    logger.info("queued %d daily digest(s)", reminders.queue_digests(db, date_type.today()))
+
+
+@jobs.handler("dispatch_notifications")
+def dispatch_notifications(db: Session, payload: Dict[str, Any]) -> None:
+    """Send queued Telegram messages; stops claiming before the next run is due."""
+    result = asyncio.run(telegram_dispatch.dispatch(max_seconds=payload.get("max_seconds", 50)))
+    if result and (result["sent"] or result["failed"] or result["retry_later"]):
+        logger.info("notifications: %s", result)
+
+
+@jobs.handler("prune_jobs")
+def prune_jobs(db: Session, payload: Dict[str, Any]) -> None:
+    jobs.prune(db)
+
+
+@jobs.handler("noop")
+def noop(db: Session, payload: Dict[str, Any]) -> None:
+    """Does nothing (optionally sleeping or failing); used by benchmarks."""
+    if payload.get("sleep_ms"):
+        time.sleep(payload["sleep_ms"] / 1000)
+    if payload.get("fail"):
+        raise RuntimeError("noop job asked to fail")
+
+
+class Worker:
+    def __init__(self, batch_size: int = JOB_BATCH_SIZE, poll_interval: float = JOB_POLL_INTERVAL):
+        self.id = f"{socket.gethostname()}:{os.getpid()}"
+        self.batch_size = batch_size
+        self.poll_interval = poll_interval
+        self.stopping = False
+        self._listener = None
+        self._listener_owner = None
+        self._last_maintenance = float("-inf")
+
+    def stop(self, *_) -> None:
+        self.stopping = True
+
+    def _listen(self) -> None:
+        try:
+            # Held for the worker's lifetime, outside the session's pool use
+            self._listener_owner = engine.raw_connection()
+            connection = self._listener_owner.driver_connection
+            connection.autocommit = True
+            connection.cursor().execute(f"LISTEN {jobs.NOTIFY_CHANNEL}")
+            self._listener = connection
+        except Exception:
+            logger.warning("LISTEN %s failed, polling only", jobs.NOTIFY_CHANNEL, exc_info=True)
+
+    def _wait(self) -> None:
+        if self._listener is None:
+            time.sleep(self.poll_interval)
+            return
+        if select.select([self._listener], [], [], self.poll_interval)[0]:
+            self._listener.poll()
+            self._listener.notifies.clear()
+
+    def _maintain(self, db: Session) -> None:
+        if time.monotonic() - self._last_maintenance < MAINTENANCE_INTERVAL:
+            return
+        jobs.schedule_periodic(db, PERIODIC)
+        requeued = jobs.requeue_stale(db)
+        db.commit()
+        if requeued:
+            logger.warning("requeued %d abandoned job(s)", requeued)
+        self._last_maintenance = time.monotonic()
+
+    def _run(self, db: Session, job) -> None:
+        fn = jobs.HANDLERS.get(job.kind)
+        try:
+            if fn is None:
+                raise LookupError(f"no handler for job kind {job.kind!r}")
+            fn(db, job.payload)
+            jobs.complete(db, job)
+            db.commit()
+        except Exception:
+            db.rollback()
+            retry = jobs.fail(db, job, traceback.format_exc())
+            db.commit()
+            logger.exception("job %s (%s) failed, attempt %d/%d%s", job.id, job.kind, job.attempts, job.max_attempts, ", will retry" if retry else "")
+
+    def run(self) -> None:
+        self._listen()
+        logger.info("worker %s started", self.id)
+        db = SessionLocal()
+        try:
+            while not self.stopping:
+                self._maintain(db)
+                claimed = jobs.claim(db, self.id, self.batch_size)
+                db.commit()
+                for job in claimed:
+                    self._run(db, job)
+                if len(claimed) < self.batch_size and not self.stopping:
+                    self._wait()
+        finally:
+            db.close()
+            logger.info("worker %s stopped", self.id)
+
+
+def run_worker(batch_size: int, poll_interval: float) -> None:
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(processName)s %(levelname)s %(message)s")
+    worker = Worker(batch_size, poll_interval)
+    # Finish the current job, then exit
+    signal.signal(signal.SIGTERM, worker.stop)
+    signal.signal(signal.SIGINT, worker.stop)
+    worker.run()
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description="Run background job workers")
+    parser.add_argument("--processes", type=int, default=1, help="worker processes to run")
+    parser.add_argument("--batch-size", type=int, default=JOB_BATCH_SIZE, help="jobs claimed per query")
+    parser.add_argument("--poll-interval", type=float, default=JOB_POLL_INTERVAL)
+    args = parser.parse_args(argv)
+
+    if args.processes == 1:
+        run_worker(args.batch_size, args.poll_interval)
+        return
+
+    context = multiprocessing.get_context("spawn")
+    children = [
+        context.Process(target=run_worker, args=(args.batch_size, args.poll_interval), name=f"worker-{n}")
+        for n in range(args.processes)
+    ]
+    for child in children:
+        child.start()
+
+    def forward(signum, _):
+        for child in children:
+            if child.is_alive():
+                os.kill(child.pid, signum)
+
+    signal.signal(signal.SIGTERM, forward)
+    signal.signal(signal.SIGINT, forward)
+    for child in children:
+        child.join()
+
+
+if __name__ == "__main__":
+    main()
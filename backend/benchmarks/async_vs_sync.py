@@ -0,0 +1,89 @@
+"""Compare the sync (threadpool + psycopg2) and async (asyncpg) request paths.
+
+Boots ``uvicorn app.main:app`` once per DATABASE_MODE against the database in
+DATABASE_URL, registers a throwaway user and drives a read-heavy mix of
+goals/stats/progress requests at a fixed concurrency.
+
+Usage (from backend/)::
+
+    DATABASE_URL=postgresql://... SECRET_KEY=... \\
+        python -m benchmarks.async_vs_sync --concurrency 200 --duration 20
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import time
+
+import httpx
+
+from benchmarks.common import create_goals, percentile, sign_up, start_server, wait_ready
+
+
+async def drive(base_url: str, concurrency: int, duration: float, goals: int) -> dict:
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=60) as client:
+        await sign_up(client)
+        goal_ids = await create_goals(client, goals)
+        latencies = []
+        errors = 0
+        stop_at = time.monotonic() + duration
+
+        async def worker():
+            nonlocal errors
+            while time.monotonic() < stop_at:
+                roll = random.random()
+                if roll < 0.5:
+                    request = client.get("/api/goals")
+                elif roll < 0.8:
+                    request = client.get("/api/stats", params={"period": 30})
+                else:
+                    goal_id = random.choice(goal_ids)
+                    request = client.post(f"/api/goals/{goal_id}/progress", json={"delta": 1})
+                started = time.perf_counter()
+                response = await request
+                latencies.append(time.perf_counter() - started)
+                if response.status_code >= 400:
+                    errors += 1
+
+        started = time.monotonic()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        elapsed = time.monotonic() - started
+
+    latencies.sort()
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "throughput_rps": round(len(latencies) / elapsed, 1),
+        "p50_ms": round(percentile(latencies, 50) * 1000, 2),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 2),
+    }
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description="sync vs async request path benchmark")
+    parser.add_argument("--concurrency", type=int, default=100)
+    parser.add_argument("--duration", type=float, default=15.0)
+    parser.add_argument("--goals", type=int, default=20)
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--modes", default="sync,async")
+    args = parser.parse_args(argv)
+
+    results = {}
+    for mode in args.modes.split(","):
+        server = start_server(args.port, args.workers, DATABASE_MODE=mode)
+        base_url = f"http://127.0.0.1:{args.port}"
+        try:
+            asyncio.run(wait_ready(base_url))
+            results[mode] = asyncio.run(drive(base_url, args.concurrency, args.duration, args.goals))
+        finally:
+            server.terminate()
+            server.wait()
+
+    print(json.dumps({"concurrency": args.concurrency, "workers": args.workers, "results": results}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
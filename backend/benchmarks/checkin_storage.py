@@ -0,0 +1,125 @@
+"""Compare the ``table`` and ``bitmap`` check-in storages.
+
+Creates a scratch schema with its own ``checkins`` and ``checkin_bitmaps``
+tables, seeds ``--users`` users with a random ``--density`` share of the
+last ``--days`` days checked in, converts them with the same SQL the
+``sync_checkins`` command uses, and then drives the real
+``app.services.checkins`` functions against both storages (the scratch
+schema is first on ``search_path``). Everything runs in one transaction
+that is rolled back at the end.
+
+Reports on-disk size (heap + indexes + TOAST) and per-call latency of
+recording a check-in, reading a 365-day range and reading a 30-day range.
+
+Usage (from backend/)::
+
+    DATABASE_URL=postgresql://... python -m benchmarks.checkin_storage
+    DATABASE_URL=postgresql://... python -m benchmarks.checkin_storage --users 20000
+"""
+
+import argparse
+import json
+import random
+import time
+from datetime import date, timedelta
+
+from sqlalchemy import text
+
+from app.database import SessionLocal
+from app.services import checkins
+from benchmarks.common import percentile
+
+SCHEMA = "checkin_storage_bench"
+
+SETUP_SQL = f"""
+CREATE SCHEMA {SCHEMA};
+CREATE TABLE {SCHEMA}.checkins (LIKE public.checkins INCLUDING ALL);
+CREATE TABLE {SCHEMA}.checkin_bitmaps (LIKE public.checkin_bitmaps INCLUDING ALL);
+CREATE TABLE {SCHEMA}.bench_users (id uuid PRIMARY KEY);
+SET LOCAL search_path = {SCHEMA}, public
+"""
+
+SEED_SQL = """
+INSERT INTO bench_users (id) SELECT gen_random_uuid() FROM generate_series(1, :users);
+
+INSERT INTO checkins (id, user_id, date)
+SELECT gen_random_uuid(), u.id, :today - d
+FROM bench_users u, generate_series(1, :days) AS d
+WHERE random() < :density
+"""
+
+
+def _size(db, table: str) -> int:
+    return db.execute(text("SELECT pg_total_relation_size(:table)"), {"table": f"{SCHEMA}.{table}"}).scalar()
+
+
+def _timed(fn, calls):
+    timings = []
+    for args in calls:
+        started = time.perf_counter()
+        fn(*args)
+        timings.append((time.perf_counter() - started) * 1000)
+    timings.sort()
+    return {
+        "p50_ms": round(percentile(timings, 50), 3),
+        "p95_ms": round(percentile(timings, 95), 3),
+        "mean_ms": round(sum(timings) / len(timings), 3),
+    }
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description="Compare check-in storages")
+    parser.add_argument("--users", type=int, default=1_000_000)
+    parser.add_argument("--days", type=int, default=365)
+    parser.add_argument("--density", type=float, default=0.3, help="share of days checked in")
+    parser.add_argument("--samples", type=int, default=2000, help="calls per latency measurement")
+    args = parser.parse_args(argv)
+
+    today = date.today()
+    db = SessionLocal()
+    report = {"users": args.users, "days": args.days, "density": args.density}
+    try:
+        for statement in SETUP_SQL.strip().split(";\n"):
+            db.execute(text(statement))
+        started = time.perf_counter()
+        for statement in SEED_SQL.strip().split(";\n\n"):
+            db.execute(text(statement), {"users": args.users, "days": args.days, "density": args.density, "today": today})
+        report["seed_s"] = round(time.perf_counter() - started, 1)
+
+        started = time.perf_counter()
+        report["bitmap_rows"] = checkins.sync_table_to_bitmaps(db)
+        report["convert_s"] = round(time.perf_counter() - started, 1)
+        db.execute(text("ANALYZE checkins"))
+        db.execute(text("ANALYZE checkin_bitmaps"))
+        report["table_rows"] = db.execute(text("SELECT count(*) FROM checkins")).scalar()
+
+        user_ids = [row[0] for row in db.execute(text("SELECT id FROM bench_users ORDER BY random() LIMIT :n"), {"n": args.samples})]
+        year_ago = today - timedelta(days=364)
+        month_ago = today - timedelta(days=29)
+
+        for storage in ("table", "bitmap"):
+            checkins.CHECKIN_STORAGE = storage
+            table = "checkins" if storage == "table" else "checkin_bitmaps"
+            report[storage] = {
+                "bytes": _size(db, table),
+                "bytes_per_user": round(_size(db, table) / args.users, 1),
+                "record": _timed(checkins.record, [(db, user_id, today) for user_id in user_ids]),
+                "read_365d": _timed(checkins.days_between, [(db, user_id, year_ago, today) for user_id in user_ids]),
+                "read_30d": _timed(checkins.days_between, [(db, user_id, month_ago, today) for user_id in user_ids]),
+            }
+
+        # Both storages must agree after the writes above
+        for user_id in random.sample(user_ids, min(50, len(user_ids))):
+            checkins.CHECKIN_STORAGE = "table"
+            expected = checkins.days_between(db, user_id, year_ago, today)
+            checkins.CHECKIN_STORAGE = "bitmap"
+            assert checkins.days_between(db, user_id, year_ago, today) == expected, user_id
+    finally:
+        db.rollback()
+        db.close()
+
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
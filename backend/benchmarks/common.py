@@ -0,0 +1,62 @@
+"""Helpers shared by the benchmark scripts."""
+
+import asyncio
+import os
+import subprocess
+import sys
+import time
+import uuid
+
+import httpx
+
+
+def start_server(port: int, workers: int = 1, **env) -> subprocess.Popen:
+    """Start ``uvicorn app.main:app`` with extra environment variables."""
+    return subprocess.Popen(
+        [
+            sys.executable, "-m", "uvicorn", "app.main:app",
+            "--host", "127.0.0.1", "--port", str(port),
+            "--workers", str(workers), "--log-level", "warning",
+        ],
+        env=dict(os.environ, **env),
+    )
+
+
+async def wait_ready(base_url: str, timeout: float = 30.0) -> None:
+    deadline = time.monotonic() + timeout
+    async with httpx.AsyncClient(base_url=base_url) as client:
+        while time.monotonic() < deadline:
+            try:
+                if (await client.get("/health")).status_code == 200:
+                    return
+            except httpx.TransportError:
+                pass
+            await asyncio.sleep(0.2)
+    raise RuntimeError(f"server at {base_url} did not start")
+
+
+async def sign_up(client: httpx.AsyncClient) -> None:
+    """Register a throwaway user and authorize ``client`` as that user."""
+    email = f"bench-{uuid.uuid4().hex[:12]}@example.com"
+    password = "benchmark-password"
+    await client.post("/api/auth/register", json={"email": email, "password": password, "name": "Bench"})
+    token = (await client.post("/api/auth/login", data={"username": email, "password": password})).json()
+    client.headers["Authorization"] = f"Bearer {token['access_token']}"
+
+
+async def create_goals(client: httpx.AsyncClient, count: int, target: float = 1000) -> list:
+    goal_ids = []
+    for idx in range(count):
+        response = await client.post(
+            "/api/goals",
+            json={"name": f"Goal {idx}", "unit": "km", "target": target, "color": "#3366FF"},
+        )
+        goal_ids.append(response.json()["id"])
+    return goal_ids
+
+
+def percentile(sorted_values: list, pct: float) -> float:
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, int(round(pct / 100 * (len(sorted_values) - 1))))
+    return sorted_values[index]
@@ -0,0 +1,121 @@
+"""EXPLAIN every goal listing filter/sort combination.
+
+Seeds a realistic goals table inside a transaction (rolled back at the
+end), runs ANALYZE, then builds the exact queries ``GET /api/goals``
+issues for each status/color/sort combination, for the first page and for
+a page after a cursor. Every query must read ``goals`` through an index;
+queries that also need a Sort node are reported (with a few dozen goals
+per user the planner often prefers sorting the user's rows in memory).
+
+Usage (from backend/)::
+
+    DATABASE_URL=postgresql://... python -m benchmarks.explain_goal_listing
+"""
+
+import argparse
+import json
+import sys
+import uuid
+from datetime import date
+
+from sqlalchemy import text
+from sqlalchemy.dialects import postgresql
+
+from app.api.goals import GOAL_COLUMNS
+from app.core.pagination import encode_cursor
+from app.database import SessionLocal
+from app.services import goal_list
+
+STATUSES = (None, "active", "completed", "overdue")
+COLORS = (None, "#3366FF")
+
+SEED_SQL = """
+INSERT INTO users (id, email, name)
+SELECT gen_random_uuid(), 'explain-' || n || '@example.com', 'Explain'
+FROM generate_series(1, :users) AS n;
+
+INSERT INTO goals (id, user_id, name, unit, target, current, color, deadline, completed_at, created_at)
+SELECT
+    gen_random_uuid(),
+    u.id,
+    'Goal ' || (random() * 1000)::int,
+    'km',
+    100,
+    (random() * 100)::int,
+    (ARRAY['#3366FF', '#FF3366', '#33FF66', '#FFCC00', '#00CCFF', '#9933FF', '#FF9900', '#666666'])[1 + (random() * 7)::int],
+    CASE WHEN random() < 0.2 THEN NULL ELSE current_date + (random() * 400 - 100)::int END,
+    CASE WHEN random() < 0.3 THEN now() END,
+    now()
+FROM users u, generate_series(1, :per_user)
+WHERE u.email LIKE 'explain-%';
+"""
+
+
+def _plan_nodes(plan):
+    yield plan
+    for child in plan.get("Plans", ()):
+        yield from _plan_nodes(child)
+
+
+def explain(db, query) -> dict:
+    compiled = query.statement.compile(dialect=postgresql.dialect())
+    connection = db.connection()
+    (plan,) = connection.exec_driver_sql("EXPLAIN (FORMAT JSON) " + str(compiled), compiled.params).scalar()
+    nodes = list(_plan_nodes(plan["Plan"]))
+    indexes = sorted({node["Index Name"] for node in nodes if node.get("Relation Name", "goals") == "goals" and "Index Name" in node})
+    seq_scans = [node for node in nodes if node["Node Type"] == "Seq Scan"]
+    return {
+        "indexes": indexes,
+        "sort_node": any(node["Node Type"] == "Sort" for node in nodes),
+        "seq_scan": bool(seq_scans),
+    }
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description="EXPLAIN goal listing queries")
+    parser.add_argument("--users", type=int, default=2000)
+    parser.add_argument("--goals-per-user", type=int, default=60)
+    parser.add_argument("--limit", type=int, default=20)
+    args = parser.parse_args(argv)
+
+    db = SessionLocal()
+    failures, results = 0, []
+    try:
+        for statement in SEED_SQL.strip().split(";\n\n"):
+            db.execute(text(statement), {"users": args.users, "per_user": args.goals_per_user})
+        db.execute(text("ANALYZE users"))
+        db.execute(text("ANALYZE goals"))
+        user_id = db.execute(text("SELECT id FROM users WHERE email = 'explain-1@example.com'")).scalar()
+
+        for sort in goal_list.SORTS:
+            # A cursor in the middle of the key space for the "after" pages
+            sample = {"name_asc": "Goal 500", "progress_desc": 0.5, "deadline_asc": date.today(), "deadline_desc": date.today()}[sort]
+            after = encode_cursor({"s": sort, "v": sample, "i": uuid.UUID(int=0)})
+            for status in STATUSES:
+                for color in COLORS:
+                    base = goal_list.build_query(db, GOAL_COLUMNS, user_id, status, color, date.today())
+                    for page, cursor in (("first", None), ("after", after)):
+                        for part in goal_list.segments(base, sort, cursor):
+                            plan = explain(db, part.limit(args.limit + 1))
+                            ok = bool(plan["indexes"]) and not plan["seq_scan"]
+                            failures += not ok
+                            results.append(
+                                {"sort": sort, "status": status, "color": color, "page": page, "ok": ok, **plan}
+                            )
+    finally:
+        db.rollback()
+        db.close()
+
+    for row in results:
+        flag = "OK  " if row["ok"] else "FAIL"
+        sort_note = " +sort" if row["sort_node"] else ""
+        print(
+            f"{flag} {row['sort']:<14} status={str(row['status']):<9} color={str(row['color']):<7} "
+            f"{row['page']:<5} {','.join(row['indexes'])}{sort_note}"
+        )
+    print(json.dumps({"queries": len(results), "failures": failures}))
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,128 @@
+"""Minimal fake Telegram Bot API server for dispatcher tests and benchmarks.
+
+Implements ``getMe`` and ``sendMessage`` and enforces Telegram-like limits:
+more than ``--global-rate`` messages within one second (plus 10% for
+network jitter, which the real API tolerates too), or two messages to one
+chat closer than ``--chat-interval`` seconds, get a 429 with
+``retry_after``. Chats whose id is divisible by ``--blocked-every`` answer
+403 (bot blocked by the user). ``GET /stats`` reports what was received.
+
+Usage (from backend/)::
+
+    python -m benchmarks.fake_telegram --port 8131 --latency-ms 20
+"""
+
+import argparse
+import asyncio
+import collections
+import json
+import time
+
+import uvicorn
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import JSONResponse
+from starlette.routing import Route
+
+
+def create_app(global_rate: float, chat_interval: float, latency_ms: float, blocked_every: int) -> Starlette:
+    recent = collections.deque()
+    last_by_chat = {}
+    stats = collections.Counter()
+    started = {}
+
+    async def params(request: Request) -> dict:
+        if request.headers.get("content-type", "").startswith("application/json"):
+            return await request.json()
+        return {key: value for key, value in (await request.form()).items()}
+
+    async def get_me(request: Request):
+        return JSONResponse({"ok": True, "result": {"id": 1, "is_bot": True, "first_name": "Fake", "username": "fake_bot"}})
+
+    async def send_message(request: Request):
+        data = await params(request)
+        chat_id = int(data["chat_id"])
+        now = time.monotonic()
+        started.setdefault("first", now)
+        if latency_ms:
+            await asyncio.sleep(latency_ms / 1000)
+
+        while recent and recent[0] < now - 1:
+            recent.popleft()
+        if global_rate and len(recent) >= global_rate * 1.1:
+            stats["rejected_global"] += 1
+            return flood(1)
+        previous = last_by_chat.get(chat_id)
+        if chat_interval and previous is not None and now - previous < chat_interval * 0.9:
+            stats["rejected_chat"] += 1
+            return flood(1)
+        if blocked_every and chat_id % blocked_every == 0:
+            stats["forbidden"] += 1
+            return JSONResponse(
+                {"ok": False, "error_code": 403, "description": "Forbidden: bot was blocked by the user"},
+                status_code=403,
+            )
+
+        recent.append(now)
+        last_by_chat[chat_id] = now
+        stats["delivered"] += 1
+        started["last"] = now
+        return JSONResponse(
+            {
+                "ok": True,
+                "result": {
+                    "message_id": stats["delivered"],
+                    "date": int(time.time()),
+                    "chat": {"id": chat_id, "type": "private"},
+                    "text": data.get("text", ""),
+                },
+            }
+        )
+
+    def flood(retry_after: int) -> JSONResponse:
+        return JSONResponse(
+            {
+                "ok": False,
+                "error_code": 429,
+                "description": f"Too Many Requests: retry after {retry_after}",
+                "parameters": {"retry_after": retry_after},
+            },
+            status_code=429,
+        )
+
+    async def get_stats(request: Request):
+        span = started.get("last", 0) - started.get("first", 0)
+        return JSONResponse({**stats, "span_seconds": round(span, 2)})
+
+    async def reset(request: Request):
+        recent.clear()
+        last_by_chat.clear()
+        stats.clear()
+        started.clear()
+        return JSONResponse({"ok": True})
+
+    return Starlette(
+        routes=[
+            Route("/bot{token}/getMe", get_me, methods=["GET", "POST"]),
+            Route("/bot{token}/sendMessage", send_message, methods=["POST"]),
+            Route("/stats", get_stats),
+            Route("/reset", reset, methods=["POST"]),
+        ]
+    )
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description="Fake Telegram Bot API server")
+    parser.add_argument("--port", type=int, default=8131)
+    parser.add_argument("--global-rate", type=float, default=30, help="0 disables the global limit")
+    parser.add_argument("--chat-interval", type=float, default=1.0, help="0 disables the per-chat limit")
+    parser.add_argument("--latency-ms", type=float, default=20)
+    parser.add_argument("--blocked-every", type=int, default=0)
+    args = parser.parse_args(argv)
+    app = create_app(args.global_rate, args.chat_interval, args.latency_ms, args.blocked_every)
+    print(json.dumps(vars(args)))
+    uvicorn.run(app, host="127.0.0.1", port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
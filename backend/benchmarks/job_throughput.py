@@ -0,0 +1,122 @@
+"""Measure job throughput against the number of worker processes.
+
+For each value of ``--processes`` this enqueues ``--jobs`` ``noop`` jobs
+that each sleep ``--sleep-ms`` (standing in for I/O-bound work such as an
+outgoing API call), starts ``python -m app.worker --processes N`` and
+times how long the queue takes to drain. Every job must finish ``done``
+after exactly one attempt, i.e. SKIP LOCKED never handed a job to two
+workers. A final run checks that a failing job is retried with backoff
+and ends up ``failed`` after ``max_attempts``.
+
+Usage (from backend/)::
+
+    DATABASE_URL=postgresql://... python -m benchmarks.job_throughput --processes 1 2 4 8
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+import uuid
+
+from sqlalchemy import func, text
+
+from app.database import SessionLocal
+from app.models.job import Job
+from app.services import jobs
+
+WARMUP_SECONDS = 3.0
+
+
+def start_workers(processes: int, **env) -> subprocess.Popen:
+    return subprocess.Popen(
+        [sys.executable, "-m", "app.worker", "--processes", str(processes), "--poll-interval", "0.5"],
+        env=dict(os.environ, **env),
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+
+
+def _counts(db, tag: str) -> dict:
+    rows = (
+        db.query(Job.status, func.count(), func.max(Job.attempts))
+        .filter(Job.payload["tag"].astext == tag)
+        .group_by(Job.status)
+        .all()
+    )
+    db.rollback()
+    return {status: {"count": count, "max_attempts": attempts} for status, count, attempts in rows}
+
+
+def drain(processes: int, count: int, sleep_ms: int, timeout: float) -> dict:
+    tag = uuid.uuid4().hex
+    db = SessionLocal()
+    workers = start_workers(processes)
+    try:
+        # Let the workers start and go idle on LISTEN before timing
+        time.sleep(WARMUP_SECONDS)
+        for _ in range(count):
+            jobs.enqueue(db, "noop", {"tag": tag, "sleep_ms": sleep_ms})
+        db.commit()
+
+        started = time.perf_counter()
+        while time.perf_counter() - started < timeout:
+            if _counts(db, tag).get("done", {}).get("count") == count:
+                break
+            time.sleep(0.02)
+        elapsed = time.perf_counter() - started
+
+        counts = _counts(db, tag)
+        return {
+            "processes": processes,
+            "seconds": round(elapsed, 2),
+            "jobs_per_second": round(count / elapsed, 1),
+            "exactly_once": counts.get("done") == {"count": count, "max_attempts": 1},
+            "statuses": counts,
+        }
+    finally:
+        workers.terminate()
+        workers.wait()
+        db.execute(text("DELETE FROM jobs WHERE payload->>'tag' = :tag"), {"tag": tag})
+        db.commit()
+        db.close()
+
+
+def retry_check(timeout: float) -> dict:
+    tag = uuid.uuid4().hex
+    db = SessionLocal()
+    try:
+        jobs.enqueue(db, "noop", {"tag": tag, "fail": True}, max_attempts=3)
+        db.commit()
+        workers = start_workers(1, JOB_BACKOFF_BASE="0.2")
+        started = time.perf_counter()
+        try:
+            while time.perf_counter() - started < timeout and "failed" not in _counts(db, tag):
+                time.sleep(0.05)
+        finally:
+            workers.terminate()
+            workers.wait()
+        job = db.query(Job).filter(Job.payload["tag"].astext == tag).one()
+        return {"status": job.status, "attempts": job.attempts, "seconds": round(time.perf_counter() - started, 2)}
+    finally:
+        db.execute(text("DELETE FROM jobs WHERE payload->>'tag' = :tag"), {"tag": tag})
+        db.commit()
+        db.close()
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description="Measure job worker throughput")
+    parser.add_argument("--processes", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--jobs", type=int, default=2000)
+    parser.add_argument("--sleep-ms", type=int, default=20)
+    parser.add_argument("--timeout", type=float, default=300)
+    args = parser.parse_args(argv)
+
+    report = [drain(processes, args.jobs, args.sleep_ms, args.timeout) for processes in args.processes]
+    print(json.dumps({"runs": report, "retry": retry_check(args.timeout)}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
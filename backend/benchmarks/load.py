@@ -0,0 +1,468 @@
+"""End-to-end load and latency benchmark for the API.
+
+Boots ``uvicorn app.main:app`` once per ``--modes`` entry (DATABASE_MODE),
+registers ``--users`` accounts through the API and seeds them with
+realistic data directly in SQL: a varying number of goals per user, up to
+``--days`` of daily history with a per-user activity rate, ``current``
+equal to the sum of the history deltas, ``completed_at`` on the day the
+target was reached, one check-in per active day and rebuilt stats and
+streaks. ``--concurrency`` clients then drive a weighted mix of requests
+(``--mix``) for ``--duration`` seconds after ``--warmup``.
+
+Reported per mode and endpoint: requests per second, errors and
+p50/p90/p99/max latency. Queries per request are counted separately by
+sending each endpoint through the app in-process with a
+``before_cursor_execute`` listener (first call, and the mean of the
+following calls, which may be served from caches).
+
+The result is JSON (``--output``, stdout otherwise) stamped with the git
+commit; ``--compare`` prints the change against an earlier result and
+exits with status 1 if p50/p99 latency grew or throughput fell by more
+than ``--threshold`` percent anywhere.
+
+``--ephemeral`` runs everything against a throwaway cluster created with
+``initdb``/``pg_ctl`` (from PATH or ``--pg-bin``) and migrated with
+``alembic upgrade head``; otherwise DATABASE_URL is used and the seeded
+users are deleted at the end (unless ``--keep-data``).
+
+Usage (from backend/)::
+
+    DATABASE_URL=postgresql://... SECRET_KEY=... \\
+        python -m benchmarks.load --output before.json
+    # ... change something ...
+    python -m benchmarks.load --output after.json --compare before.json
+"""
+
+import argparse
+import asyncio
+import collections
+import contextlib
+import json
+import os
+import platform
+import random
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+import uuid
+from datetime import datetime, timezone
+from typing import Dict, Iterator, List, Optional
+
+import httpx
+
+from benchmarks.common import percentile, start_server, wait_ready
+
+PASSWORD = "benchmark-password"
+
+DEFAULT_MIX = "goals.list=30,goals.progress=20,goals.history=15,stats=15,stats.activity=5,auth.me=10,auth.login=5"
+
+GOALS_SQL = """
+INSERT INTO goals (id, user_id, name, unit, target, current, color, deadline, created_at)
+SELECT
+    gen_random_uuid(),
+    u.id,
+    'Goal ' || n,
+    (ARRAY['km', 'pages', 'hours', 'times'])[1 + floor(random() * 4)::int],
+    50 + floor(random() * 950),
+    0,
+    (ARRAY['#3366FF', '#FF6633', '#33CC66', '#9933FF'])[1 + floor(random() * 4)::int],
+    CASE WHEN random() < 0.7 THEN current_date + floor(random() * 180)::int - 60 END,
+    now() - make_interval(days => :days)
+FROM unnest(CAST(:user_ids AS uuid[]), CAST(:goal_counts AS int[])) AS u(id, goals)
+CROSS JOIN LATERAL generate_series(1, u.goals) AS n
+"""
+
+HISTORY_SQL = """
+INSERT INTO goal_history (id, goal_id, date, delta, after, created_at)
+SELECT
+    gen_random_uuid(),
+    h.goal_id,
+    h.day,
+    h.delta,
+    sum(h.delta) OVER (PARTITION BY h.goal_id ORDER BY h.day),
+    h.day + time '12:00'
+FROM (
+    SELECT g.id AS goal_id, d.day, 1 + floor(random() * 10) AS delta
+    FROM goals g
+    JOIN unnest(CAST(:user_ids AS uuid[]), CAST(:activity AS float8[])) AS u(id, activity) ON u.id = g.user_id
+    -- Lateral on g and rolled inside, so each goal gets its own days
+    CROSS JOIN LATERAL (
+        SELECT CAST(day AS date) AS day, random() AS roll
+        FROM generate_series(CAST(g.created_at AS date), current_date - 1, interval '1 day') AS day
+    ) d
+    WHERE d.roll < u.activity
+) h
+"""
+
+TOTALS_SQL = """
+UPDATE goals g
+SET current = s.total, completed_at = s.completed_on + time '12:00'
+FROM (
+    SELECT h.goal_id, sum(h.delta) AS total, min(h.date) FILTER (WHERE h.after >= goals.target) AS completed_on
+    FROM goal_history h
+    JOIN goals ON goals.id = h.goal_id
+    WHERE goals.user_id = ANY(CAST(:user_ids AS uuid[]))
+    GROUP BY h.goal_id
+) s
+WHERE g.id = s.goal_id
+"""
+
+CHECKINS_SQL = """
+INSERT INTO checkins (id, user_id, date)
+SELECT gen_random_uuid(), g.user_id, h.date
+FROM goal_history h
+JOIN goals g ON g.id = h.goal_id
+WHERE g.user_id = ANY(CAST(:user_ids AS uuid[]))
+GROUP BY g.user_id, h.date
+"""
+
+CLEANUP_SQL = (
+    "DELETE FROM goal_history WHERE goal_id IN (SELECT id FROM goals WHERE user_id = ANY(CAST(:user_ids AS uuid[])))",
+    "DELETE FROM checkins WHERE user_id = ANY(CAST(:user_ids AS uuid[]))",
+    "DELETE FROM goals WHERE user_id = ANY(CAST(:user_ids AS uuid[]))",
+    "DELETE FROM users WHERE id = ANY(CAST(:user_ids AS uuid[]))",
+)
+
+
+def parse_mix(mix: str) -> Dict[str, float]:
+    weights = {}
+    for part in mix.split(","):
+        name, _, weight = part.partition("=")
+        if name.strip() not in REQUESTS:
+            raise SystemExit(f"unknown endpoint {name!r}; choose from {', '.join(REQUESTS)}")
+        weights[name.strip()] = float(weight or 1)
+    return weights
+
+
+def _goal(user: dict, rng: random.Random) -> str:
+    return rng.choice(user["goal_ids"])
+
+
+# name -> (method, url, request options) for one request by ``user``
+REQUESTS = {
+    "goals.list": lambda user, rng: ("GET", "/api/goals", {}),
+    "goals.progress": lambda user, rng: ("POST", f"/api/goals/{_goal(user, rng)}/progress", {"json": {"delta": 1}}),
+    "goals.history": lambda user, rng: ("GET", f"/api/goals/{_goal(user, rng)}/history", {"params": {"limit": 50}}),
+    "stats": lambda user, rng: ("GET", "/api/stats", {}),
+    "stats.activity": lambda user, rng: ("GET", "/api/stats/activity", {}),
+    "auth.me": lambda user, rng: ("GET", "/api/auth/me", {}),
+    "auth.login": lambda user, rng: (
+        "POST",
+        "/api/auth/login",
+        {"data": {"username": user["email"], "password": PASSWORD}, "anonymous": True},
+    ),
+}
+
+
+def build_request(name: str, user: dict, rng: random.Random):
+    method, url, options = REQUESTS[name](user, rng)
+    options = dict(options)
+    if not options.pop("anonymous", False):
+        options["headers"] = {"Authorization": f"Bearer {user['token']}"}
+    return method, url, options
+
+
+@contextlib.contextmanager
+def ephemeral_postgres(pg_bin: Optional[str]) -> Iterator[str]:
+    """A throwaway Postgres cluster on a Unix socket; yields its URL."""
+
+    def tool(name: str) -> str:
+        path = os.path.join(pg_bin, name) if pg_bin else shutil.which(name)
+        if not path or not os.path.exists(path):
+            raise SystemExit(f"{name} not found; pass --pg-bin")
+        return path
+
+    root = tempfile.mkdtemp(prefix="goaltracker-bench-")
+    data = os.path.join(root, "data")
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]
+    subprocess.run(
+        [tool("initdb"), "-D", data, "-U", "postgres", "--auth=trust", "-E", "UTF8"],
+        check=True,
+        stdout=subprocess.DEVNULL,
+    )
+    options = f"-p {port} -k {root} -c listen_addresses='' -c max_connections=300"
+    subprocess.run(
+        [tool("pg_ctl"), "-D", data, "-o", options, "-l", os.path.join(root, "postgres.log"), "-w", "start"],
+        check=True,
+        stdout=subprocess.DEVNULL,
+    )
+    try:
+        subprocess.run(
+            [tool("createdb"), "-h", root, "-p", str(port), "-U", "postgres", "goaltracker"],
+            check=True,
+        )
+        yield f"postgresql://postgres@/goaltracker?host={root}&port={port}"
+    finally:
+        subprocess.run([tool("pg_ctl"), "-D", data, "-m", "fast", "-w", "stop"], stdout=subprocess.DEVNULL)
+        shutil.rmtree(root, ignore_errors=True)
+
+
+async def register_users(base_url: str, count: int) -> List[dict]:
+    prefix = f"load-{uuid.uuid4().hex[:8]}"
+
+    async def register(client: httpx.AsyncClient, index: int) -> dict:
+        email = f"{prefix}-{index}@example.com"
+        await client.post("/api/auth/register", json={"email": email, "password": PASSWORD, "name": f"Load {index}"})
+        token = (await client.post("/api/auth/login", data={"username": email, "password": PASSWORD})).json()
+        token = token["access_token"]
+        me = (await client.get("/api/auth/me", headers={"Authorization": f"Bearer {token}"})).json()
+        return {"id": me["id"], "email": email, "token": token}
+
+    async with httpx.AsyncClient(base_url=base_url, timeout=60) as client:
+        return list(await asyncio.gather(*(register(client, index) for index in range(count))))
+
+
+def seed(users: List[dict], goals: int, days: int, seed_value: int) -> Dict[str, int]:
+    from sqlalchemy import text
+
+    from app.database import SessionLocal
+    from app.services import checkins, streaks, user_stats
+
+    rng = random.Random(seed_value)
+    user_ids = [user["id"] for user in users]
+    params = {
+        "user_ids": user_ids,
+        # Heavy and light users: 0.5x-1.5x the mean goal count, 20-90% active days
+        "goal_counts": [max(1, round(goals * rng.uniform(0.5, 1.5))) for _ in users],
+        "activity": [rng.uniform(0.2, 0.9) for _ in users],
+        "days": days,
+    }
+    db = SessionLocal()
+    try:
+        db.execute(text("SELECT setseed(:seed)"), {"seed": rng.uniform(-1, 1)})
+        counts = {
+            "goals": db.execute(text(GOALS_SQL), params).rowcount,
+            "history": db.execute(text(HISTORY_SQL), params).rowcount,
+        }
+        db.execute(text(TOTALS_SQL), params)
+        counts["checkins"] = db.execute(text(CHECKINS_SQL), params).rowcount
+        for user_id in user_ids:
+            checkins.sync_table_to_bitmaps(db, user_id)
+            user_stats.rebuild_user_stats(db, user_id)
+            streaks.rebuild_streaks(db, user_id)
+        db.commit()
+
+        for user in users:
+            user["goal_ids"] = [
+                str(goal_id)
+                for goal_id in db.execute(text("SELECT id FROM goals WHERE user_id = :id"), {"id": user["id"]}).scalars()
+            ]
+        db.rollback()
+    finally:
+        db.close()
+    return counts
+
+
+def cleanup(users: List[dict]) -> None:
+    from sqlalchemy import text
+
+    from app.database import SessionLocal
+
+    db = SessionLocal()
+    try:
+        for statement in CLEANUP_SQL:
+            db.execute(text(statement), {"user_ids": [user["id"] for user in users]})
+        db.commit()
+    finally:
+        db.close()
+
+
+def probe_queries(users: List[dict], names: List[str], repeats: int = 3) -> Dict[str, dict]:
+    """Statements executed per request, counted in-process."""
+    from fastapi.testclient import TestClient
+    from sqlalchemy import event
+
+    from app.database import engine
+    from app.main import app
+
+    executed = [0]
+
+    def count(*args) -> None:
+        executed[0] += 1
+
+    rng = random.Random(0)
+    user = users[0]
+    report = {}
+    event.listen(engine, "before_cursor_execute", count)
+    try:
+        with TestClient(app) as client:
+            for name in names:
+                counts = []
+                for _ in range(repeats + 1):
+                    method, url, options = build_request(name, user, rng)
+                    executed[0] = 0
+                    client.request(method, url, **options)
+                    counts.append(executed[0])
+                report[name] = {"first": counts[0], "repeated": round(sum(counts[1:]) / repeats, 2)}
+    finally:
+        event.remove(engine, "before_cursor_execute", count)
+    return report
+
+
+async def drive(base_url: str, users: List[dict], weights: Dict[str, float], args) -> Dict[str, dict]:
+    names = list(weights)
+    latencies: Dict[str, List[float]] = {name: [] for name in names}
+    errors: Dict[str, collections.Counter] = {name: collections.Counter() for name in names}
+    started = time.perf_counter()
+    measure_from = started + args.warmup
+    stop_at = measure_from + args.duration
+
+    async def client_loop(client: httpx.AsyncClient, worker: int) -> None:
+        rng = random.Random(args.seed * 1000 + worker)
+        while True:
+            now = time.perf_counter()
+            if now >= stop_at:
+                return
+            name = rng.choices(names, weights=[weights[n] for n in names])[0]
+            method, url, options = build_request(name, rng.choice(users), rng)
+            try:
+                response = await client.request(method, url, **options)
+                failure = str(response.status_code) if response.status_code >= 400 else None
+            except httpx.TransportError as exc:
+                failure = type(exc).__name__
+            if now < measure_from:
+                continue
+            latencies[name].append((time.perf_counter() - now) * 1000)
+            if failure:
+                errors[name][failure] += 1
+
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=60) as client:
+        await asyncio.gather(*(client_loop(client, worker) for worker in range(args.concurrency)))
+
+    def summary(values: List[float], failures: collections.Counter) -> dict:
+        values = sorted(values)
+        return {
+            "requests": len(values),
+            "requests_per_second": round(len(values) / args.duration, 1),
+            "errors": dict(failures),
+            "p50_ms": round(percentile(values, 50), 2),
+            "p90_ms": round(percentile(values, 90), 2),
+            "p99_ms": round(percentile(values, 99), 2),
+            "max_ms": round(values[-1], 2) if values else 0.0,
+        }
+
+    results = {name: summary(latencies[name], errors[name]) for name in names}
+    results["total"] = summary(
+        [value for values in latencies.values() for value in values],
+        sum(errors.values(), collections.Counter()),
+    )
+    return results
+
+
+def git_commit() -> Dict[str, object]:
+    def git(*command: str) -> str:
+        return subprocess.run(["git", *command], capture_output=True, text=True).stdout.strip()
+
+    return {"commit": git("rev-parse", "HEAD") or None, "dirty": bool(git("status", "--porcelain", "--untracked-files=no"))}
+
+
+def compare(current: dict, baseline: dict, threshold: float) -> List[str]:
+    """Print a comparison table; returns the regressions found."""
+    regressions = []
+    for key, value in current["meta"]["config"].items():
+        if key in baseline.get("meta", {}).get("config", {}) and baseline["meta"]["config"][key] != value:
+            print(f"warning: --{key.replace('_', '-')} was {baseline['meta']['config'][key]!r} in the baseline", file=sys.stderr)
+    print(f"{'mode':<6} {'endpoint':<16} {'metric':<20} {'baseline':>10} {'current':>10} {'change':>8}", file=sys.stderr)
+    for mode, endpoints in current["results"].items():
+        for name, stats in endpoints.items():
+            old = baseline.get("results", {}).get(mode, {}).get(name)
+            if not old:
+                continue
+            for metric, higher_is_worse in (("p50_ms", True), ("p99_ms", True), ("requests_per_second", False)):
+                before, after = old[metric], stats[metric]
+                change = (after - before) / before * 100 if before else 0.0
+                worse = change > threshold if higher_is_worse else change < -threshold
+                flag = "  <-- regression" if worse else ""
+                print(f"{mode:<6} {name:<16} {metric:<20} {before:>10} {after:>10} {change:>+7.1f}%{flag}", file=sys.stderr)
+                if worse:
+                    regressions.append(f"{mode} {name} {metric}: {before} -> {after}")
+    return regressions
+
+
+async def run(args, weights: Dict[str, float]) -> dict:
+    report = {
+        "meta": {
+            **git_commit(),
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "python": platform.python_version(),
+            "cpus": os.cpu_count(),
+            "config": {key: value for key, value in vars(args).items() if key not in ("output", "compare")},
+        },
+        "results": {},
+    }
+    users: List[dict] = []
+    try:
+        for index, mode in enumerate(args.modes.split(",")):
+            server = start_server(args.port, workers=args.workers, DATABASE_MODE=mode)
+            base_url = f"http://127.0.0.1:{args.port}"
+            try:
+                await wait_ready(base_url)
+                if index == 0:
+                    users = await register_users(base_url, args.users)
+                    report["seed"] = seed(users, args.goals, args.days, args.seed)
+                    report["queries_per_request"] = probe_queries(users, list(weights))
+                report["results"][mode] = await drive(base_url, users, weights, args)
+            finally:
+                server.terminate()
+                server.wait()
+    finally:
+        if users and not (args.keep_data or args.ephemeral):
+            cleanup(users)
+    return report
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description="End-to-end API load benchmark")
+    parser.add_argument("--modes", default="sync,async", help="comma-separated DATABASE_MODE values")
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--duration", type=float, default=20, help="measured seconds per mode")
+    parser.add_argument("--warmup", type=float, default=3)
+    parser.add_argument("--workers", type=int, default=1, help="uvicorn worker processes")
+    parser.add_argument("--users", type=int, default=20)
+    parser.add_argument("--goals", type=int, default=15, help="mean goals per user")
+    parser.add_argument("--days", type=int, default=180, help="days of history per goal")
+    parser.add_argument("--mix", default=DEFAULT_MIX, help="endpoint=weight,... from: " + ", ".join(REQUESTS))
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--port", type=int, default=8140)
+    parser.add_argument("--output", help="write the JSON result here instead of stdout")
+    parser.add_argument("--compare", help="earlier JSON result to compare against")
+    parser.add_argument("--threshold", type=float, default=10, help="percent change counted as a regression")
+    parser.add_argument("--ephemeral", action="store_true", help="use a throwaway initdb cluster")
+    parser.add_argument("--pg-bin", help="directory with initdb/pg_ctl/createdb")
+    parser.add_argument("--keep-data", action="store_true", help="leave the seeded users in the database")
+    args = parser.parse_args(argv)
+    weights = parse_mix(args.mix)
+
+    with contextlib.ExitStack() as stack:
+        if args.ephemeral:
+            os.environ["DATABASE_URL"] = stack.enter_context(ephemeral_postgres(args.pg_bin))
+            subprocess.run(["alembic", "upgrade", "head"], check=True, stdout=subprocess.DEVNULL)
+        if not os.environ.get("DATABASE_URL"):
+            raise SystemExit("set DATABASE_URL or pass --ephemeral")
+        # The in-process seeding and query probe use the sync engine
+        os.environ["DATABASE_MODE"] = "sync"
+        report = asyncio.run(run(args, weights))
+
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as fh:
+            fh.write(output + "\n")
+    else:
+        print(output)
+
+    if args.compare:
+        with open(args.compare) as fh:
+            regressions = compare(report, json.load(fh), args.threshold)
+        if regressions:
+            print(f"{len(regressions)} regression(s) over {args.threshold}%", file=sys.stderr)
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
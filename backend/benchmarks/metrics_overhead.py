@@ -0,0 +1,167 @@
+"""Cost of the Prometheus instrumentation (``app.core.metrics``).
+
+Two measurements:
+
+* in-process: time per request spent in ``MetricsMiddleware`` around a
+  no-op ASGI app (route lookup for a static and a parameterised path,
+  gauges, histograms), and per SQL statement in the cursor event
+  listeners;
+* end to end: ``--rounds`` alternating servers with ``METRICS_ENABLED``
+  true and false, each driven by ``--concurrency`` clients for
+  ``--duration`` seconds with a mix of ``GET /api/goals``,
+  ``GET /api/stats`` and ``POST /api/goals/{id}/progress``. Medians over
+  the rounds are reported, since single runs are noisy.
+
+Usage (from backend/)::
+
+    DATABASE_URL=postgresql://... SECRET_KEY=... python -m benchmarks.metrics_overhead
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import statistics
+import time
+import uuid
+
+import httpx
+
+from benchmarks.common import create_goals, percentile, sign_up, start_server, wait_ready
+
+
+def per_request_overhead(samples: int) -> dict:
+    from app.core import metrics
+    from app.main import app
+
+    async def noop(scope, receive, send):
+        await send({"type": "http.response.start", "status": 200, "headers": []})
+        await send({"type": "http.response.body", "body": b""})
+
+    async def send(message):
+        pass
+
+    async def receive():
+        return {"type": "http.request", "body": b""}
+
+    middleware = metrics.MetricsMiddleware(noop, metrics.RouteTemplates(app))
+    paths = {
+        "static": ("GET", "/api/goals"),
+        "parameterised": ("POST", f"/api/goals/{uuid.uuid4()}/progress"),
+    }
+
+    async def measure(handler, method: str, path: str) -> float:
+        scope = {"type": "http", "method": method, "path": path, "root_path": "", "headers": [], "query_string": b""}
+        for _ in range(samples // 10):
+            await handler(dict(scope), receive, send)
+        started = time.perf_counter()
+        for _ in range(samples):
+            await handler(dict(scope), receive, send)
+        return (time.perf_counter() - started) / samples * 1e6
+
+    async def run() -> dict:
+        report = {}
+        for name, (method, path) in paths.items():
+            bare = await measure(noop, method, path)
+            report[f"{name}_us"] = round(await measure(middleware, method, path) - bare, 2)
+        return report
+
+    report = asyncio.run(run())
+
+    class Context:
+        pass
+
+    context = Context()
+    started = time.perf_counter()
+    for _ in range(samples):
+        metrics._before_cursor_execute(None, None, None, None, context, False)
+        metrics._after_cursor_execute(None, None, None, None, context, False)
+    report["per_query_us"] = round((time.perf_counter() - started) / samples * 1e6, 2)
+    return report
+
+
+async def drive(base_url: str, concurrency: int, duration: float, goals: int) -> dict:
+    timings = []
+    errors = 0
+    async with httpx.AsyncClient(base_url=base_url, timeout=60) as setup:
+        await sign_up(setup)
+        goal_ids = await create_goals(setup, goals)
+        headers = dict(setup.headers)
+
+    async def client_loop(client: httpx.AsyncClient, worker: int) -> None:
+        nonlocal errors
+        rng = random.Random(worker)
+        while time.perf_counter() < stop_at:
+            roll = rng.random()
+            started = time.perf_counter()
+            if roll < 0.5:
+                response = await client.get("/api/goals")
+            elif roll < 0.8:
+                response = await client.get("/api/stats")
+            else:
+                response = await client.post(f"/api/goals/{rng.choice(goal_ids)}/progress", json={"delta": 1})
+            timings.append((time.perf_counter() - started) * 1000)
+            errors += response.status_code >= 400
+
+    limits = httpx.Limits(max_connections=concurrency)
+    async with httpx.AsyncClient(base_url=base_url, headers=headers, limits=limits, timeout=60) as client:
+        stop_at = time.perf_counter() + duration
+        await asyncio.gather(*(client_loop(client, worker) for worker in range(concurrency)))
+
+    timings.sort()
+    return {
+        "requests_per_second": len(timings) / duration,
+        "p50_ms": percentile(timings, 50),
+        "p99_ms": percentile(timings, 99),
+        "errors": errors,
+    }
+
+
+async def end_to_end(args) -> dict:
+    rounds = {"enabled": [], "disabled": []}
+    for round_number in range(args.rounds):
+        order = ["enabled", "disabled"] if round_number % 2 == 0 else ["disabled", "enabled"]
+        for setting in order:
+            env = {"METRICS_ENABLED": "true" if setting == "enabled" else "false", "DATABASE_MODE": args.mode}
+            server = start_server(args.port, args.workers, **env)
+            try:
+                await wait_ready(f"http://127.0.0.1:{args.port}")
+                rounds[setting].append(await drive(f"http://127.0.0.1:{args.port}", args.concurrency, args.duration, args.goals))
+            finally:
+                server.terminate()
+                server.wait()
+
+    return {
+        setting: {
+            metric: round(statistics.median(result[metric] for result in results), 2)
+            for metric in ("requests_per_second", "p50_ms", "p99_ms", "errors")
+        }
+        for setting, results in rounds.items()
+    }
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description="Measure the cost of the Prometheus instrumentation")
+    parser.add_argument("--mode", default="sync", choices=["sync", "async"])
+    parser.add_argument("--samples", type=int, default=20000, help="in-process iterations")
+    parser.add_argument("--rounds", type=int, default=3)
+    parser.add_argument("--duration", type=float, default=10)
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--goals", type=int, default=20)
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument("--port", type=int, default=8150)
+    parser.add_argument("--skip-server", action="store_true", help="only the in-process measurement")
+    args = parser.parse_args(argv)
+
+    report = {"instrumentation": per_request_overhead(args.samples)}
+    if not args.skip_server:
+        report["end_to_end"] = asyncio.run(end_to_end(args))
+        enabled, disabled = report["end_to_end"]["enabled"], report["end_to_end"]["disabled"]
+        report["throughput_change_pct"] = round(
+            (enabled["requests_per_second"] / disabled["requests_per_second"] - 1) * 100, 1
+        )
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,117 @@
+"""Compare replaying N progress taps one by one against one batch call.
+
+Before timing, one batch with shuffled ``client_timestamp`` values (naive
+and aware, and a zero delta) is checked: history must come back in
+timestamp order and the history ETag must change.
+
+Usage (from backend/)::
+
+    DATABASE_URL=postgresql://... SECRET_KEY=... \\
+        python -m benchmarks.progress_batch --items 100 --goals 5
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import time
+from datetime import datetime, timedelta, timezone
+
+import httpx
+
+from benchmarks.common import create_goals, sign_up, start_server, wait_ready
+
+
+def make_items(goal_ids: list, count: int) -> list:
+    started = datetime.now(timezone.utc) - timedelta(hours=1)
+    return [
+        {
+            "goal_id": random.choice(goal_ids),
+            "delta": 1,
+            "client_timestamp": (started + timedelta(seconds=idx)).isoformat(),
+        }
+        for idx in range(count)
+    ]
+
+
+async def check_order(client: httpx.AsyncClient, goal_id: str, count: int = 20) -> None:
+    started = datetime.now(timezone.utc) - timedelta(hours=1)
+    items = [
+        {
+            "goal_id": goal_id,
+            "delta": idx % 5,
+            "note": str(idx),
+            "client_timestamp": (
+                started + timedelta(seconds=idx) if idx % 2 else (started + timedelta(seconds=idx)).replace(tzinfo=None)
+            ).isoformat(),
+        }
+        for idx in range(count)
+    ]
+    random.shuffle(items)
+
+    before = await client.get(f"/api/goals/{goal_id}/history")
+    before.raise_for_status()
+    response = await client.post("/api/goals/progress:batch", json={"items": items})
+    response.raise_for_status()
+    after = await client.get(f"/api/goals/{goal_id}/history", headers={"If-None-Match": before.headers["etag"]})
+    assert after.status_code == 200, f"history not refreshed after batch: {after.status_code}"
+
+    notes = [row["note"] for row in after.json()["rows"] if row["note"] is not None]
+    assert notes == [str(idx) for idx in range(count)], f"history out of order: {notes}"
+
+
+async def run(base_url: str, items: int, goals: int, rounds: int) -> dict:
+    async with httpx.AsyncClient(base_url=base_url, timeout=120) as client:
+        await sign_up(client)
+        goal_ids = await create_goals(client, goals, target=items * rounds * 10)
+        await check_order(client, goal_ids[0])
+
+        sequential, batched = [], []
+        for _ in range(rounds):
+            payload = make_items(goal_ids, items)
+
+            started = time.perf_counter()
+            for item in payload:
+                response = await client.post(
+                    f"/api/goals/{item['goal_id']}/progress", json={"delta": item["delta"]}
+                )
+                response.raise_for_status()
+            sequential.append(time.perf_counter() - started)
+
+            started = time.perf_counter()
+            response = await client.post("/api/goals/progress:batch", json={"items": payload})
+            response.raise_for_status()
+            batched.append(time.perf_counter() - started)
+
+    best_sequential, best_batched = min(sequential), min(batched)
+    return {
+        "items": items,
+        "goals": goals,
+        "sequential_ms": round(best_sequential * 1000, 1),
+        "batch_ms": round(best_batched * 1000, 1),
+        "speedup": round(best_sequential / best_batched, 1),
+    }
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description="sequential vs batch progress benchmark")
+    parser.add_argument("--items", type=int, default=100)
+    parser.add_argument("--goals", type=int, default=5)
+    parser.add_argument("--rounds", type=int, default=3)
+    parser.add_argument("--port", type=int, default=8767)
+    parser.add_argument("--mode", default="sync")
+    args = parser.parse_args(argv)
+
+    server = start_server(args.port, 1, DATABASE_MODE=args.mode)
+    base_url = f"http://127.0.0.1:{args.port}"
+    try:
+        asyncio.run(wait_ready(base_url))
+        result = asyncio.run(run(base_url, args.items, args.goals, args.rounds))
+    finally:
+        server.terminate()
+        server.wait()
+    print(json.dumps(result, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+"""Check that concurrent progress taps on one goal never lose an update.
+
+Fires ``--requests`` concurrent ``POST /api/goals/{id}/progress`` calls with
+``delta=1`` against a single goal and verifies that the goal's ``current``
+and its history length both equal the number of requests.
+
+Usage (from backend/)::
+
+    DATABASE_URL=postgresql://... SECRET_KEY=... \\
+        python -m benchmarks.progress_concurrency --requests 500 --workers 4
+"""
+
+import argparse
+import asyncio
+import sys
+
+import httpx
+
+from benchmarks.common import create_goals, sign_up, start_server, wait_ready
+
+
+async def run(base_url: str, requests: int, concurrency: int) -> dict:
+    limits = httpx.Limits(max_connections=concurrency)
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=60) as client:
+        await sign_up(client)
+        (goal_id,) = await create_goals(client, 1, target=requests * 10)
+
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def tap():
+            async with semaphore:
+                response = await client.post(f"/api/goals/{goal_id}/progress", json={"delta": 1})
+                return response.status_code
+
+        statuses = await asyncio.gather(*(tap() for _ in range(requests)))
+        goal = (await client.get(f"/api/goals/{goal_id}")).json()
+        history_rows = await count_history(client, goal_id)
+
+    return {
+        "requests": requests,
+        "failed": sum(1 for code in statuses if code != 200),
+        "current": goal["current"],
+        "history_rows": history_rows,
+    }
+
+
+async def count_history(client: httpx.AsyncClient, goal_id: str) -> int:
+    """Rows of the goal's history, following ``next_cursor`` across pages."""
+    rows, params = 0, {"limit": 1000}
+    while True:
+        page = (await client.get(f"/api/goals/{goal_id}/history", params=params)).json()
+        rows += len(page["rows"])
+        if page["next_cursor"] is None:
+            return rows
+        params["cursor"] = page["next_cursor"]
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description="lost-update check for progress writes")
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--workers", type=int, default=2)
+    parser.add_argument("--port", type=int, default=8766)
+    parser.add_argument("--mode", default="sync")
+    args = parser.parse_args(argv)
+
+    server = start_server(args.port, args.workers, DATABASE_MODE=args.mode)
+    base_url = f"http://127.0.0.1:{args.port}"
+    try:
+        asyncio.run(wait_ready(base_url))
+        result = asyncio.run(run(base_url, args.requests, args.concurrency))
+    finally:
+        server.terminate()
+        server.wait()
+
+    print(result)
+    ok = result["failed"] == 0 and result["current"] == args.requests == result["history_rows"]
+    print("OK: no lost updates" if ok else "FAIL: lost updates detected")
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
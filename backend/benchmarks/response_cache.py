@@ -0,0 +1,116 @@
+"""Check and time the per-user response cache.
+
+For every backend in ``--backends`` (``off``, ``memory``, ``redis``) a
+server is started with ``RESPONSE_CACHE_BACKEND`` set accordingly and one
+user seeded with ``--goals`` goals. Then:
+
+* a burst of ``--concurrency`` identical cold ``/api/stats`` requests is
+  sent; with a cache, singleflight must answer all of them from a single
+  computation (one ``X-Cache: miss`` per worker);
+* a progress write must invalidate the cached ``/api/goals`` and
+  ``/api/stats`` responses, so the next reads show the new value;
+* warm request latency is measured for ``/api/goals`` and ``/api/stats``.
+
+``redis`` uses ``REDIS_URL`` when set; otherwise a throwaway local server
+is started with ``redislite`` if it is installed.
+
+Usage (from backend/)::
+
+    DATABASE_URL=postgresql://... SECRET_KEY=... \\
+        python -m benchmarks.response_cache --backends off memory redis
+"""
+
+import argparse
+import asyncio
+import collections
+import json
+import os
+import statistics
+import time
+
+import httpx
+
+from benchmarks.common import create_goals, percentile, sign_up, start_server, wait_ready
+
+URLS = ("/api/goals", "/api/stats?period=365")
+
+
+def redis_url():
+    if os.getenv("REDIS_URL"):
+        return os.environ["REDIS_URL"], None
+    import redislite
+
+    server = redislite.Redis()
+    return f"unix://{server.socket_file}", server
+
+
+async def run(base_url: str, goals: int, concurrency: int, repeat: int) -> dict:
+    async with httpx.AsyncClient(base_url=base_url, timeout=60) as client:
+        await sign_up(client)
+        goal_ids = await create_goals(client, goals)
+
+        burst = await asyncio.gather(*(client.get(URLS[1]) for _ in range(concurrency)))
+        states = collections.Counter(response.headers.get("X-Cache") for response in burst)
+        bodies = {response.content for response in burst}
+
+        before = (await client.get(URLS[0])).json()
+        await client.post(f"/api/goals/{goal_ids[0]}/progress", json={"delta": 5})
+        after = (await client.get(URLS[0])).json()
+        stats = (await client.get(URLS[1])).json()
+        invalidated = (
+            next(g["current"] for g in before if g["id"] == goal_ids[0]) == 0
+            and next(g["current"] for g in after if g["id"] == goal_ids[0]) == 5
+            and sum(point["value"] for point in stats["activity_series"]) == 1
+        )
+
+        latency = {}
+        for url in URLS:
+            timings = []
+            for _ in range(repeat):
+                started = time.perf_counter()
+                (await client.get(url)).raise_for_status()
+                timings.append((time.perf_counter() - started) * 1000)
+            timings.sort()
+            latency[url] = {
+                "p50_ms": round(statistics.median(timings), 2),
+                "p95_ms": round(percentile(timings, 95), 2),
+            }
+
+    return {"burst": dict(states), "burst_bodies": len(bodies), "invalidated": invalidated, "latency": latency}
+
+
+async def main_async(args) -> None:
+    report = {}
+    for offset, backend in enumerate(args.backends):
+        env = {"RESPONSE_CACHE_BACKEND": backend, "DATABASE_MODE": args.mode}
+        redis_server = None
+        if backend == "redis":
+            env["REDIS_URL"], redis_server = redis_url()
+        port = args.port + offset
+        server = start_server(port, args.workers, **env)
+        try:
+            await wait_ready(f"http://127.0.0.1:{port}")
+            report[backend] = await run(f"http://127.0.0.1:{port}", args.goals, args.concurrency, args.repeat)
+        finally:
+            server.terminate()
+            server.wait()
+            if redis_server is not None:
+                redis_server.shutdown()
+    print(json.dumps(report, indent=2))
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description="Check and time the response cache")
+    parser.add_argument("--backends", nargs="+", default=["off", "memory"], choices=["off", "memory", "redis"])
+    parser.add_argument("--mode", default="sync", choices=["sync", "async"])
+    parser.add_argument("--goals", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--repeat", type=int, default=200)
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument("--port", type=int, default=8120)
+    args = parser.parse_args(argv)
+    asyncio.run(main_async(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+"""Measure payload size and latency of the heavy read endpoints.
+
+Seeds one user with ``--goals`` goals and ``--history`` history entries on
+one of them, then times ``/api/goals``, ``/api/goals/{id}/history`` and
+``/api/stats?period=365`` with identity, gzip and br encodings. It also
+compares serialising the goal list through ``GoalResponse`` +
+``JSONResponse`` (the old path) with the column-tuple + orjson fast path.
+
+Usage (from backend/)::
+
+    DATABASE_URL=postgresql://... SECRET_KEY=... \\
+        python -m benchmarks.serialization --goals 300 --history 1000
+"""
+
+import argparse
+import asyncio
+import json
+import statistics
+import time
+
+import httpx
+
+from benchmarks.common import create_goals, sign_up, start_server, wait_ready
+
+ENCODINGS = ("identity", "gzip", "br")
+
+
+async def seed(client: httpx.AsyncClient, goals: int, history: int) -> str:
+    goal_ids = await create_goals(client, goals, target=history * 10)
+    for offset in range(0, history, 500):
+        items = [{"goal_id": goal_ids[0], "delta": 1} for _ in range(min(500, history - offset))]
+        (await client.post("/api/goals/progress:batch", json={"items": items})).raise_for_status()
+    return goal_ids[0]
+
+
+async def measure(client: httpx.AsyncClient, url: str, encoding: str, repeat: int) -> dict:
+    timings, size = [], 0
+    for _ in range(repeat):
+        started = time.perf_counter()
+        response = await client.get(url, headers={"Accept-Encoding": encoding})
+        timings.append(time.perf_counter() - started)
+        response.raise_for_status()
+        size = int(response.headers.get("content-length", len(response.content)))
+    return {"bytes": size, "p50_ms": round(statistics.median(timings) * 1000, 2)}
+
+
+def serializer_comparison(goals: int, repeat: int) -> dict:
+    """Old vs fast serialisation of ``goals`` rows, without the network."""
+    from fastapi.encoders import jsonable_encoder
+    from fastapi.responses import JSONResponse
+
+    from app.api.goals import GOAL_COLUMNS
+    from app.core.responses import json_response
+    from app.database import SessionLocal
+    from app.models.goal import Goal
+    from app.schemas.goal import GoalResponse
+
+    db = SessionLocal()
+    try:
+        user_id = db.query(Goal.user_id).order_by(Goal.created_at.desc()).limit(1).scalar()
+        orm_rows = db.query(Goal).filter(Goal.user_id == user_id).all()
+        tuples = db.query(*GOAL_COLUMNS).filter(Goal.user_id == user_id).all()
+    finally:
+        db.close()
+
+    def old():
+        return JSONResponse(jsonable_encoder([GoalResponse.model_validate(row) for row in orm_rows]))
+
+    def fast():
+        return json_response([row._asdict() for row in tuples])
+
+    result = {"rows": len(orm_rows)}
+    for name, fn in (("pydantic_ms", old), ("orjson_tuples_ms", fast)):
+        timings = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            fn()
+            timings.append(time.perf_counter() - started)
+        result[name] = round(statistics.median(timings) * 1000, 3)
+    return result
+
+
+async def run(base_url: str, goals: int, history: int, repeat: int) -> dict:
+    async with httpx.AsyncClient(base_url=base_url, timeout=120) as client:
+        await sign_up(client)
+        goal_id = await seed(client, goals, history)
+        urls = {
+            "goals": "/api/goals",
+            "history": f"/api/goals/{goal_id}/history?limit=1000",
+            "stats_365": "/api/stats?period=365",
+        }
+        results = {}
+        for name, url in urls.items():
+            results[name] = {encoding: await measure(client, url, encoding, repeat) for encoding in ENCODINGS}
+    return results
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description="response serialisation and compression benchmark")
+    parser.add_argument("--goals", type=int, default=300)
+    parser.add_argument("--history", type=int, default=1000)
+    parser.add_argument("--repeat", type=int, default=30)
+    parser.add_argument("--port", type=int, default=8768)
+    args = parser.parse_args(argv)
+
+    server = start_server(args.port, 1)
+    base_url = f"http://127.0.0.1:{args.port}"
+    try:
+        asyncio.run(wait_ready(base_url))
+        results = asyncio.run(run(base_url, args.goals, args.history, args.repeat))
+    finally:
+        server.terminate()
+        server.wait()
+
+    results["serializer"] = serializer_comparison(args.goals, args.repeat)
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
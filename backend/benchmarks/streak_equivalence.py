@@ -0,0 +1,161 @@
+"""Check the streak index against the per-row algorithm it replaced.
+
+Seeds ``--users`` users per check-in storage with random check-in days
+(sparse, dense, runs ending today or yesterday, none at all), records them
+through ``progress.create_checkin`` in shuffled or ascending order so both
+the O(1) append and the out-of-order rebuild run, and compares
+``streaks.current_streaks`` with ``calculate_streaks`` below, the
+``/api/stats`` implementation before the index existed. The index is then
+cleared and recomputed with ``streaks.rebuild_streaks``, per user and for
+everyone, and compared again.
+
+Runs in a scratch schema inside one transaction that is rolled back at the
+end, like ``benchmarks.checkin_storage``.
+
+Usage (from backend/)::
+
+    DATABASE_URL=postgresql://... python -m benchmarks.streak_equivalence --users 500 --seed 1
+"""
+
+import argparse
+import json
+import random
+import sys
+import uuid
+from datetime import date, timedelta
+from typing import Iterable, List
+
+from sqlalchemy import text
+
+from app.database import SessionLocal
+from app.models.user_stats import UserStats
+from app.schemas.stats import Streaks
+from app.services import checkins, progress, streaks
+
+SCHEMA = "streak_equivalence_check"
+
+SETUP_SQL = f"""
+CREATE SCHEMA {SCHEMA};
+CREATE TABLE {SCHEMA}.checkins (LIKE public.checkins INCLUDING ALL);
+CREATE TABLE {SCHEMA}.checkin_bitmaps (LIKE public.checkin_bitmaps INCLUDING ALL);
+CREATE TABLE {SCHEMA}.user_stats (LIKE public.user_stats INCLUDING ALL);
+SET LOCAL search_path = {SCHEMA}, public
+"""
+
+ENSURE_STATS_SQL = "INSERT INTO user_stats (user_id) VALUES (:id) ON CONFLICT DO NOTHING"
+CLEAR_INDEX_SQL = "UPDATE user_stats SET current_streak_start = NULL, last_checkin_date = NULL, longest_streak = 0"
+
+
+def calculate_streaks(days: Iterable[date], today: date) -> Streaks:
+    """Current and longest streaks, as computed per request before the index."""
+    dates = sorted(set(days))
+    if not dates:
+        return Streaks(current=0, longest=0)
+
+    current = 0
+    check_date = today
+    while check_date in dates:
+        current += 1
+        check_date -= timedelta(days=1)
+
+    longest = 0
+    streak = 1
+    for idx in range(1, len(dates)):
+        if (dates[idx] - dates[idx - 1]).days == 1:
+            streak += 1
+        else:
+            longest = max(longest, streak)
+            streak = 1
+    longest = max(longest, streak)
+
+    return Streaks(current=current, longest=longest)
+
+
+def random_days(rng: random.Random, today: date, span: int) -> List[date]:
+    density = rng.choice([0.0, 0.05, 0.3, 0.7, 0.95, 1.0])
+    days = [today - timedelta(days=offset) for offset in range(span) if rng.random() < density]
+    shape = rng.random()
+    if shape < 0.25:
+        # A run ending today
+        days += [today - timedelta(days=offset) for offset in range(rng.randint(1, 20))]
+    elif shape < 0.4:
+        # A run ending yesterday: no current streak
+        days = [day for day in days if day != today]
+        days += [today - timedelta(days=offset) for offset in range(1, rng.randint(2, 20))]
+    return sorted(set(days))
+
+
+def compare(db, expected: dict, today: date, phase: str) -> List[dict]:
+    mismatches = []
+    for stats in db.query(UserStats).filter(UserStats.user_id.in_(list(expected))):
+        got = streaks.current_streaks(stats, today)
+        want = expected[stats.user_id]
+        if got != want:
+            mismatches.append(
+                {"phase": phase, "user_id": str(stats.user_id), "index": got.model_dump(), "expected": want.model_dump()}
+            )
+    return mismatches
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description="Compare the streak index with the per-row algorithm")
+    parser.add_argument("--users", type=int, default=300, help="users per storage")
+    parser.add_argument("--days", type=int, default=120, help="how far back check-ins go")
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args(argv)
+
+    seed = args.seed if args.seed is not None else random.randrange(2**32)
+    rng = random.Random(seed)
+    today = date.today()
+    storage_before = checkins.CHECKIN_STORAGE
+    db = SessionLocal()
+    report = {"seed": seed, "users": args.users, "days": args.days}
+    mismatches = []
+    try:
+        for statement in SETUP_SQL.strip().split(";\n"):
+            db.execute(text(statement))
+
+        for storage in ("table", "bitmap"):
+            checkins.CHECKIN_STORAGE = storage
+            expected = {}
+            for _ in range(args.users):
+                user_id = uuid.uuid4()
+                days = random_days(rng, today, args.days)
+                if rng.random() < 0.5:
+                    rng.shuffle(days)
+                for day in days:
+                    progress.create_checkin(db, user_id, day)
+                # Users without check-ins still have a stats row
+                db.execute(text(ENSURE_STATS_SQL), {"id": user_id})
+                expected[user_id] = calculate_streaks(days, today)
+            db.expire_all()
+            mismatches += compare(db, expected, today, f"{storage}/incremental")
+
+            db.execute(text(CLEAR_INDEX_SQL))
+            sample = rng.sample(list(expected), min(20, len(expected)))
+            for user_id in sample:
+                streaks.rebuild_streaks(db, user_id, storage=storage)
+            db.expire_all()
+            sampled = {user_id: expected[user_id] for user_id in sample}
+            mismatches += compare(db, sampled, today, f"{storage}/rebuild_user")
+
+            streaks.rebuild_streaks(db, storage=storage)
+            db.expire_all()
+            mismatches += compare(db, expected, today, f"{storage}/rebuild")
+            report[storage] = {
+                "checkin_days": sum(1 for _ in db.execute(text(checkins.DAYS_SQL[storage]))),
+                "with_current_streak": sum(1 for value in expected.values() if value.current),
+            }
+    finally:
+        checkins.CHECKIN_STORAGE = storage_before
+        db.rollback()
+        db.close()
+
+    report["mismatches"] = len(mismatches)
+    report["first_mismatches"] = mismatches[:5]
+    print(json.dumps(report, indent=2))
+    sys.exit(1 if mismatches else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,166 @@
+"""Throughput of the Telegram notification dispatcher.
+
+Seeds ``--chats`` Telegram-linked users with ``--per-chat`` queued
+notifications each, starts the fake Bot API server
+(``benchmarks.fake_telegram``) and runs ``telegram_dispatch.dispatch``
+against it twice:
+
+* ``telegram_limits`` - the server enforces 30 msg/s globally and 1 msg/s
+  per chat and the dispatcher uses the same limits: throughput should sit
+  just under 30 msg/s with no 429s;
+* ``unthrottled`` - both sides unlimited, measuring the pipeline itself.
+
+Every notification must end up ``sent`` (chats divisible by
+``--blocked-every`` answer 403 and must end up ``failed``). The
+set-based digest finder is timed on the seeded users as well. Seeded
+users are deleted at the end.
+
+Usage (from backend/)::
+
+    DATABASE_URL=postgresql://... python -m benchmarks.telegram_dispatch
+"""
+
+import argparse
+import asyncio
+import json
+import subprocess
+import sys
+import time
+import uuid
+from datetime import date
+
+import httpx
+from sqlalchemy import text
+
+from app.database import SessionLocal
+from app.services import reminders, telegram_dispatch
+
+SEED_SQL = """
+INSERT INTO users (id, email, name, telegram_id)
+SELECT gen_random_uuid(), :prefix || n || '@example.com', 'Bench', :base + n
+FROM generate_series(1, :chats) AS n;
+
+INSERT INTO goals (id, user_id, name, unit, target, current, color, deadline)
+SELECT gen_random_uuid(), u.id, 'Goal ' || n, 'km', 100, 10, '#3366FF', current_date + n - 2
+FROM users u, generate_series(1, 3) AS n
+WHERE u.email LIKE :prefix || '%'
+"""
+
+NOTIFICATIONS_SQL = """
+INSERT INTO notifications (id, user_id, chat_id, kind, dedupe_key, text)
+SELECT gen_random_uuid(), u.id, u.telegram_id, 'bench', 'bench:' || u.id || ':' || n || ':' || :run, 'Сообщение ' || n
+FROM users u, generate_series(1, :per_chat) AS n
+WHERE u.email LIKE :prefix || '%'
+"""
+
+CLEANUP_SQL = (
+    "DELETE FROM goals WHERE user_id IN (SELECT id FROM users WHERE email LIKE :prefix || '%')",
+    "DELETE FROM users WHERE email LIKE :prefix || '%'",
+)
+
+
+def statuses(db, prefix: str) -> dict:
+    rows = db.execute(
+        text(
+            "SELECT n.status, count(*) FROM notifications n JOIN users u ON u.id = n.user_id "
+            "WHERE u.email LIKE :prefix || '%' AND n.kind = 'bench' GROUP BY n.status"
+        ),
+        {"prefix": prefix},
+    ).all()
+    db.commit()
+    return dict(rows)
+
+
+async def scenario(name, db, prefix, args, port, server_args, dispatcher_options) -> dict:
+    server = subprocess.Popen(
+        [sys.executable, "-m", "benchmarks.fake_telegram", "--port", str(port), *server_args],
+        stdout=subprocess.DEVNULL,
+    )
+    try:
+        await wait_ready_fake(f"http://127.0.0.1:{port}")
+        db.execute(text(NOTIFICATIONS_SQL), {"prefix": prefix, "per_chat": args.per_chat, "run": name})
+        db.commit()
+        started = time.perf_counter()
+        result = await telegram_dispatch.dispatch(
+            max_seconds=args.timeout, token="123:bench", api_url=f"http://127.0.0.1:{port}", **dispatcher_options
+        )
+        elapsed = time.perf_counter() - started
+        async with httpx.AsyncClient() as client:
+            server_stats = (await client.get(f"http://127.0.0.1:{port}/stats")).json()
+        counts = statuses(db, prefix)
+        db.execute(text("DELETE FROM notifications WHERE kind = 'bench' AND dedupe_key LIKE '%:' || :run"), {"run": name})
+        db.commit()
+        return {
+            "dispatcher": result,
+            "server": server_stats,
+            "statuses": counts,
+            "messages_per_second": round(server_stats.get("delivered", 0) / elapsed, 1),
+        }
+    finally:
+        server.terminate()
+        server.wait()
+
+
+async def wait_ready_fake(base_url: str) -> None:
+    deadline = time.monotonic() + 15
+    async with httpx.AsyncClient() as client:
+        while time.monotonic() < deadline:
+            try:
+                await client.get(f"{base_url}/stats")
+                return
+            except httpx.TransportError:
+                await asyncio.sleep(0.1)
+    raise RuntimeError("fake Telegram server did not start")
+
+
+async def main_async(args) -> None:
+    prefix = f"tg-{uuid.uuid4().hex[:8]}-"
+    db = SessionLocal()
+    report = {"chats": args.chats, "per_chat": args.per_chat}
+    try:
+        for statement in SEED_SQL.strip().split(";\n\n"):
+            db.execute(text(statement), {"prefix": prefix, "chats": args.chats, "base": 10**12})
+        db.commit()
+
+        started = time.perf_counter()
+        queued = reminders.queue_digests(db, date.today())
+        report["digest_finder"] = {"queued": queued, "seconds": round(time.perf_counter() - started, 3)}
+        db.rollback()
+
+        blocked = ["--blocked-every", str(args.blocked_every)] if args.blocked_every else []
+        report["telegram_limits"] = await scenario(
+            "limits", db, prefix, args, args.port, ["--latency-ms", str(args.latency_ms), *blocked], {}
+        )
+        report["unthrottled"] = await scenario(
+            "unthrottled",
+            db,
+            prefix,
+            args,
+            args.port + 1,
+            ["--latency-ms", str(args.latency_ms), "--global-rate", "0", "--chat-interval", "0", *blocked],
+            {"global_rate": 100000, "chat_rate": 100000, "senders": args.senders},
+        )
+    finally:
+        db.rollback()
+        for statement in CLEANUP_SQL:
+            db.execute(text(statement), {"prefix": prefix})
+        db.commit()
+        db.close()
+    print(json.dumps(report, indent=2))
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description="Telegram dispatcher throughput")
+    parser.add_argument("--chats", type=int, default=600)
+    parser.add_argument("--per-chat", type=int, default=2)
+    parser.add_argument("--latency-ms", type=float, default=20)
+    parser.add_argument("--senders", type=int, default=64)
+    parser.add_argument("--blocked-every", type=int, default=50)
+    parser.add_argument("--timeout", type=float, default=600)
+    parser.add_argument("--port", type=int, default=8131)
+    args = parser.parse_args(argv)
+    asyncio.run(main_async(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,158 @@
+"""Telegram Mini App login storms.
+
+1. ``verify``: microseconds per ``verify_telegram_web_app_data`` call for
+   first-seen initData, for initData seen before (result cache) and for the
+   previous implementation (key derived and initData parsed with
+   ``parse_qs`` on every call), reproduced here as ``legacy_verify``.
+2. ``storm``: boots the API with a test bot token and has ``--users`` new
+   accounts each open the Mini App ``--launches`` times at once (double
+   taps, reloads), ``--concurrency`` requests in flight. Every login must
+   succeed and exactly one user per account must exist afterwards.
+
+Seeded users are deleted at the end.
+
+Usage (from backend/)::
+
+    DATABASE_URL=postgresql://... SECRET_KEY=... \\
+        python -m benchmarks.telegram_login --mode async
+"""
+
+import argparse
+import asyncio
+import collections
+import hashlib
+import hmac
+import json
+import os
+import random
+import time
+from urllib.parse import parse_qs, urlencode
+
+# Signs the generated initData; the server is started with the same token
+BOT_TOKEN = os.environ.setdefault("TELEGRAM_BOT_TOKEN", "123456:benchmark-token")
+
+import httpx  # noqa: E402
+from sqlalchemy import text  # noqa: E402
+
+from app.core import security  # noqa: E402
+from app.database import SessionLocal  # noqa: E402
+from benchmarks.common import percentile, start_server, wait_ready  # noqa: E402
+
+
+def init_data(telegram_id: int, bot_token: str = BOT_TOKEN) -> str:
+    fields = {
+        "auth_date": str(int(time.time())),
+        "query_id": f"AAH{telegram_id}",
+        "user": json.dumps({"id": telegram_id, "first_name": "Bench", "last_name": str(telegram_id), "language_code": "ru"}),
+    }
+    data_check_string = "\n".join(f"{k}={v}" for k, v in sorted(fields.items()))
+    secret = hmac.new(b"WebAppData", bot_token.encode(), hashlib.sha256).digest()
+    fields["hash"] = hmac.new(secret, data_check_string.encode(), hashlib.sha256).hexdigest()
+    return urlencode(fields)
+
+
+def legacy_verify(init_data_string: str, bot_token: str = BOT_TOKEN):
+    parsed = parse_qs(init_data_string)
+    hash_value = parsed.get("hash", [None])[0]
+    data_check_string = "\n".join(f"{k}={parsed[k][0]}" for k in sorted(parsed) if k != "hash")
+    secret = hmac.new(b"WebAppData", bot_token.encode(), hashlib.sha256).digest()
+    if hmac.new(secret, data_check_string.encode(), hashlib.sha256).hexdigest() != hash_value:
+        return None
+    import json as json_module
+
+    parsed["user"] = json_module.loads(parsed["user"][0])
+    return parsed
+
+
+def bench_verify(samples: int) -> dict:
+    payloads = [init_data(10**11 + n) for n in range(samples)]
+
+    def per_call_us(fn) -> float:
+        started = time.perf_counter()
+        for payload in payloads:
+            assert fn(payload)
+        return round((time.perf_counter() - started) / samples * 1e6, 2)
+
+    legacy = per_call_us(legacy_verify)
+    security.init_data_cache.clear()
+    first_seen = per_call_us(security.verify_telegram_web_app_data)
+    cached = per_call_us(security.verify_telegram_web_app_data)
+    return {"legacy_us": legacy, "first_seen_us": first_seen, "cached_us": cached}
+
+
+async def storm(base_url: str, users: int, launches: int, concurrency: int, base_id: int) -> dict:
+    logins = [init_data(base_id + n) for n in range(users) for _ in range(launches)]
+    random.Random(1).shuffle(logins)
+    pending = iter(logins)
+    latencies = []
+    codes = collections.Counter()
+
+    async def client_loop(client: httpx.AsyncClient) -> None:
+        for payload in pending:
+            started = time.perf_counter()
+            try:
+                response = await client.post("/api/auth/telegram-miniapp", json={"initData": payload})
+            except httpx.TransportError as exc:
+                codes[type(exc).__name__] += 1
+                continue
+            latencies.append((time.perf_counter() - started) * 1000)
+            codes[response.status_code] += 1
+
+    limits = httpx.Limits(max_connections=concurrency)
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=60) as client:
+        started = time.perf_counter()
+        await asyncio.gather(*(client_loop(client) for _ in range(concurrency)))
+        elapsed = time.perf_counter() - started
+    latencies.sort()
+    return {
+        "logins": len(logins),
+        "logins_per_second": round(len(logins) / elapsed, 1),
+        "status_codes": dict(codes),
+        "p50_ms": round(percentile(latencies, 50), 2),
+        "p99_ms": round(percentile(latencies, 99), 2),
+    }
+
+
+async def main_async(args) -> None:
+    report = {"verify": bench_verify(args.samples)}
+    base_id = random.randrange(3 * 10**12, 4 * 10**12)
+    server = start_server(args.port, DATABASE_MODE=args.mode, TELEGRAM_BOT_TOKEN=BOT_TOKEN)
+    base_url = f"http://127.0.0.1:{args.port}"
+    try:
+        await wait_ready(base_url)
+        report["storm"] = await storm(base_url, args.users, args.launches, args.concurrency, base_id)
+    finally:
+        server.terminate()
+        server.wait()
+
+    db = SessionLocal()
+    try:
+        params = {"low": base_id, "high": base_id + args.users}
+        rows = db.execute(
+            text("SELECT count(*), count(DISTINCT telegram_id) FROM users WHERE telegram_id >= :low AND telegram_id < :high"),
+            params,
+        ).one()
+        report["storm"]["users_created"] = rows[0]
+        report["storm"]["one_user_per_account"] = rows[0] == rows[1] == args.users
+        db.execute(text("DELETE FROM users WHERE telegram_id >= :low AND telegram_id < :high"), params)
+        db.commit()
+    finally:
+        db.close()
+    report["mode"] = args.mode
+    print(json.dumps(report, indent=2))
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description="Telegram Mini App login storm")
+    parser.add_argument("--mode", choices=["sync", "async"], default="sync")
+    parser.add_argument("--users", type=int, default=500)
+    parser.add_argument("--launches", type=int, default=4, help="simultaneous logins per account")
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--samples", type=int, default=5000, help="distinct initData strings (fit in the cache)")
+    parser.add_argument("--port", type=int, default=8134)
+    args = parser.parse_args(argv)
+    asyncio.run(main_async(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,190 @@
+"""Telegram webhook ingestion under a burst of progress commands.
+
+Seeds ``--users`` Telegram-linked users with two goals each, starts the API
+with the webhook enabled and posts ``--updates`` ``/add`` commands with
+``--concurrency`` requests in flight (or at a steady ``--rate``). Reports how fast the webhook answers
+(what Telegram waits for), how long the queued commands take to be applied
+and the queue metrics from ``/health/telegram``, then checks every goal's
+``current`` against the deltas sent. Seeded users are deleted at the end.
+
+Usage (from backend/)::
+
+    DATABASE_URL=postgresql://... python -m benchmarks.telegram_webhook --mode async
+"""
+
+import argparse
+import asyncio
+import collections
+import json
+import random
+import time
+import uuid
+
+import httpx
+from sqlalchemy import text
+
+from app.database import SessionLocal
+from benchmarks.common import percentile, start_server, wait_ready
+
+SECRET = "benchmark-secret"
+GOALS = ("Бег", "Reading")
+
+SEED_SQL = """
+INSERT INTO users (id, email, name, telegram_id)
+SELECT gen_random_uuid(), :prefix || n || '@example.com', 'Bench', :base + n
+FROM generate_series(1, :users) AS n;
+
+INSERT INTO goals (id, user_id, name, unit, target, current, color)
+SELECT gen_random_uuid(), u.id, g.name, 'km', 1000000, 0, '#3366FF'
+FROM users u, unnest(CAST(:goals AS text[])) AS g(name)
+WHERE u.email LIKE :prefix || '%'
+"""
+
+CURRENT_SQL = """
+SELECT u.telegram_id, g.name, g.current
+FROM goals g JOIN users u ON u.id = g.user_id
+WHERE u.email LIKE :prefix || '%'
+"""
+
+CLEANUP_SQL = (
+    "DELETE FROM goal_history WHERE goal_id IN "
+    "(SELECT g.id FROM goals g JOIN users u ON u.id = g.user_id WHERE u.email LIKE :prefix || '%')",
+    "DELETE FROM checkins WHERE user_id IN (SELECT id FROM users WHERE email LIKE :prefix || '%')",
+    "DELETE FROM goals WHERE user_id IN (SELECT id FROM users WHERE email LIKE :prefix || '%')",
+    "DELETE FROM users WHERE email LIKE :prefix || '%'",
+)
+
+
+def update(update_id: int, telegram_id: int, goal: str, amount: int) -> dict:
+    return {
+        "update_id": update_id,
+        "message": {
+            "message_id": update_id,
+            "date": int(time.time()),
+            "chat": {"id": telegram_id, "type": "private"},
+            "from": {"id": telegram_id, "is_bot": False, "first_name": "Bench"},
+            "text": f"/add {goal.lower()} {amount}",
+        },
+    }
+
+
+async def burst(base_url: str, updates: list, concurrency: int, rate: float) -> dict:
+    """Post ``updates`` with ``concurrency`` requests in flight, or, with a
+    ``rate``, one every ``1 / rate`` seconds regardless of the responses."""
+    latencies = []
+    codes = collections.Counter()
+    pending = iter(updates)
+    headers = {"X-Telegram-Bot-Api-Secret-Token": SECRET}
+
+    async def post(client: httpx.AsyncClient, body: dict) -> None:
+        started = time.perf_counter()
+        response = await client.post("/api/telegram/webhook", json=body, headers=headers)
+        latencies.append((time.perf_counter() - started) * 1000)
+        codes[response.status_code] += 1
+
+    async def client_loop(client: httpx.AsyncClient) -> None:
+        for body in pending:
+            await post(client, body)
+
+    async def paced(client: httpx.AsyncClient) -> None:
+        tasks = []
+        for index, body in enumerate(updates):
+            await asyncio.sleep(max(0.0, started + index / rate - time.perf_counter()))
+            tasks.append(asyncio.create_task(post(client, body)))
+        await asyncio.gather(*tasks)
+
+    limits = httpx.Limits(max_connections=concurrency)
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=30) as client:
+        started = time.perf_counter()
+        if rate:
+            await paced(client)
+        else:
+            await asyncio.gather(*(client_loop(client) for _ in range(concurrency)))
+        elapsed = time.perf_counter() - started
+    latencies.sort()
+    return {
+        "seconds": round(elapsed, 2),
+        "requests_per_second": round(len(updates) / elapsed, 1),
+        "status_codes": dict(codes),
+        "ack_p50_ms": round(percentile(latencies, 50), 2),
+        "ack_p99_ms": round(percentile(latencies, 99), 2),
+    }
+
+
+async def wait_applied(base_url: str, expected: int, timeout: float = 120) -> dict:
+    deadline = time.monotonic() + timeout
+    async with httpx.AsyncClient(base_url=base_url) as client:
+        while True:
+            stats = (await client.get("/health/telegram")).json()
+            done = sum(stats.get(key, 0) for key in ("applied", "unknown_user", "unknown_goal", "errors"))
+            if done >= expected or time.monotonic() > deadline:
+                return stats
+            await asyncio.sleep(0.05)
+
+
+async def main_async(args) -> None:
+    prefix = f"tgw-{uuid.uuid4().hex[:8]}-"
+    base = random.randrange(10**12, 2 * 10**12)
+    db = SessionLocal()
+    for statement in SEED_SQL.strip().split(";\n\n"):
+        db.execute(text(statement), {"prefix": prefix, "users": args.users, "base": base, "goals": list(GOALS)})
+    db.commit()
+
+    rng = random.Random(1)
+    updates = [
+        update(n, base + rng.randint(1, args.users), rng.choice(GOALS), rng.randint(1, 5))
+        for n in range(1, args.updates + 1)
+    ]
+    expected = collections.Counter()
+    for body in updates:
+        _, goal, amount = body["message"]["text"].split()
+        expected[(body["message"]["from"]["id"], goal)] += int(amount)
+
+    server = start_server(
+        args.port,
+        DATABASE_MODE=args.mode,
+        TELEGRAM_WEBHOOK_SECRET=SECRET,
+        TELEGRAM_UPDATE_QUEUE_SIZE=str(args.queue_size),
+    )
+    base_url = f"http://127.0.0.1:{args.port}"
+    try:
+        await wait_ready(base_url)
+        started = time.perf_counter()
+        report = {"mode": args.mode, "updates": args.updates, "webhook": await burst(base_url, updates, args.concurrency, args.rate)}
+        accepted = report["webhook"]["status_codes"].get(200, 0)
+        report["queue"] = await wait_applied(base_url, accepted)
+        report["all_applied_after_seconds"] = round(time.perf_counter() - started, 2)
+    finally:
+        server.terminate()
+        server.wait()
+
+    try:
+        current = {(telegram_id, name.lower()): value for telegram_id, name, value in db.execute(text(CURRENT_SQL), {"prefix": prefix})}
+        if report["webhook"]["status_codes"].get(503):
+            report["totals_match"] = "skipped, some updates were rejected"
+        else:
+            report["totals_match"] = all(current.get(key, 0) == value for key, value in expected.items())
+    finally:
+        db.rollback()
+        for statement in CLEANUP_SQL:
+            db.execute(text(statement), {"prefix": prefix})
+        db.commit()
+        db.close()
+    print(json.dumps(report, indent=2, ensure_ascii=False))
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description="Telegram webhook ingestion benchmark")
+    parser.add_argument("--mode", choices=["sync", "async"], default="sync")
+    parser.add_argument("--users", type=int, default=200)
+    parser.add_argument("--updates", type=int, default=5000)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--rate", type=float, default=0, help="updates per second (default: as fast as possible)")
+    parser.add_argument("--queue-size", type=int, default=10000)
+    parser.add_argument("--port", type=int, default=8132)
+    args = parser.parse_args(argv)
+    asyncio.run(main_async(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -59,7 +59,7 @@ export default function AllGoalsPage() {
   const loadGoals = async () => {
     try {
       setLoading(true);
-      const data = await goalsService.getGoals();
+      const data = await goalsService.syncGoals();
       setGoals(data);
     } catch (err) {
       console.error('Failed to load goals:', err);
@@ -1,6 +1,20 @@
 import api from '../utils/api';
 
 export const goalsService = {
+  // Goals pulled so far via /goals/changes, keyed by id
+  _synced: new Map(),
+  _syncCursor: null,
+
+  async syncGoals() {
+    const params = this._syncCursor ? { since: this._syncCursor } : {};
+    const { data } = await api.get('/goals/changes', { params });
+    if (data.full) this._synced.clear();
+    data.goals.forEach((goal) => this._synced.set(goal.id, goal));
+    data.deleted.forEach((id) => this._synced.delete(id));
+    this._syncCursor = data.cursor;
+    return Array.from(this._synced.values());
+  },
+
   async getGoals(filters = {}) {
     const params = new URLSearchParams();
     if (filters.status) params.append('status', filters.status);
@@ -44,7 +58,15 @@ export const goalsService = {
   },
 
   async getHistory(id) {
-    const response = await api.get(`/goals/${id}/history`);
-    return response.data;
+    // History is paginated; the drawer shows the whole timeline
+    const response = await api.get(`/goals/${id}/history`, { params: { limit: 1000 } });
+    const history = response.data;
+    let cursor = history.next_cursor;
+    while (cursor) {
+      const page = await api.get(`/goals/${id}/history`, { params: { limit: 1000, cursor } });
+      history.rows.push(...page.data.rows);
+      cursor = page.data.next_cursor;
+    }
+    return history;
   },
 };